@@ -0,0 +1,59 @@
+"""Add identifier_hash blind index to client
+
+Revision ID: 3c1f9a7e2b54
+Revises: 934af5fcae06
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from src.api.common.utils.encryption import decrypt_data, compute_blind_index
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7e2b54'
+down_revision: Union[str, None] = '934af5fcae06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('client', sa.Column('identifier_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.create_index(op.f('ix_client_identifier_hash'), 'client', ['identifier_hash'], unique=False)
+
+    # --- Backfill identifier_hash in batches (keyset over id) ---
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        clients = connection.execute(
+            sa.text(
+                "SELECT id, encrypted_identifier FROM client "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not clients:
+            break
+        connection.execute(
+            sa.text("UPDATE client SET identifier_hash = :identifier_hash WHERE id = :id"),
+            [
+                {
+                    "identifier_hash": compute_blind_index(decrypt_data(client.encrypted_identifier)),
+                    "id": client.id
+                }
+                for client in clients
+            ]
+        )
+        last_id = clients[-1].id
+    # --- End backfill ---
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_client_identifier_hash'), table_name='client')
+    op.drop_column('client', 'identifier_hash')
@@ -0,0 +1,62 @@
+"""Add external_id_hash blind index to clientexternalid
+
+Revision ID: 8d2e4b6a1f37
+Revises: 3c1f9a7e2b54
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from src.api.common.utils.encryption import decrypt_data, compute_blind_index
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1f37'
+down_revision: Union[str, None] = '3c1f9a7e2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clientexternalid', sa.Column('external_id_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    # --- Backfill external_id_hash in batches (keyset over id) ---
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        external_ids = connection.execute(
+            sa.text(
+                "SELECT id, encrypted_external_id FROM clientexternalid "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not external_ids:
+            break
+        connection.execute(
+            sa.text("UPDATE clientexternalid SET external_id_hash = :external_id_hash WHERE id = :id"),
+            [
+                {
+                    "external_id_hash": compute_blind_index(decrypt_data(external_id.encrypted_external_id)),
+                    "id": external_id.id
+                }
+                for external_id in external_ids
+            ]
+        )
+        last_id = external_ids[-1].id
+    # --- End backfill ---
+
+    # Created after the backfill: fails if a (system, external_id) pair is duplicated
+    op.create_index('ix_clientexternalid_system_external_id_hash', 'clientexternalid',
+                    ['system', 'external_id_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientexternalid_system_external_id_hash', table_name='clientexternalid')
+    op.drop_column('clientexternalid', 'external_id_hash')
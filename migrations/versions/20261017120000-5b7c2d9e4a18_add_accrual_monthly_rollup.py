@@ -0,0 +1,54 @@
+"""Add accrual monthly rollup table
+
+Revision ID: 5b7c2d9e4a18
+Revises: 8d2e4b6a1f37
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7c2d9e4a18'
+down_revision: Union[str, None] = '8d2e4b6a1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('accrualmonthlyrollup',
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('contract_status', postgresql.ENUM('ACTIVE', 'CANCELED', 'CLOSED', name='servicecontractstatus', create_type=False), nullable=False),
+    sa.Column('accrued_amount', sa.Float(), nullable=False),
+    sa.Column('accrued_periods_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['service.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('month', 'service_id', 'contract_status', name='uq_accrualmonthlyrollup_month_service_status')
+    )
+    op.create_index(op.f('ix_accrualmonthlyrollup_month'), 'accrualmonthlyrollup', ['month'], unique=False)
+
+    # --- Populate the rollup from the existing accrued periods ---
+    op.execute("""
+        INSERT INTO accrualmonthlyrollup
+            (created_at, updated_at, month, service_id, contract_status, accrued_amount, accrued_periods_count)
+        SELECT now(), now(), date_trunc('month', ap.accrual_date)::date, sc.service_id, sc.status,
+               SUM(ap.accrued_amount), COUNT(ap.id)
+        FROM accruedperiod ap
+        JOIN contractaccrual ca ON ca.id = ap.contract_accrual_id
+        JOIN servicecontract sc ON sc.id = ca.contract_id
+        GROUP BY date_trunc('month', ap.accrual_date)::date, sc.service_id, sc.status
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_accrualmonthlyrollup_month'), table_name='accrualmonthlyrollup')
+    op.drop_table('accrualmonthlyrollup')
@@ -0,0 +1,38 @@
+"""Add integration sync state table
+
+Revision ID: 9e4f1a6c3d72
+Revises: 5b7c2d9e4a18
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4f1a6c3d72'
+down_revision: Union[str, None] = '5b7c2d9e4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('integrationsyncstate',
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('integration_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('resource', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('last_synced_timestamp', sa.BigInteger(), nullable=True),
+    sa.Column('cursor', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('integration_name', 'resource', name='uq_integrationsyncstate_integration_resource')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('integrationsyncstate')
@@ -0,0 +1,29 @@
+"""Add progress to sync executions
+
+Revision ID: 2c8d5f0b7e41
+Revises: 9e4f1a6c3d72
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8d5f0b7e41'
+down_revision: Union[str, None] = '9e4f1a6c3d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sync_executions', sa.Column(
+        'progress', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_executions', 'progress')
@@ -0,0 +1,29 @@
+"""Add index on service contracts by client and status
+
+Revision ID: 6a3e9c1d8b25
+Revises: 2c8d5f0b7e41
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3e9c1d8b25'
+down_revision: Union[str, None] = '2c8d5f0b7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_servicecontract_client_id_status', 'servicecontract',
+                    ['client_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_servicecontract_client_id_status', table_name='servicecontract')
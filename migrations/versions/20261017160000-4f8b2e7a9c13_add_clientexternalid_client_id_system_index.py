@@ -0,0 +1,29 @@
+"""Add index on client external IDs by client and system
+
+Revision ID: 4f8b2e7a9c13
+Revises: 6a3e9c1d8b25
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8b2e7a9c13'
+down_revision: Union[str, None] = '6a3e9c1d8b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_clientexternalid_client_id_system', 'clientexternalid',
+                    ['client_id', 'system'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientexternalid_client_id_system', table_name='clientexternalid')
@@ -27,3 +27,23 @@ class AccrualTimeConstants:
     
     # Contract without service periods time limits (months)
     CONTRACT_WITHOUT_PERIODS_MAX_MONTHS = 3
+
+
+# Batching and concurrency constants for accrual processing
+class AccrualProcessingConstants:
+    """Constants for batched (unit-of-work) and concurrent accrual processing."""
+
+    # Contracts processed per commit in unit-of-work mode
+    UNIT_OF_WORK_CHUNK_SIZE = 200
+
+    # Contracts processed concurrently (1 = sequential)
+    MAX_CONCURRENCY = 1
+    MAX_CONCURRENCY_LIMIT = 32
+
+
+# Export constants for accrual reports
+class AccrualExportConstants:
+    """Constants for streaming accrual exports."""
+
+    # Rows fetched from the database and written per CSV chunk
+    EXPORT_BATCH_SIZE = 500
@@ -1,12 +1,14 @@
 from datetime import date
-from fastapi import APIRouter, Depends, Query, Response, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi.logger import logger
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Callable, Iterator, Optional
+from sqlmodel import Session as SQLModelSession
 
 from src.api.accruals.services.accrual_reports_service import AccrualReportsService
-from src.api.common.utils.database import get_db
-from src.api.accruals.schemas import ProcessPeriodRequest, ContractAccrualProcessingResponse
+from src.api.common.utils.database import engine, get_db
+from src.api.accruals.schemas import ProcessPeriodRequest, ProcessRangeRequest, ContractAccrualProcessingResponse, ContractAccrualRangeProcessingResponse
 from src.api.accruals.services.contract_accrual_processor import ContractAccrualProcessor
 
 router = APIRouter(prefix="/accruals", tags=["accruals"])
@@ -31,17 +33,17 @@ async def process_contract_accruals(
         processor = ContractAccrualProcessor(db)
 
         # Process all contracts for the target month (now async)
-        results = await processor.process_all_contracts(request.period_start_date)
+        results = await processor.process_all_contracts(
+            request.period_start_date,
+            unit_of_work=request.unit_of_work,
+            chunk_size=request.chunk_size,
+            max_concurrency=request.max_concurrency
+        )
 
         # Format response
         response = ContractAccrualProcessingResponse(
             period_start_date=request.period_start_date,
-            summary={
-                "total_contracts_processed": results['total_processed'],
-                "successful_accruals": results['successful'],
-                "failed_accruals": results['failed'],
-                "skipped_accruals": results['skipped']
-            },
+            summary=_processing_summary(results),
             processing_results=results['results'],
             notifications=results['notifications']
         )
@@ -60,6 +62,82 @@ async def process_contract_accruals(
         )
 
 
+def _processing_summary(results: dict) -> dict:
+    return {
+        "total_contracts_processed": results['total_processed'],
+        "successful_accruals": results['successful'],
+        "failed_accruals": results['failed'],
+        "skipped_accruals": results['skipped']
+    }
+
+
+@router.post("/process-range", response_model=ContractAccrualRangeProcessingResponse)
+async def process_contract_accruals_range(
+    request: ProcessRangeRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Process contract accruals for consecutive months in a single pass.
+
+    Contracts are loaded once for the whole range and the months are processed
+    in order, which is equivalent to calling /process-contracts for each month.
+    """
+    return await run_contract_accruals_range(request, db)
+
+
+async def run_contract_accruals_range(
+    request: ProcessRangeRequest,
+    db: Session,
+    on_month: Optional[Callable[[ContractAccrualProcessingResponse], None]] = None
+) -> ContractAccrualRangeProcessingResponse:
+    """
+    Process contract accruals for a range of months, as /process-range does.
+
+    on_month is called with the response of each month as soon as it is committed.
+    """
+    try:
+        logger.info(
+            f"Starting contract accrual processing for range: {request.start_month} - {request.end_month}")
+
+        processor = ContractAccrualProcessor(db)
+        results = await processor.process_range(
+            request.start_month,
+            request.end_month,
+            chunk_size=request.chunk_size,
+            on_month=(lambda month_results: on_month(_month_response(month_results))) if on_month else None
+        )
+
+        response = ContractAccrualRangeProcessingResponse(
+            start_month=request.start_month,
+            end_month=request.end_month,
+            summary=_processing_summary(results),
+            monthly_results=[_month_response(month_results)
+                             for month_results in results['months']]
+        )
+
+        logger.info(f"Contract accrual range processing completed. Months: {len(results['months'])}, "
+                    f"Processed: {results['total_processed']}, Successful: {results['successful']}, "
+                    f"Failed: {results['failed']}, Skipped: {results['skipped']}")
+
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in contract accrual range processing: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Contract accrual range processing failed: {str(e)}"
+        )
+
+
+def _month_response(month_results: dict) -> ContractAccrualProcessingResponse:
+    return ContractAccrualProcessingResponse(
+        period_start_date=month_results['period_start_date'],
+        summary=_processing_summary(month_results),
+        processing_results=month_results['results'],
+        notifications=month_results['notifications']
+    )
+
+
 @router.get("/process-contracts/schema")
 def get_accrual_processing_schema():
     """
@@ -112,12 +190,22 @@ def get_accrual_processing_schema():
     }
 
 
-@router.get("/export/csv", response_class=Response)
+def _iter_accruals_csv(start_date: date, end_date: date) -> Iterator[str]:
+    """
+    Generate the accruals CSV with its own session.
+
+    The request session is closed before a streamed body is sent, so the
+    stream opens a session that is closed when it ends or the client disconnects.
+    """
+    with SQLModelSession(engine) as db:
+        yield from AccrualReportsService(db).iter_accruals_csv(start_date, end_date)
+
+
+@router.get("/export/csv", response_class=StreamingResponse)
 def export_accruals_as_csv(
     start_date: date = Query(...,
                              description="Start date for export (inclusive)"),
-    end_date: date = Query(..., description="End date for export (inclusive)"),
-    db: Session = Depends(get_db)
+    end_date: date = Query(..., description="End date for export (inclusive)")
 ):
     """
     Export accruals within a date range as a CSV file.
@@ -125,15 +213,12 @@ def export_accruals_as_csv(
     The CSV contains contract details, client information, and accrual amounts by month.
     Columns include contract details, client info, service periods, and monthly accrual amounts.
     """
-    reports_service = AccrualReportsService(db)
-    csv_data = reports_service.generate_accruals_csv(start_date, end_date)
-
     # Generate filename based on date range
     filename = f"accruals_{start_date.isoformat()}_{end_date.isoformat()}.csv"
 
-    # Return CSV file as response
-    return Response(
-        content=csv_data.getvalue(),
+    # Stream the CSV file as it is generated
+    return StreamingResponse(
+        _iter_accruals_csv(start_date, end_date),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
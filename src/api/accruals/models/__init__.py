@@ -1,5 +1,6 @@
 """Accruals models package."""
 from src.api.accruals.models.accrued_period import AccruedPeriod
 from src.api.accruals.models.contract_accrual import ContractAccrual
+from src.api.accruals.models.accrual_monthly_rollup import AccrualMonthlyRollup
 
-__all__ = ["AccruedPeriod", "ContractAccrual"]
+__all__ = ["AccruedPeriod", "ContractAccrual", "AccrualMonthlyRollup"]
@@ -0,0 +1,30 @@
+from datetime import date
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+from src.api.common.constants.services import ServiceContractStatus
+from src.api.common.models.base import BaseModel, TimestampMixin
+
+
+class AccrualMonthlyRollup(BaseModel, TimestampMixin, table=True):
+    """
+    Accrued amounts by month, service and contract status.
+
+    Maintained by the accrual processor whenever it records AccruedPeriods,
+    and rebuilt from AccruedPeriod with AccrualRollupService.rebuild.
+    """
+    __table_args__ = (
+        UniqueConstraint("month", "service_id", "contract_status",
+                         name="uq_accrualmonthlyrollup_month_service_status"),
+    )
+
+    id: int = Field(default=None, primary_key=True)
+    # First day of the month
+    month: date = Field(nullable=False, index=True)
+    service_id: int = Field(foreign_key="service.id", nullable=False)
+    # Current status of the contracts the amounts belong to
+    contract_status: ServiceContractStatus = Field(nullable=False)
+    accrued_amount: float = Field(nullable=False, default=0.0)
+    accrued_periods_count: int = Field(nullable=False, default=0)
+
+    class Config:
+        from_attributes = True
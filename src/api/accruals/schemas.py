@@ -1,9 +1,10 @@
 from datetime import date
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from enum import Enum
 
 from src.api.common.constants.services import ServicePeriodStatus
+from src.api.accruals.constants.accruals import AccrualProcessingConstants
 
 
 class ProcessingStatus(str, Enum):
@@ -53,6 +54,38 @@ class AccruedPeriodResponse(AccruedPeriodInDB):
 class ProcessPeriodRequest(BaseModel):
     period_start_date: date = Field(...,
                                     description="First day of the month to be processed")
+    unit_of_work: bool = Field(
+        default=False, description="Commit once per chunk of contracts instead of after every change")
+    chunk_size: int = Field(
+        default=AccrualProcessingConstants.UNIT_OF_WORK_CHUNK_SIZE, ge=1,
+        description="Number of contracts per commit in unit-of-work mode")
+    max_concurrency: int = Field(
+        default=AccrualProcessingConstants.MAX_CONCURRENCY, ge=1,
+        le=AccrualProcessingConstants.MAX_CONCURRENCY_LIMIT,
+        description="Maximum number of contracts processed concurrently (not supported in unit-of-work mode)")
+
+    @model_validator(mode='after')
+    def check_concurrency_mode(self):
+        if self.unit_of_work and self.max_concurrency > 1:
+            raise ValueError(
+                'max_concurrency must be 1 in unit-of-work mode')
+        return self
+
+
+class ProcessRangeRequest(BaseModel):
+    start_month: date = Field(...,
+                              description="First month to be processed")
+    end_month: date = Field(...,
+                            description="Last month to be processed (inclusive)")
+    chunk_size: int = Field(
+        default=AccrualProcessingConstants.UNIT_OF_WORK_CHUNK_SIZE, ge=1,
+        description="Number of contracts per commit")
+
+    @model_validator(mode='after')
+    def check_month_range(self):
+        if self.start_month.replace(day=1) > self.end_month.replace(day=1):
+            raise ValueError('start_month must not be after end_month')
+        return self
 
 
 class ContractProcessingResult(BaseModel):
@@ -84,6 +117,15 @@ class ContractAccrualProcessingResponse(BaseModel):
         default=[], description="System notifications and alerts")
 
 
+class ContractAccrualRangeProcessingResponse(BaseModel):
+    """Response schema for multi-month contract accrual processing."""
+    start_month: date
+    end_month: date
+    summary: dict = Field(description="Processing summary with counts for the whole range")
+    monthly_results: List[ContractAccrualProcessingResponse] = Field(
+        description="Processing results for each month, in order")
+
+
 class NotificationSchema(BaseModel):
     """Schema for processing notifications."""
     type: str = Field(
@@ -1,19 +1,20 @@
 from datetime import date
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import case, or_
+from sqlalchemy import case, func, or_
 from collections import defaultdict
 import csv
 from io import StringIO
 
 from src.api.accruals.models.accrued_period import AccruedPeriod
 from src.api.accruals.models.contract_accrual import ContractAccrual
+from src.api.accruals.services.accrual_rollup_service import AccrualRollupService
 from src.api.services.models.service_contract import ServiceContract
 from src.api.services.models.service_period import ServicePeriod
 from src.api.services.models.service import Service
 from src.api.clients.models.client import Client
 from src.api.common.constants.services import ServiceContractStatus
-from src.api.accruals.constants.accruals import ContractAccrualStatus
+from src.api.accruals.constants.accruals import ContractAccrualStatus, AccrualExportConstants
 
 
 class AccrualReportsService:
@@ -31,7 +32,43 @@ class AccrualReportsService:
         Returns:
             Dict containing service period data and accrual amounts by month
         """
-        # Step 1: Get all service contracts with their related entities
+        months = self._get_export_months(start_date, end_date)
+        results = self._get_export_contracts_query(start_date, end_date).all()
+        accruals_by_contract_period = self._get_accruals_by_contract_period(
+            start_date, end_date)
+
+        return {
+            "headers": self._get_export_headers(months),
+            "data": list(self._iter_export_rows(results, accruals_by_contract_period, months)),
+            "months": [name for _, name in months]
+        }
+
+    def _get_export_months(self, start_date: date, end_date: date) -> List[Tuple[str, str]]:
+        """Get the (month key, month name) pairs of the export columns."""
+        months = []
+        # Ensure we start at beginning of month
+        current_date = start_date.replace(day=1)
+        while current_date <= end_date:
+            month_key = f"{current_date.year}-{current_date.month:02d}"
+            months.append((month_key, current_date.strftime("%B %Y")))
+
+            # Move to the next month
+            year = current_date.year + (current_date.month // 12)
+            month = (current_date.month % 12) + 1
+            current_date = date(year, month, 1)
+        return months
+
+    def _get_export_headers(self, months: List[Tuple[str, str]]) -> List[str]:
+        """Get the CSV export headers, including one column per month."""
+        return ["Contract start date", "Client", "Email", "Contract Status", "Service", "Period",
+                "Period Status", "Status Change Date", "Total to accrue", "Pending to accrue",
+                "Period start date", "Period end date"] + [name for _, name in months]
+
+    def _get_export_contracts_query(self, start_date: date, end_date: date):
+        """
+        Build the query of contract/period rows to export, one row per service period.
+        """
+        # Get all service contracts with their related entities
         # Include contracts without service periods but that have accruals in the date range
 
         # First, get contract accrual IDs that have been accrued in the date range
@@ -100,9 +137,13 @@ class AccrualReportsService:
             )
         )
 
-        results = query.all()
+        return query
 
-        # Step 2: Get all accrued periods in the date range
+    def _get_accruals_by_contract_period(self, start_date: date, end_date: date) -> Dict[tuple, Dict[str, float]]:
+        """
+        Get accrued amounts in the date range by (contract_accrual_id, service_period_id) and month.
+        """
+        # Get all accrued periods in the date range
         accruals_query = (
             self.db.query(AccruedPeriod)
             .filter(
@@ -116,19 +157,6 @@ class AccrualReportsService:
         # Create a dictionary mapping contract_accrual_id and service_period_id to accruals by month
         accruals_by_contract_period = defaultdict(dict)
 
-        # Get all distinct months in the date range for column headers
-        months = []
-        # Ensure we start at beginning of month
-        current_date = start_date.replace(day=1)
-        while current_date <= end_date:
-            month_key = f"{current_date.year}-{current_date.month:02d}"
-            months.append((month_key, current_date.strftime("%B %Y")))
-
-            # Move to the next month
-            year = current_date.year + (current_date.month // 12)
-            month = (current_date.month % 12) + 1
-            current_date = date(year, month, 1)
-
         # Organize accruals by contract_accrual_id, service_period_id, and month
         # service_period_id can be None for accruals without associated periods
         # contract_accrual_id should always exist for accrued periods, but handling defensively
@@ -146,70 +174,89 @@ class AccrualReportsService:
             if accrual.service_period_id is None:
                 null_period_accruals.append(accrual)
 
+        # Prefetch the contracts and service periods of all NULL period accruals at once
+        periods_by_contract_accrual = self._get_service_periods_by_contract_accrual(
+            {null_accrual.contract_accrual_id for null_accrual in null_period_accruals})
+
         for null_accrual in null_period_accruals:
+            if null_accrual.contract_accrual_id not in periods_by_contract_accrual:
+                continue
+            contract_periods = periods_by_contract_accrual[null_accrual.contract_accrual_id]
+
             # Find the service period that contains this accrual date for this contract
-            contract_accrual = self.db.get(
-                ContractAccrual, null_accrual.contract_accrual_id)
-            if contract_accrual:
-                # Look for service periods that overlap with this accrual date
-                overlapping_periods = self.db.query(ServicePeriod).filter(
-                    ServicePeriod.contract_id == contract_accrual.contract_id,
-                    ServicePeriod.start_date <= null_accrual.accrual_date,
-                    ServicePeriod.end_date >= null_accrual.accrual_date
-                ).all()
-
-                if overlapping_periods:
-                    # Move the accrual amount from NULL period to the correct period
-                    target_period = overlapping_periods[0]
-                    month_key = f"{null_accrual.accrual_date.year}-{null_accrual.accrual_date.month:02d}"
-
-                    # Remove from NULL key
-                    null_key = (null_accrual.contract_accrual_id, None)
-                    if null_key in accruals_by_contract_period and month_key in accruals_by_contract_period[null_key]:
-                        amount = accruals_by_contract_period[null_key][month_key]
-                        del accruals_by_contract_period[null_key][month_key]
-
-                        # Add to correct period key
-                        correct_key = (
-                            null_accrual.contract_accrual_id, target_period.id)
-                        if correct_key not in accruals_by_contract_period:
-                            accruals_by_contract_period[correct_key] = {}
-                        accruals_by_contract_period[correct_key][month_key] = accruals_by_contract_period[correct_key].get(
-                            month_key, 0.0) + amount
-                else:
-                    # No overlapping periods found - try to find the most recent service period
-                    # This handles cases where accruals happen after service periods have ended
-                    most_recent_period = self.db.query(ServicePeriod).filter(
-                        ServicePeriod.contract_id == contract_accrual.contract_id
-                    ).order_by(ServicePeriod.end_date.desc()).first()
-
-                    if most_recent_period:
-                        # Move the accrual amount to the most recent period
-                        month_key = f"{null_accrual.accrual_date.year}-{null_accrual.accrual_date.month:02d}"
-
-                        # Remove from NULL key
-                        null_key = (null_accrual.contract_accrual_id, None)
-                        if null_key in accruals_by_contract_period and month_key in accruals_by_contract_period[null_key]:
-                            amount = accruals_by_contract_period[null_key][month_key]
-                            del accruals_by_contract_period[null_key][month_key]
-
-                            # Add to most recent period key
-                            correct_key = (
-                                null_accrual.contract_accrual_id, most_recent_period.id)
-                            if correct_key not in accruals_by_contract_period:
-                                accruals_by_contract_period[correct_key] = {}
-                            accruals_by_contract_period[correct_key][month_key] = accruals_by_contract_period[correct_key].get(
-                                month_key, 0.0) + amount
-
-                        print(
-                            f"Redistributed NULL accrual {null_accrual.id} to most recent period {most_recent_period.id} (ended {most_recent_period.end_date})")
-                    else:
-                        # No service periods found at all - keep the NULL accrual as is
-                        print(
-                            f"Warning: No service periods found for NULL accrual {null_accrual.id} on {null_accrual.accrual_date}")
-
-        # Step 3: Organize data for CSV export
-        csv_data = []
+            target_period = next(
+                (period for period in contract_periods
+                 if period.start_date <= null_accrual.accrual_date <= period.end_date),
+                None
+            )
+            if target_period is None and contract_periods:
+                # No overlapping periods found - use the most recent service period
+                # This handles cases where accruals happen after service periods have ended
+                target_period = max(
+                    contract_periods, key=lambda period: period.end_date)
+                print(
+                    f"Redistributed NULL accrual {null_accrual.id} to most recent period {target_period.id} (ended {target_period.end_date})")
+
+            if target_period is None:
+                # No service periods found at all - keep the NULL accrual as is
+                print(
+                    f"Warning: No service periods found for NULL accrual {null_accrual.id} on {null_accrual.accrual_date}")
+                continue
+
+            # Move the accrual amount from NULL period to the target period
+            month_key = f"{null_accrual.accrual_date.year}-{null_accrual.accrual_date.month:02d}"
+
+            # Remove from NULL key
+            null_key = (null_accrual.contract_accrual_id, None)
+            if null_key in accruals_by_contract_period and month_key in accruals_by_contract_period[null_key]:
+                amount = accruals_by_contract_period[null_key][month_key]
+                del accruals_by_contract_period[null_key][month_key]
+
+                # Add to correct period key
+                correct_key = (
+                    null_accrual.contract_accrual_id, target_period.id)
+                if correct_key not in accruals_by_contract_period:
+                    accruals_by_contract_period[correct_key] = {}
+                accruals_by_contract_period[correct_key][month_key] = accruals_by_contract_period[correct_key].get(
+                    month_key, 0.0) + amount
+
+        return accruals_by_contract_period
+
+    def _get_service_periods_by_contract_accrual(self, contract_accrual_ids: set) -> Dict[int, List[ServicePeriod]]:
+        """
+        Get the service periods of the contracts of the given contract accruals, in two queries.
+
+        Returns:
+            Dict mapping each existing contract_accrual_id to its contract's periods, ordered by ID
+        """
+        if not contract_accrual_ids:
+            return {}
+
+        contract_ids_by_accrual = dict(
+            self.db.query(ContractAccrual.id, ContractAccrual.contract_id)
+            .filter(ContractAccrual.id.in_(contract_accrual_ids))
+            .all()
+        )
+
+        periods_by_contract = defaultdict(list)
+        periods = (
+            self.db.query(ServicePeriod)
+            .filter(ServicePeriod.contract_id.in_(set(contract_ids_by_accrual.values())))
+            .order_by(ServicePeriod.id)
+            .all()
+        )
+        for period in periods:
+            periods_by_contract[period.contract_id].append(period)
+
+        return {
+            contract_accrual_id: periods_by_contract.get(contract_id, [])
+            for contract_accrual_id, contract_id in contract_ids_by_accrual.items()
+        }
+
+    def _iter_export_rows(self, results, accruals_by_contract_period: Dict[tuple, Dict[str, float]], months: List[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Build the CSV export rows from the contract/period rows, one at a time.
+        """
         previous_contract_id = None  # Track the previous contract ID
 
         for contract, client, service, period, contract_accrual in results:
@@ -242,19 +289,11 @@ class AccrualReportsService:
             for month_key, month_name in months:
                 row[month_name] = period_accruals.get(month_key, 0.0)
 
-            csv_data.append(row)
+            yield row
 
             # Update the previous contract ID
             previous_contract_id = contract.id
 
-        return {
-            "headers": ["Contract start date", "Client", "Email", "Contract Status", "Service", "Period",
-                        "Period Status", "Status Change Date", "Total to accrue", "Pending to accrue",
-                        "Period start date", "Period end date"] + [name for _, name in months],
-            "data": csv_data,
-            "months": [name for _, name in months]
-        }
-
     def generate_accruals_csv(self, start_date: date, end_date: date) -> StringIO:
         """
         Generate a CSV file of accruals data for a specific date range.
@@ -266,17 +305,45 @@ class AccrualReportsService:
         Returns:
             StringIO: CSV data as a StringIO object
         """
-        accruals_data = self.get_accruals_export(start_date, end_date)
+        output = StringIO()
+        for chunk in self.iter_accruals_csv(start_date, end_date):
+            output.write(chunk)
+
+        output.seek(0)
+        return output
+
+    def iter_accruals_csv(self, start_date: date, end_date: date) -> Iterator[str]:
+        """
+        Generate a CSV file of accruals data incrementally.
+
+        Contract/period rows are fetched in batches with yield_per and written
+        as CSV text chunks, so memory does not grow with the date range.
+
+        Args:
+            start_date: Start date for filtering accruals
+            end_date: End date for filtering accruals
+
+        Yields:
+            CSV text chunks, starting with the header row
+        """
+        months = self._get_export_months(start_date, end_date)
+        accruals_by_contract_period = self._get_accruals_by_contract_period(
+            start_date, end_date)
+        results = self._get_export_contracts_query(start_date, end_date).yield_per(
+            AccrualExportConstants.EXPORT_BATCH_SIZE)
 
         output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=accruals_data["headers"])
+        writer = csv.DictWriter(output, fieldnames=self._get_export_headers(months))
         writer.writeheader()
 
-        for row in accruals_data["data"]:
+        for index, row in enumerate(self._iter_export_rows(results, accruals_by_contract_period, months), start=1):
             writer.writerow(row)
+            if index % AccrualExportConstants.EXPORT_BATCH_SIZE == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
 
-        output.seek(0)
-        return output
+        yield output.getvalue()
 
     def get_dashboard_summary(self, year: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -293,9 +360,27 @@ class AccrualReportsService:
             - accrued_amount: Total amount already accrued
             - pending_amount: Total amount pending to accrue
         """
-        # Build the base query
-        contracts_query = (
-            self.db.query(ServiceContract, ContractAccrual)
+        # Contracts without an accrual record yet have everything pending
+        accrued_amount = case(
+            (ContractAccrual.id.isnot(None),
+             ContractAccrual.total_amount_to_accrue - ContractAccrual.remaining_amount_to_accrue),
+            else_=0.0
+        )
+        pending_amount = case(
+            (ContractAccrual.id.isnot(None),
+             ContractAccrual.remaining_amount_to_accrue),
+            else_=ServiceContract.contract_amount
+        )
+
+        # Build the aggregate query
+        summary_query = (
+            self.db.query(
+                func.count(ServiceContract.id),
+                func.coalesce(func.sum(ServiceContract.contract_amount), 0.0),
+                func.coalesce(func.sum(accrued_amount), 0.0),
+                func.coalesce(func.sum(pending_amount), 0.0)
+            )
+            .select_from(ServiceContract)
             .outerjoin(ServiceContract.contract_accrual)
             .filter(ServiceContract.status.in_([
                 ServiceContractStatus.ACTIVE,
@@ -322,7 +407,7 @@ class AccrualReportsService:
                 .distinct()
             )
 
-            contracts_query = contracts_query.filter(
+            summary_query = summary_query.filter(
                 or_(
                     (ServiceContract.contract_date >= year_start) &
                     (ServiceContract.contract_date <= year_end),
@@ -330,35 +415,13 @@ class AccrualReportsService:
                 )
             )
 
-        contracts = contracts_query.all()
-
-        # Calculate totals
-        total_contracts = len(contracts)
-        total_amount = sum(
-            contract.contract_amount for contract, _ in contracts)
-
-        # Calculate accrued and pending amounts
-        accrued_amount = 0.0
-        pending_amount = 0.0
-
-        for contract, contract_accrual in contracts:
-            if contract_accrual:
-                # Total accrued is the difference between total to accrue and remaining
-                accrued_this_contract = (
-                    contract_accrual.total_amount_to_accrue -
-                    contract_accrual.remaining_amount_to_accrue
-                )
-                accrued_amount += accrued_this_contract
-                pending_amount += contract_accrual.remaining_amount_to_accrue
-            else:
-                # No accrual record yet, so everything is pending
-                pending_amount += contract.contract_amount
+        total_contracts, total_amount, accrued_amount, pending_amount = summary_query.one()
 
         return {
             "total_contracts": total_contracts,
-            "total_amount": total_amount,
-            "accrued_amount": accrued_amount,
-            "pending_amount": pending_amount
+            "total_amount": float(total_amount),
+            "accrued_amount": float(accrued_amount),
+            "pending_amount": float(pending_amount)
         }
 
     def get_available_years(self) -> List[int]:
@@ -412,26 +475,8 @@ class AccrualReportsService:
         Returns:
             Dictionary containing monthly accrual data
         """
-        from sqlalchemy import func, extract
-
-        year_start = date(year, 1, 1)
-        year_end = date(year, 12, 31)
-
-        # Get monthly accrual amounts from AccruedPeriod table
-        monthly_query = (
-            self.db.query(
-                extract('month', AccruedPeriod.accrual_date).label('month'),
-                func.sum(AccruedPeriod.accrued_amount).label('total_amount')
-            )
-            .filter(
-                AccruedPeriod.accrual_date >= year_start,
-                AccruedPeriod.accrual_date <= year_end
-            )
-            .group_by(extract('month', AccruedPeriod.accrual_date))
-            .order_by(extract('month', AccruedPeriod.accrual_date))
-        )
-
-        results = monthly_query.all()
+        # Get monthly accrual amounts from the precomputed rollup
+        monthly_amounts = AccrualRollupService(self.db).get_monthly_amounts(year)
 
         # Create a dictionary with all 12 months initialized to 0
         monthly_data = {}
@@ -448,9 +493,9 @@ class AccrualReportsService:
             }
 
         # Fill in actual data
-        for month_num, total_amount in results:
-            month_name = month_names[int(month_num) - 1]
-            monthly_data[month_name]['amount'] = float(total_amount or 0.0)
+        for month_num, total_amount in monthly_amounts.items():
+            month_name = month_names[month_num - 1]
+            monthly_data[month_name]['amount'] = total_amount
 
         # Convert to list for consistent ordering
         monthly_list = [monthly_data[month_name] for month_name in month_names]
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.api.accruals.models.accrual_monthly_rollup import AccrualMonthlyRollup
+from src.api.accruals.models.accrued_period import AccruedPeriod
+from src.api.accruals.models.contract_accrual import ContractAccrual
+from src.api.services.models.service_contract import ServiceContract
+from src.api.common.constants.services import ServiceContractStatus
+from src.api.common.utils.datetime import get_current_datetime
+
+
+class AccrualRollupService:
+    """
+    Service to maintain the monthly accrual rollup (month x service x contract status).
+
+    The accrual processor records the AccruedPeriods it creates and moves the
+    contract amounts when it changes a contract status. Changes made elsewhere
+    are picked up by rebuilding the rollup.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_accrued_periods(self, contract: ServiceContract, accrued_periods: List[AccruedPeriod]):
+        """
+        Add the amounts of new AccruedPeriods of a contract, under its current status.
+
+        Changes are added to the session; committing is left to the caller.
+        """
+        amounts = defaultdict(lambda: [0.0, 0])
+        for accrued_period in accrued_periods:
+            month_amounts = amounts[accrued_period.accrual_date.replace(day=1)]
+            month_amounts[0] += accrued_period.accrued_amount
+            month_amounts[1] += 1
+
+        for month, (amount, count) in amounts.items():
+            self._increment(month, contract.service_id,
+                            contract.status, amount, count)
+
+    def move_contract_status(self, contract: ServiceContract, old_status: ServiceContractStatus, exclude_ids: Optional[List[int]] = None):
+        """
+        Move the recorded amounts of a contract from its old status to its current one.
+
+        Args:
+            contract: ServiceContract whose status changed
+            old_status: Status the amounts are currently recorded under
+            exclude_ids: AccruedPeriod IDs not recorded in the rollup yet
+        """
+        if old_status == contract.status:
+            return
+
+        query = (
+            self.db.query(
+                AccruedPeriod.accrual_date,
+                func.sum(AccruedPeriod.accrued_amount),
+                func.count(AccruedPeriod.id)
+            )
+            .join(ContractAccrual, AccruedPeriod.contract_accrual_id == ContractAccrual.id)
+            .filter(ContractAccrual.contract_id == contract.id)
+            .group_by(AccruedPeriod.accrual_date)
+        )
+        if exclude_ids:
+            query = query.filter(AccruedPeriod.id.notin_(exclude_ids))
+
+        for accrual_date, amount, count in query.all():
+            month = accrual_date.replace(day=1)
+            self._increment(month, contract.service_id,
+                            old_status, -amount, -count)
+            self._increment(month, contract.service_id,
+                            contract.status, amount, count)
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the whole rollup from the AccruedPeriod table.
+
+        Returns:
+            Number of rollup rows created
+        """
+        rows = (
+            self.db.query(
+                AccruedPeriod.accrual_date,
+                ServiceContract.service_id,
+                ServiceContract.status,
+                func.sum(AccruedPeriod.accrued_amount),
+                func.count(AccruedPeriod.id)
+            )
+            .join(ContractAccrual, AccruedPeriod.contract_accrual_id == ContractAccrual.id)
+            .join(ServiceContract, ContractAccrual.contract_id == ServiceContract.id)
+            .group_by(AccruedPeriod.accrual_date, ServiceContract.service_id, ServiceContract.status)
+            .all()
+        )
+
+        # Accrual dates are normally the first day of the month, but merge them defensively
+        amounts: Dict[Tuple[date, int, ServiceContractStatus], List] = defaultdict(lambda: [0.0, 0])
+        for accrual_date, service_id, contract_status, amount, count in rows:
+            key_amounts = amounts[(accrual_date.replace(day=1), service_id, contract_status)]
+            key_amounts[0] += amount
+            key_amounts[1] += count
+
+        self.db.query(AccrualMonthlyRollup).delete()
+        self.db.add_all([
+            AccrualMonthlyRollup(
+                month=month,
+                service_id=service_id,
+                contract_status=contract_status,
+                accrued_amount=amount,
+                accrued_periods_count=count
+            )
+            for (month, service_id, contract_status), (amount, count) in amounts.items()
+        ])
+        self.db.commit()
+
+        return len(amounts)
+
+    def get_monthly_amounts(self, year: int) -> Dict[int, float]:
+        """
+        Get the accrued amount of each month of a year.
+
+        Returns:
+            Dictionary mapping month number (1-12) to accrued amount, for months with rollup rows
+        """
+        rows = (
+            self.db.query(
+                AccrualMonthlyRollup.month,
+                func.sum(AccrualMonthlyRollup.accrued_amount)
+            )
+            .filter(
+                AccrualMonthlyRollup.month >= date(year, 1, 1),
+                AccrualMonthlyRollup.month <= date(year, 12, 31)
+            )
+            .group_by(AccrualMonthlyRollup.month)
+            .all()
+        )
+        return {month.month: float(amount or 0.0) for month, amount in rows}
+
+    def _increment(self, month: date, service_id: int, contract_status: ServiceContractStatus, amount: float, count: int):
+        """
+        Add an amount and a count of accrued periods to a rollup row, creating it if needed.
+
+        A single upsert, so concurrent writers of the same row neither lose
+        increments nor both insert it.
+        """
+        now = get_current_datetime()
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(AccrualMonthlyRollup).values(
+            month=month,
+            service_id=service_id,
+            contract_status=contract_status,
+            accrued_amount=amount,
+            accrued_periods_count=count,
+            created_at=now,
+            updated_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[AccrualMonthlyRollup.month, AccrualMonthlyRollup.service_id,
+                            AccrualMonthlyRollup.contract_status],
+            set_={
+                "accrued_amount": AccrualMonthlyRollup.accrued_amount + statement.excluded.accrued_amount,
+                "accrued_periods_count": AccrualMonthlyRollup.accrued_periods_count + statement.excluded.accrued_periods_count,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        self.db.execute(statement)
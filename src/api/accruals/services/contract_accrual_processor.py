@@ -1,7 +1,9 @@
+import asyncio
+from contextvars import ContextVar
 from datetime import date
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import select, and_, or_, not_, exists
+from sqlalchemy import select, insert, inspect, and_, or_, not_, exists
 from sqlalchemy.orm import aliased
 from fastapi.logger import logger
 from dateutil.relativedelta import relativedelta
@@ -10,12 +12,17 @@ from src.api.services.models.service_contract import ServiceContract
 from src.api.accruals.models.contract_accrual import ContractAccrual
 from src.api.services.models.service_period import ServicePeriod
 from src.api.accruals.models.accrued_period import AccruedPeriod
+from src.api.accruals.services.accrual_rollup_service import AccrualRollupService
 from src.api.services.models.service import Service
 from src.api.common.constants.services import ServiceContractStatus, ServicePeriodStatus, map_educational_status
-from src.api.accruals.constants.accruals import ContractAccrualStatus, AccrualTimeConstants
+from src.api.accruals.constants.accruals import ContractAccrualStatus, AccrualTimeConstants, AccrualProcessingConstants
 from src.api.accruals.schemas import ContractProcessingResult, ProcessingStatus, SyncActionSummary, SyncActionDetail
 from src.api.common.utils.datetime import get_month_boundaries, get_month_start, get_month_end
-from src.api.integrations.notion.utils import is_educational_status_ended, is_educational_status_dropped, get_client_educational_data
+from src.api.integrations.notion.utils import is_educational_status_ended, is_educational_status_dropped, get_client_educational_data, load_educational_status_snapshot, EducationalStatusSnapshot
+
+# Notifications of the contract being processed in concurrent mode, merged in contract order
+_current_notifications: ContextVar[Optional[List[Dict]]] = ContextVar(
+    '_current_notifications', default=None)
 
 
 class ContractAccrualProcessor:
@@ -29,25 +36,145 @@ class ContractAccrualProcessor:
     def __init__(self, db: Session):
         self.db = db
         self.notifications: List[Dict] = []
-
-    async def process_all_contracts(self, target_month: date) -> Dict:
+        # Unit-of-work mode: commits are deferred to the end of each chunk
+        # and AccruedPeriod rows are staged to be bulk inserted
+        self._unit_of_work = False
+        self._staged_accrued_periods: List[AccruedPeriod] = []
+        # AccruedPeriods created for each contract, added to the monthly rollup once it is processed
+        self._rollup_service = AccrualRollupService(db)
+        self._pending_rollup: Dict[int, List[AccruedPeriod]] = {}
+        # Notion student database snapshot, fetched once per run when first needed
+        self._educational_snapshot: Optional[EducationalStatusSnapshot] = None
+        self._educational_snapshot_loaded = False
+        self._educational_snapshot_lock = asyncio.Lock()
+
+    async def process_all_contracts(
+        self,
+        target_month: date,
+        unit_of_work: bool = False,
+        chunk_size: int = AccrualProcessingConstants.UNIT_OF_WORK_CHUNK_SIZE,
+        max_concurrency: int = AccrualProcessingConstants.MAX_CONCURRENCY
+    ) -> Dict:
         """
         Process all ServiceContracts according to the accrual schema.
 
         Args:
             target_month: The month to process accruals for
+            unit_of_work: If True, commit once per chunk of contracts instead of after
+                every change. Each contract runs inside a savepoint, so a failing
+                contract is rolled back alone.
+            chunk_size: Number of contracts per commit in unit-of-work mode
+            max_concurrency: Maximum number of contracts processed concurrently.
+                Not supported in unit-of-work mode.
 
         Returns:
             Dictionary with processing results and statistics
         """
+        if unit_of_work and max_concurrency > 1:
+            raise ValueError(
+                "Concurrent processing is not supported in unit-of-work mode")
+
         print('target_month', target_month)
         logger.info(
             f"Starting contract accrual processing for month: {target_month}")
 
         # Get all ServiceContracts
         contracts = self._get_all_accruable_service_contracts(target_month)
+        self._educational_snapshot = None
+        self._educational_snapshot_loaded = False
         print('contracts', contracts)
 
+        if unit_of_work:
+            contract_results = await self._process_contracts_in_unit_of_work(
+                contracts, target_month, chunk_size)
+        elif max_concurrency > 1:
+            contract_results = await self._process_contracts_concurrently(
+                contracts, target_month, max_concurrency)
+        else:
+            contract_results = [
+                await self._process_contract_safely(contract, target_month)
+                for contract in contracts
+            ]
+
+        return self._summarize_results(contract_results, self.notifications)
+
+    async def process_range(
+        self,
+        start_month: date,
+        end_month: date,
+        chunk_size: int = AccrualProcessingConstants.UNIT_OF_WORK_CHUNK_SIZE,
+        on_month: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Process accruals for consecutive months in a single pass.
+
+        Contracts are loaded with their related data once for the whole range;
+        each month only re-evaluates which of them are accruable. Months are
+        processed in order in unit-of-work mode, so ContractAccrual state is
+        carried in memory from one month to the next and AccruedPeriods are
+        bulk inserted.
+
+        Args:
+            start_month: First month to process
+            end_month: Last month to process (inclusive)
+            chunk_size: Number of contracts per commit
+            on_month: Called with the results of each month once it is committed
+
+        Returns:
+            Dictionary with the results of each month and the overall statistics
+        """
+        start_month = get_month_start(start_month)
+        end_month = get_month_start(end_month)
+        if start_month > end_month:
+            raise ValueError("start_month must not be after end_month")
+
+        logger.info(
+            f"Starting contract accrual processing for months: {start_month} - {end_month}")
+
+        self._educational_snapshot = None
+        self._educational_snapshot_loaded = False
+        contracts_by_id: Dict[int, ServiceContract] = {}
+        monthly_results = []
+        all_results = []
+
+        # Keep loaded contracts and accruals in memory across months
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            target_month = start_month
+            while target_month <= end_month:
+                contract_ids = self._get_accruable_service_contract_ids(
+                    target_month)
+                missing_ids = [
+                    contract_id for contract_id in contract_ids if contract_id not in contracts_by_id]
+                if missing_ids:
+                    for contract in self._load_service_contracts(missing_ids):
+                        contracts_by_id[contract.id] = contract
+                contracts = [contracts_by_id[contract_id]
+                             for contract_id in contract_ids]
+
+                notifications_start = len(self.notifications)
+                contract_results = await self._process_contracts_in_unit_of_work(
+                    contracts, target_month, chunk_size)
+                all_results.extend(contract_results)
+                month_results = {
+                    'period_start_date': target_month,
+                    **self._summarize_results(contract_results, self.notifications[notifications_start:])
+                }
+                monthly_results.append(month_results)
+                if on_month:
+                    on_month(month_results)
+
+                target_month += relativedelta(months=1)
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+
+        summary = self._summarize_results(all_results, self.notifications)
+        summary['months'] = monthly_results
+        return summary
+
+    def _summarize_results(self, contract_results: List[ContractProcessingResult], notifications: List[Dict]) -> Dict:
+        """Build the results dictionary with statistics by processing status."""
         results = []
         stats = {
             'total_processed': 0,
@@ -56,39 +183,187 @@ class ContractAccrualProcessor:
             'skipped': 0
         }
 
-        for contract in contracts:
-            print('contract', contract)
-            try:
-                result = await self._process_contract(contract, target_month)
-                results.append(result)
-                stats['total_processed'] += 1
-
-                if result.status == ProcessingStatus.SUCCESS:
-                    stats['successful'] += 1
-                elif result.status == ProcessingStatus.FAILED:
-                    stats['failed'] += 1
-                else:
-                    stats['skipped'] += 1
+        for result in contract_results:
+            results.append(result)
+            stats['total_processed'] += 1
 
-            except Exception as e:
-                print('e', e)
-                logger.error(
-                    f"Error processing contract {contract.id}: {str(e)}")
-                error_result = ContractProcessingResult(
-                    contract_id=contract.id,
-                    status=ProcessingStatus.FAILED,
-                    message=f"Processing error: {str(e)}"
-                )
-                results.append(error_result)
+            if result.status == ProcessingStatus.SUCCESS:
+                stats['successful'] += 1
+            elif result.status == ProcessingStatus.FAILED:
                 stats['failed'] += 1
-                stats['total_processed'] += 1
+            else:
+                stats['skipped'] += 1
 
         return {
             'results': results,
-            'notifications': self.notifications,
+            'notifications': notifications,
             **stats
         }
 
+    async def _process_contract_safely(self, contract: ServiceContract, target_month: date) -> ContractProcessingResult:
+        """Process a contract, turning any error into a FAILED result."""
+        print('contract', contract)
+        # Read before processing, the session may need a rollback afterwards
+        contract_id = contract.id
+        previous_status = contract.status
+        try:
+            result = await self._process_contract(contract, target_month)
+        except Exception as e:
+            print('e', e)
+            logger.error(
+                f"Error processing contract {contract_id}: {str(e)}")
+            # In unit-of-work mode the savepoint is rolled back by the caller
+            if not self._unit_of_work:
+                self.db.rollback()
+            result = ContractProcessingResult(
+                contract_id=contract_id,
+                status=ProcessingStatus.FAILED,
+                message=f"Processing error: {str(e)}"
+            )
+
+        try:
+            self._update_rollup(contract, previous_status,
+                                result.status == ProcessingStatus.FAILED)
+        except Exception as e:
+            logger.error(
+                f"Error updating the accrual rollup of contract {contract_id}: {str(e)}")
+            if not self._unit_of_work:
+                self.db.rollback()
+            result = ContractProcessingResult(
+                contract_id=contract_id,
+                status=ProcessingStatus.FAILED,
+                message=f"Rollup error: {str(e)}"
+            )
+        return result
+
+    def _update_rollup(self, contract: ServiceContract, previous_status: ServiceContractStatus, failed: bool):
+        """
+        Record the contract AccruedPeriods and status change in the monthly rollup.
+
+        In unit-of-work mode a failed contract is rolled back with its savepoint, so
+        nothing is recorded. Otherwise only the AccruedPeriods already written are.
+        """
+        accrued_periods = self._pending_rollup.pop(contract.id, [])
+        if self._unit_of_work:
+            if failed:
+                return
+            written_ids = []
+        else:
+            accrued_periods = [
+                accrued_period for accrued_period in accrued_periods if inspect(accrued_period).persistent]
+            written_ids = [accrued_period.id for accrued_period in accrued_periods]
+
+        if contract.status == previous_status and not accrued_periods:
+            return
+
+        self._rollup_service.move_contract_status(
+            contract, previous_status, exclude_ids=written_ids)
+        self._rollup_service.add_accrued_periods(contract, accrued_periods)
+        self._commit()
+
+    async def _process_contracts_concurrently(self, contracts: List[ServiceContract], target_month: date, max_concurrency: int) -> List[ContractProcessingResult]:
+        """
+        Process contracts concurrently, with at most max_concurrency in flight.
+
+        Contracts share the DB session: its synchronous calls never interleave, only
+        the awaited Notion lookups overlap. Results and notifications are merged in
+        contract order, so the output matches sequential processing.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def process(contract: ServiceContract):
+            async with semaphore:
+                # Each task runs in its own context copy
+                notifications: List[Dict] = []
+                _current_notifications.set(notifications)
+                result = await self._process_contract_safely(contract, target_month)
+                return result, notifications
+
+        outcomes = await asyncio.gather(*(process(contract) for contract in contracts))
+
+        results = []
+        for result, notifications in outcomes:
+            results.append(result)
+            self.notifications.extend(notifications)
+        return results
+
+    async def _process_contracts_in_unit_of_work(self, contracts: List[ServiceContract], target_month: date, chunk_size: int) -> List[ContractProcessingResult]:
+        """
+        Process contracts committing once per chunk.
+
+        Each contract is processed inside a savepoint. AccruedPeriods are staged
+        in memory and bulk inserted, together with the pending ContractAccrual and
+        ServiceContract updates, when the chunk is committed.
+        """
+        results = []
+        # Loaded contracts stay valid across chunk commits; avoid reloading them
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        self._unit_of_work = True
+        try:
+            for chunk_start in range(0, len(contracts), chunk_size):
+                for contract in contracts[chunk_start:chunk_start + chunk_size]:
+                    results.append(await self._process_contract_in_savepoint(contract, target_month))
+                self._flush_unit_of_work()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self._unit_of_work = False
+            self._staged_accrued_periods = []
+            self.db.expire_on_commit = expire_on_commit
+        return results
+
+    async def _process_contract_in_savepoint(self, contract: ServiceContract, target_month: date) -> ContractProcessingResult:
+        """Process a contract inside a savepoint, discarding its changes on failure."""
+        staged_count = len(self._staged_accrued_periods)
+        savepoint = self.db.begin_nested()
+        result = await self._process_contract_safely(contract, target_month)
+        if result.status == ProcessingStatus.FAILED:
+            savepoint.rollback()
+            del self._staged_accrued_periods[staged_count:]
+        else:
+            savepoint.commit()
+        return result
+
+    def _flush_unit_of_work(self):
+        """Bulk insert the staged AccruedPeriods and commit the chunk."""
+        if self._staged_accrued_periods:
+            self.db.execute(
+                insert(AccruedPeriod),
+                [accrued_period.model_dump(exclude={'id'})
+                 for accrued_period in self._staged_accrued_periods]
+            )
+            # Bulk inserts bypass the ORM; reload the affected collections on next access
+            for contract_accrual_id in {accrued_period.contract_accrual_id for accrued_period in self._staged_accrued_periods}:
+                contract_accrual = self.db.get(ContractAccrual, contract_accrual_id)
+                if contract_accrual is not None:
+                    self.db.expire(contract_accrual, ['accrued_periods'])
+            self._staged_accrued_periods = []
+        self.db.commit()
+
+    def _commit(self):
+        """Commit the session, unless commits are deferred by the unit-of-work mode."""
+        if not self._unit_of_work:
+            self.db.commit()
+
+    def _add_accrued_period(self, contract: ServiceContract, accrued_period: AccruedPeriod):
+        """Add an AccruedPeriod to the session, or stage it in unit-of-work mode."""
+        self._pending_rollup.setdefault(contract.id, []).append(accrued_period)
+        if self._unit_of_work:
+            self._staged_accrued_periods.append(accrued_period)
+        else:
+            self.db.add(accrued_period)
+
+    def _is_accrued_period_staged(self, contract_accrual_id: int, service_period_id: Optional[int], target_month: date) -> bool:
+        """Check if an AccruedPeriod is already staged for the contract accrual, period and month."""
+        return any(
+            accrued_period.contract_accrual_id == contract_accrual_id and
+            accrued_period.service_period_id == service_period_id and
+            accrued_period.accrual_date == target_month
+            for accrued_period in self._staged_accrued_periods
+        )
+
     def _get_all_accruable_service_contracts(self, target_month: date) -> List[ServiceContract]:
         """
         Get ServiceContracts that need processing for the target month.
@@ -98,6 +373,42 @@ class ContractAccrualProcessor:
         - Contracts with ServicePeriods that don't overlap with target month
         - Contracts that are CLOSED/CANCELED with COMPLETED accruals
         """
+        stmt = self._with_contract_relations(select(ServiceContract)).where(
+            self._accruable_service_contracts_filter(target_month))
+
+        contracts = self.db.execute(stmt).scalars().all()
+        print('filtered_contracts_count', len(contracts))
+
+        return contracts
+
+    def _get_accruable_service_contract_ids(self, target_month: date) -> List[int]:
+        """Get the IDs of the ServiceContracts that need processing for the target month."""
+        stmt = select(ServiceContract.id).where(
+            self._accruable_service_contracts_filter(target_month))
+        return list(self.db.execute(stmt).scalars().all())
+
+    def _load_service_contracts(self, contract_ids: List[int]) -> List[ServiceContract]:
+        """Load ServiceContracts by ID with the related data used during processing."""
+        stmt = self._with_contract_relations(select(ServiceContract)).where(
+            ServiceContract.id.in_(contract_ids))
+        return self.db.execute(stmt).scalars().all()
+
+    def _with_contract_relations(self, stmt):
+        """Eager load the ServiceContract relations used during processing."""
+        return stmt.options(
+            selectinload(ServiceContract.client),
+            selectinload(ServiceContract.service),
+            selectinload(ServiceContract.contract_accrual),
+            selectinload(ServiceContract.periods),
+            selectinload(ServiceContract.invoices)
+        )
+
+    def _accruable_service_contracts_filter(self, target_month: date):
+        """
+        Build the filter selecting the ServiceContracts that need processing for the target month.
+
+        See _get_all_accruable_service_contracts for the excluded contracts.
+        """
         # Calculate month boundaries
         month_start, month_end = get_month_boundaries(target_month)
 
@@ -108,18 +419,6 @@ class ContractAccrualProcessor:
         ServicePeriodAlias = aliased(ServicePeriod)
         ContractAccrualAlias = aliased(ContractAccrual)
 
-        # Base query with eager loading
-        stmt = (
-            select(ServiceContract)
-            .options(
-                selectinload(ServiceContract.client),
-                selectinload(ServiceContract.service),
-                selectinload(ServiceContract.contract_accrual),
-                selectinload(ServiceContract.periods),
-                selectinload(ServiceContract.invoices)
-            )
-        )
-
         # Filter 0: Exclude contracts that haven't started yet (contract_date > target month end)
         exclude_not_started = ServiceContract.contract_date > month_end
 
@@ -214,14 +513,7 @@ class ContractAccrualProcessor:
         )
 
         # Apply filters: exclude all three conditions
-        stmt = stmt.where(
-            not_(or_(exclude_not_started, exclude_completed, exclude_non_overlapping))
-        )
-
-        contracts = self.db.execute(stmt).scalars().all()
-        print('filtered_contracts_count', len(contracts))
-
-        return contracts
+        return not_(or_(exclude_not_started, exclude_completed, exclude_non_overlapping))
 
     async def _process_contract(self, contract: ServiceContract, target_month: date) -> ContractProcessingResult:
         """
@@ -335,10 +627,29 @@ class ContractAccrualProcessor:
         else:
             return await self._process_closed_with_service_periods(contract, contract_accrual, service_periods, target_month)
 
+    async def _get_client_educational_data(self, client) -> Optional[Dict]:
+        """
+        Get the client educational data from the Notion snapshot.
+
+        The snapshot is fetched on first use. Clients missing from it, or every
+        client if it could not be fetched, are looked up individually.
+        """
+        async with self._educational_snapshot_lock:
+            if not self._educational_snapshot_loaded:
+                self._educational_snapshot = await load_educational_status_snapshot()
+                self._educational_snapshot_loaded = True
+
+        if self._educational_snapshot is not None:
+            educational_data = self._educational_snapshot.get(client)
+            if educational_data:
+                return educational_data
+
+        return await get_client_educational_data(client)
+
     async def _process_contract_without_service_period(self, contract: ServiceContract, contract_accrual: ContractAccrual, target_month: date) -> ContractProcessingResult:
         """Handle contracts without ServicePeriods - check Notion integration."""
         # Check if client found in Notion
-        external_client_data = await get_client_educational_data(contract.client)
+        external_client_data = await self._get_client_educational_data(contract.client)
 
         if not external_client_data:
             if self._is_contract_recent(contract.contract_date, target_month):
@@ -719,7 +1030,7 @@ class ContractAccrualProcessor:
 
     async def _process_canceled_without_service_period(self, contract: ServiceContract, contract_accrual: ContractAccrual, target_month: date) -> ContractProcessingResult:
         """Handle canceled contracts without ServicePeriods."""
-        external_client_data = await get_client_educational_data(contract.client)
+        external_client_data = await self._get_client_educational_data(contract.client)
 
         if not external_client_data:
             # Contract resigned - handle based on amount type
@@ -807,7 +1118,7 @@ class ContractAccrualProcessor:
 
     async def _process_closed_without_service_period(self, contract: ServiceContract, contract_accrual: ContractAccrual, target_month: date) -> ContractProcessingResult:
         """Handle closed contracts without ServicePeriods."""
-        external_client_data = await get_client_educational_data(contract.client)
+        external_client_data = await self._get_client_educational_data(contract.client)
 
         if not external_client_data:
             if self._is_contract_recent(contract.contract_date, target_month):
@@ -919,8 +1230,13 @@ class ContractAccrualProcessor:
         )
 
         self.db.add(contract_accrual)
-        self.db.commit()
-        self.db.refresh(contract_accrual)
+        if self._unit_of_work:
+            # Only the primary key is needed, the commit happens at the end of the chunk
+            self.db.flush()
+            contract.contract_accrual = contract_accrual
+        else:
+            self.db.commit()
+            self.db.refresh(contract_accrual)
 
         return contract_accrual
 
@@ -1297,7 +1613,7 @@ class ContractAccrualProcessor:
             AccruedPeriod.accrual_date == target_month
         ).first()
         
-        if existing_accrual:
+        if existing_accrual or self._is_accrued_period_staged(contract_accrual.id, period.id, target_month):
             print('accrued_period_already_exists_skipping_duplicate', 
                   f'contract_{contract.id}', f'period_{period.id}', f'month_{target_month}')
             return 0.0
@@ -1331,7 +1647,7 @@ class ContractAccrualProcessor:
             status_change_date=period.status_change_date
         )
 
-        self.db.add(accrued_period)
+        self._add_accrued_period(contract, accrued_period)
 
         # Update contract accrual
         contract_accrual.total_amount_accrued += accrued_amount
@@ -1356,7 +1672,7 @@ class ContractAccrualProcessor:
                 contract.status = ServiceContractStatus.CANCELED
                 print('contract_auto_canceled_on_accrual_completion', contract.id)
 
-        self.db.commit()
+        self._commit()
 
         return accrued_amount
 
@@ -1372,7 +1688,7 @@ class ContractAccrualProcessor:
             AccruedPeriod.service_period_id.is_(None)  # Full accruals have no specific period
         ).first()
         
-        if existing_accrual:
+        if existing_accrual or self._is_accrued_period_staged(contract_accrual.id, None, target_month):
             print('full_accrual_already_exists_skipping_duplicate', 
                   f'contract_{contract.id}', f'month_{target_month}')
             return 0.0
@@ -1389,7 +1705,7 @@ class ContractAccrualProcessor:
             total_contract_amount=contract.contract_amount
         )
 
-        self.db.add(accrued_period)
+        self._add_accrued_period(contract, accrued_period)
 
         # Update contract accrual to completion
         contract_accrual.total_amount_accrued = contract_accrual.total_amount_to_accrue
@@ -1410,7 +1726,7 @@ class ContractAccrualProcessor:
                 contract.status = ServiceContractStatus.CANCELED
                 print('contract_auto_canceled_on_full_accrual', contract.id)
 
-        self.db.commit()
+        self._commit()
 
         return remaining_amount
 
@@ -1421,16 +1737,19 @@ class ContractAccrualProcessor:
     def _update_contract_accrual_status(self, contract_accrual: ContractAccrual, status: ContractAccrualStatus):
         """Update ContractAccrual status."""
         contract_accrual.accrual_status = status
-        self.db.commit()
+        self._commit()
 
     def _update_contract_status(self, contract: ServiceContract, status: ServiceContractStatus):
         """Update ServiceContract status."""
         contract.status = status
-        self.db.commit()
+        self._commit()
 
     def _add_notification(self, notification_type: str, message: str):
         """Add a notification to the results."""
-        self.notifications.append({
+        notifications = _current_notifications.get()
+        if notifications is None:
+            notifications = self.notifications
+        notifications.append({
             'type': notification_type,
             'message': message,
             'timestamp': date.today().isoformat()
@@ -1754,7 +2073,7 @@ class ContractAccrualProcessor:
             total_contract_amount=contract.contract_amount  # Should be 0
         )
 
-        self.db.add(accrued_period)
+        self._add_accrued_period(contract, accrued_period)
 
         # Update contract accrual to completion
         contract_accrual.total_amount_accrued = 0.0  # No money accrued
@@ -1765,7 +2084,7 @@ class ContractAccrualProcessor:
         if contract.status == ServiceContractStatus.ACTIVE:
             contract.status = ServiceContractStatus.CANCELED
 
-        self.db.commit()
+        self._commit()
 
         return ContractProcessingResult(
             contract_id=contract.id,
@@ -1,5 +1,7 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Set
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from src.api.common.utils.database import get_db
 from src.api.clients.schemas.client import ClientCreate, ClientRead, ClientUpdate, ClientExternalIdCreate, ClientExternalIdRead, ClientMissingExternalId
@@ -12,14 +14,52 @@ def get_client_service(db: Session = Depends(get_db)):
     return ClientService(db)
 
 
+CLIENT_FIELDS = set(ClientRead.model_fields)
+MISSING_EXTERNAL_ID_FIELDS = set(ClientMissingExternalId.model_fields)
+
+
+def _parse_fields(fields: Optional[str], allowed: Set[str]) -> Optional[Set[str]]:
+    """Parse a comma separated fields projection, None if not given"""
+    if fields is None:
+        return None
+    projection = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = projection - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return projection
+
+
 @router.get("", response_model=List[ClientRead])
 def get_clients(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     client_service: ClientService = Depends(get_client_service)
 ):
-    """Get a list of clients"""
-    return client_service.get_clients(skip, limit)
+    """
+    Get a list of clients.
+
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    With fields (e.g. "id,name"), only those fields are returned and the
+    identifiers are not decrypted unless requested.
+    """
+    projection = _parse_fields(fields, CLIENT_FIELDS)
+    try:
+        clients, next_cursor = client_service.get_clients_page(
+            skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if projection is not None:
+        return JSONResponse(
+            jsonable_encoder(client_service.project_clients(clients, projection)),
+            headers=headers
+        )
+    response.headers.update(headers)
+    return clients
 
 
 @router.post("", response_model=ClientRead)
@@ -46,10 +86,20 @@ def get_client_by_external_id(
 
 @router.get("/missing-external-ids", response_model=List[ClientMissingExternalId])
 def get_clients_missing_external_id(
+    fields: Optional[str] = None,
     client_service: ClientService = Depends(get_client_service)
 ):
-    """Get clients with missing external IDs"""
-    return client_service.get_clients_missing_external_id()
+    """
+    Get clients with missing external IDs.
+
+    With fields (e.g. "id,system"), only those fields are returned and the
+    identifiers are not decrypted unless requested.
+    """
+    projection = _parse_fields(fields, MISSING_EXTERNAL_ID_FIELDS)
+    missing = client_service.get_clients_missing_external_id(projection)
+    if projection is not None:
+        return JSONResponse(jsonable_encoder(missing))
+    return missing
 
 
 @router.get("/{client_id}", response_model=ClientRead)
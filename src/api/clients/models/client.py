@@ -1,8 +1,9 @@
 from typing import Optional, List
 from fastapi.logger import logger
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 from src.api.common.models.base import BaseModel, TimestampMixin
-from src.api.common.utils.encryption import encrypt_data, decrypt_data
+from src.api.common.utils.encryption import encrypt_data, decrypt_data, compute_blind_index
 
 
 class Client(BaseModel, TimestampMixin, table=True):
@@ -14,6 +15,9 @@ class Client(BaseModel, TimestampMixin, table=True):
     # Encrypted identifier (usually email)
     encrypted_identifier: str = Field(index=True)
 
+    # Blind index of the identifier, used for equality lookups
+    identifier_hash: Optional[str] = Field(default=None, index=True)
+
     # Additional information (can be extended as needed)
     name: Optional[str] = None
 
@@ -29,8 +33,9 @@ class Client(BaseModel, TimestampMixin, table=True):
 
     @identifier.setter
     def identifier(self, value: str):
-        """Set encrypted identifier"""
+        """Set encrypted identifier and its blind index"""
         self.encrypted_identifier = encrypt_data(value)
+        self.identifier_hash = compute_blind_index(value)
 
     def get_external_id(self, system: str) -> Optional[str]:
         """
@@ -59,6 +64,12 @@ class ClientExternalId(BaseModel, table=True):
     """
     Model to store encrypted external IDs for clients from different systems
     """
+    __table_args__ = (
+        Index("ix_clientexternalid_system_external_id_hash",
+              "system", "external_id_hash", unique=True),
+        Index("ix_clientexternalid_client_id_system", "client_id", "system"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Foreign key to client
@@ -71,6 +82,9 @@ class ClientExternalId(BaseModel, table=True):
     # Encrypted external ID
     encrypted_external_id: str
 
+    # Blind index of the external ID, used for lookups by (system, external_id)
+    external_id_hash: Optional[str] = Field(default=None)
+
     # Properties to access encrypted data
     @property
     def external_id(self) -> str:
@@ -79,8 +93,9 @@ class ClientExternalId(BaseModel, table=True):
 
     @external_id.setter
     def external_id(self, value: str):
-        """Set encrypted external ID"""
+        """Set encrypted external ID and its blind index"""
         self.encrypted_external_id = encrypt_data(value)
+        self.external_id_hash = compute_blind_index(value)
 
     class Config:
         from_attributes = True
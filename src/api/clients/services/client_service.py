@@ -1,12 +1,41 @@
-from typing import List, Optional, Dict
+import base64
+import json
+from typing import Iterator, List, Optional, Dict, Set, Tuple
 from sqlmodel import Session, select
+from sqlalchemy import and_, exists, func, or_
 from sqlalchemy.orm import selectinload
 from src.api.common.constants.integrations import ENABLED_INTEGRATIONS
+from src.api.common.utils.encryption import compute_blind_index, decrypt_many
 from src.api.clients.models.client import Client, ClientExternalId
 from src.api.clients.schemas.client import ClientCreate, ClientUpdate, ClientExternalIdCreate
 from src.api.services.models.service_contract import ServiceContract
 from src.api.common.constants.services import ServiceContractStatus
 
+# Clients per batch streamed to the external ID backfills
+CLIENTS_BATCH_SIZE = 200
+
+
+def _encode_clients_cursor(missing_count: int, sort_name: str, client_id: int) -> str:
+    """Encode the sort key of the last client of a page"""
+    key = json.dumps([missing_count, sort_name, client_id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_clients_cursor(cursor: str) -> Tuple[int, str, int]:
+    """Decode a cursor of get_clients_page"""
+    try:
+        missing_count, sort_name, client_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()))
+        return int(missing_count), str(sort_name), int(client_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _project(row: dict, fields: Optional[Set[str]]) -> dict:
+    if fields is None:
+        return row
+    return {key: value for key, value in row.items() if key in fields}
+
 
 class ClientService:
     """Service class for managing client operations and external ID tracking."""
@@ -32,16 +61,14 @@ class ClientService:
         return self.db.get(Client, client_id)
 
     def get_client_by_identifier(self, identifier: str) -> Optional[Client]:
-        """Get a client by identifier (decrypted)"""
-        # This is inefficient as we need to decrypt each record to check
-        # In a real-world scenario, we might want to use a hash or other indexable value
-        clients = self.db.exec(select(Client)).all()
-        for client in clients:
-            if client.identifier == identifier:
-                return client
-        return None
+        """Get a client by identifier (decrypted), using its blind index"""
+        if not identifier:
+            return None
+        return self.db.exec(select(Client).where(
+            Client.identifier_hash == compute_blind_index(identifier)
+        )).first()
 
-    def get_clients(self, skip: int = 0, limit: int = 100) -> List[Client]:
+    def get_clients(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Client]:
         """
         Get a list of clients sorted by multiple criteria:
         1. Number of missing external IDs (most missing first)
@@ -51,59 +78,79 @@ class ClientService:
         - At least one ACTIVE contract, OR
         - No contracts at all (missing contracts)
         """
-        # Get all clients with their external IDs loaded
-        all_clients = self.db.exec(
-            select(Client).options(selectinload(Client.external_ids))
-        ).all()
-        
-        # Get contract filtering sets
-        active_contract_client_ids, all_contract_client_ids = self._get_client_contract_filter_sets()
-        
-        # Filter clients: include those with active contracts OR no contracts at all
-        filtered_clients = [
-            client for client in all_clients 
-            if self._should_include_client(client.id, active_contract_client_ids, all_contract_client_ids)
-        ]
-        
-        # Create a list to store clients with their missing ID counts
-        clients_with_counts = []
-        
-        for client in filtered_clients:
-            missing_count = self._count_missing_external_ids(client, self.TRACKED_SYSTEMS)
-            clients_with_counts.append((client, missing_count))
-        
-        # Sort by two criteria:
-        # 1. Missing count (descending - most missing first)
-        # 2. Name (ascending - A to Z)
-        clients_with_counts.sort(
-            key=lambda client_data: (
-                -client_data[1],  # Negative missing count for descending order
-                (client_data[0].name or '').lower()  # Name in lowercase for case-insensitive A-Z sort
-            )
-        )
-        
-        # Extract just the clients and apply pagination
-        sorted_clients = [client for client, _ in clients_with_counts]
-        
-        return sorted_clients[skip:skip + limit]
-    
-    def _count_missing_external_ids(self, client: Client, systems: List[str]) -> int:
+        clients, _ = self.get_clients_page(skip=skip, limit=limit, cursor=cursor)
+        return clients
+
+    def get_clients_page(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[Client], Optional[str]]:
         """
-        Count how many external IDs are missing for a client.
-        
+        Get a page of clients, in the order of get_clients.
+
+        The missing external IDs and the contract filter are computed in SQL.
+        With a cursor, the page starts after the last client of the previous
+        page (keyset pagination) and skip is ignored.
+
         Args:
-            client: The client to check
-            systems: List of system names to check for external IDs
-            
+            skip: Number of clients to skip, when no cursor is given
+            limit: Maximum number of clients of the page
+            cursor: Cursor returned with the previous page
+
         Returns:
-            Number of missing external IDs
+            The clients of the page and the cursor of the next page, None on the last page
+
+        Raises:
+            ValueError: If the cursor is not valid
         """
-        missing_count = 0
-        for system in systems:
-            if not client.get_external_id(system):
-                missing_count += 1
-        return missing_count
-    
+        tracked_systems = list(self.TRACKED_SYSTEMS)
+        present_counts = (
+            select(
+                ClientExternalId.client_id,
+                func.count(func.distinct(ClientExternalId.system)).label("present_count")
+            )
+            .where(ClientExternalId.system.in_(tracked_systems))
+            .group_by(ClientExternalId.client_id)
+            .subquery()
+        )
+        missing_count = len(tracked_systems) - \
+            func.coalesce(present_counts.c.present_count, 0)
+        sort_name = func.lower(func.coalesce(Client.name, ""))
+        has_active_contract = exists().where(
+            ServiceContract.client_id == Client.id,
+            ServiceContract.status == ServiceContractStatus.ACTIVE
+        )
+        has_contract = exists().where(ServiceContract.client_id == Client.id)
+
+        statement = (
+            select(Client, missing_count.label("missing_count"), sort_name.label("sort_name"))
+            .outerjoin(present_counts, present_counts.c.client_id == Client.id)
+            .where(or_(has_active_contract, ~has_contract))
+        )
+        if cursor:
+            last_missing_count, last_sort_name, last_id = _decode_clients_cursor(cursor)
+            statement = statement.where(or_(
+                missing_count < last_missing_count,
+                and_(missing_count == last_missing_count, or_(
+                    sort_name > last_sort_name,
+                    and_(sort_name == last_sort_name, Client.id > last_id)
+                ))
+            ))
+        elif skip:
+            statement = statement.offset(skip)
+
+        # One more row tells whether there is a next page
+        rows = self.db.exec(
+            statement
+            .order_by(missing_count.desc(), sort_name, Client.id)
+            .limit(limit + 1)
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_client, last_missing_count, last_sort_name = rows[-1]
+            next_cursor = _encode_clients_cursor(
+                last_missing_count, last_sort_name, last_client.id)
+        return [client for client, _, _ in rows], next_cursor
+
     def _get_client_contract_filter_sets(self) -> tuple[set[int], set[int]]:
         """
         Get sets of client IDs for contract filtering.
@@ -143,19 +190,47 @@ class ClientService:
 
     def get_clients_with_no_external_id(self, system: str) -> List[Client]:
         """Get a list of clients that don't have an external ID for a specific system"""
-        # Get all clients
-        all_clients = self.db.exec(select(Client)).all()
+        return self.db.exec(
+            select(Client)
+            .where(~self._has_external_id(system))
+            .order_by(Client.id)
+        ).all()
+
+    def iter_clients_with_no_external_id(self, system: str, batch_size: int = CLIENTS_BATCH_SIZE) -> Iterator[List[Tuple[int, str]]]:
+        """
+        Stream the clients that don't have an external ID for a system, in batches ordered by ID.
 
-        # Get all clients that have an external ID for the specified system
-        clients_with_external_id = set()
-        external_ids = self.db.exec(select(ClientExternalId).where(
-            ClientExternalId.system == system)).all()
+        Only the ID and the encrypted identifier of each client are loaded.
+        Clients linked while the batches are consumed do not affect the next batches.
 
-        for ext_id in external_ids:
-            clients_with_external_id.add(ext_id.client_id)
+        Args:
+            system: The system identifier (e.g., 'fourgeeks', 'notion')
+            batch_size: Number of clients per batch
 
-        # Filter clients that don't have the external ID
-        return [client for client in all_clients if client.id not in clients_with_external_id]
+        Yields:
+            Batches of (client ID, encrypted identifier)
+        """
+        statement = select(Client.id, Client.encrypted_identifier).where(
+            ~self._has_external_id(system))
+        last_id = 0
+        while True:
+            rows = self.db.exec(
+                statement.where(Client.id > last_id)
+                .order_by(Client.id)
+                .limit(batch_size)
+            ).all()
+            if rows:
+                yield [(client_id, encrypted_identifier) for client_id, encrypted_identifier in rows]
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def _has_external_id(self, system: str):
+        """EXISTS condition on the client having an external ID for the system"""
+        return exists().where(
+            ClientExternalId.client_id == Client.id,
+            ClientExternalId.system == system
+        )
 
     def update_client(self, client_id: int, client_data: ClientUpdate) -> Optional[Client]:
         """Update a client"""
@@ -202,18 +277,74 @@ class ClientService:
         self.db.refresh(external_id)
         return external_id
 
+    def create_clients_with_external_ids(self, system: str, clients_data: Dict[str, ClientCreate]) -> Dict[str, Client]:
+        """
+        Create several clients with their external ID of a system, in a single transaction.
+
+        Args:
+            system: The system identifier (e.g., 'holded', 'fourgeeks')
+            clients_data: Client data by external ID
+
+        Returns:
+            Dictionary mapping each external ID to its new client
+        """
+        clients = {}
+        for external_id, client_data in clients_data.items():
+            client = Client(name=client_data.name)
+            client.identifier = client_data.identifier  # This will encrypt the identifier
+            self.db.add(client)
+            clients[external_id] = client
+        # Client IDs are needed for the external IDs
+        self.db.flush()
+
+        for external_id, client in clients.items():
+            client_external_id = ClientExternalId(
+                client_id=client.id,
+                system=system
+            )
+            client_external_id.external_id = external_id
+            self.db.add(client_external_id)
+
+        self.db.commit()
+        return clients
+
     def get_client_by_external_id(self, system: str, external_id: str) -> Optional[Client]:
         """Get a client by external ID"""
-        # This is inefficient as we need to decrypt each record to check
-        external_ids = self.db.exec(select(ClientExternalId).where(
-            ClientExternalId.system == system)).all()
+        if not external_id:
+            return None
+        ext_id = self.db.exec(select(ClientExternalId).where(
+            ClientExternalId.system == system,
+            ClientExternalId.external_id_hash == compute_blind_index(external_id)
+        )).first()
+        return ext_id.client if ext_id else None
 
-        for ext_id in external_ids:
-            if ext_id.external_id == external_id:
-                return ext_id.client
+    def resolve_external_ids(self, system: str, external_ids: List[str]) -> Dict[str, Client]:
+        """
+        Resolve many external IDs of a system to their clients in one query.
+
+        Args:
+            system: The system identifier (e.g., 'holded', 'fourgeeks')
+            external_ids: External IDs to resolve
+
+        Returns:
+            Dictionary mapping each known external ID to its client.
+            Unknown external IDs are not included.
+        """
+        hashes = {compute_blind_index(external_id): external_id
+                  for external_id in set(external_ids) if external_id}
+        if not hashes:
+            return {}
+
+        ext_ids = self.db.exec(
+            select(ClientExternalId)
+            .options(selectinload(ClientExternalId.client))
+            .where(
+                ClientExternalId.system == system,
+                ClientExternalId.external_id_hash.in_(list(hashes.keys()))
+            )
+        ).all()
+        return {hashes[ext_id.external_id_hash]: ext_id.client for ext_id in ext_ids}
 
-        return None
-    
     def get_client_external_id(self, client_id: int, system: str) -> Optional[ClientExternalId]:
         """Get a client external ID"""
         return self.db.exec(select(ClientExternalId).where(
@@ -221,7 +352,7 @@ class ClientService:
             ClientExternalId.system == system
         )).first()
 
-    def get_clients_missing_external_id(self) -> List[dict]:
+    def get_clients_missing_external_id(self, fields: Optional[Set[str]] = None) -> List[dict]:
         """
         Get a list of clients with missing external IDs for tracked systems.
         
@@ -229,6 +360,10 @@ class ClientService:
         - At least one ACTIVE contract, OR
         - No contracts at all (missing contracts)
         
+        Args:
+            fields: Keys to include in each row, all of them by default.
+                The identifier is only decrypted when it is included.
+
         Returns:
             List of dictionaries containing client info and missing system
         """
@@ -240,16 +375,49 @@ class ClientService:
         # Get contract filtering sets
         active_contract_client_ids, all_contract_client_ids = self._get_client_contract_filter_sets()
         
-        result = []
+        missing = []
         for client in all_clients:
             # Only process clients with active contracts or no contracts
             if self._should_include_client(client.id, active_contract_client_ids, all_contract_client_ids):
+                # Presence is checked by system, the external IDs are not decrypted
+                linked_systems = {external_id.system for external_id in client.external_ids}
                 for system in self.TRACKED_SYSTEMS:
-                    if not client.get_external_id(system):
-                        result.append({
-                            "id": client.id,
-                            "name": client.name,
-                            "identifier": client.identifier,
-                            "system": system
-                        })
-        return result   
\ No newline at end of file
+                    if system not in linked_systems:
+                        missing.append((client, system))
+
+        identifiers = []
+        if fields is None or "identifier" in fields:
+            identifiers = decrypt_many(
+                [client.encrypted_identifier for client, _ in missing])
+
+        result = []
+        for i, (client, system) in enumerate(missing):
+            row = {
+                "id": client.id,
+                "name": client.name,
+                "identifier": identifiers[i] if identifiers else None,
+                "system": system
+            }
+            result.append(_project(row, fields))
+        return result
+
+    def project_clients(self, clients: List[Client], fields: Set[str]) -> List[dict]:
+        """
+        Get the given fields of each client.
+
+        The identifiers are decrypted in bulk, and only when requested.
+        """
+        identifiers = []
+        if "identifier" in fields:
+            identifiers = decrypt_many(
+                [client.encrypted_identifier for client in clients])
+
+        rows = []
+        for i, client in enumerate(clients):
+            row = {
+                field: getattr(client, field) for field in fields if field != "identifier"
+            }
+            if identifiers:
+                row["identifier"] = identifiers[i]
+            rows.append(row)
+        return rows
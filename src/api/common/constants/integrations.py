@@ -1 +1,14 @@
-ENABLED_INTEGRATIONS = ["holded", "fourgeeks", "notion"]
\ No newline at end of file
+ENABLED_INTEGRATIONS = ["holded", "fourgeeks", "notion"]
+
+# Rate limits per upstream host: (requests per second, burst)
+INTEGRATION_RATE_LIMITS = {
+    "api.holded.com": (10, 10),
+    "api.notion.com": (3, 3),
+    "breathecode.herokuapp.com": (10, 10),
+}
+
+# Retries of idempotent requests on transient errors
+INTEGRATION_MAX_RETRIES = 4
+INTEGRATION_RETRY_STATUS_CODES = {429, 502, 503, 504}
+INTEGRATION_BACKOFF_BASE_SECONDS = 0.5
+INTEGRATION_BACKOFF_MAX_SECONDS = 30.0
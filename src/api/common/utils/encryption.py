@@ -1,4 +1,11 @@
 import os
+import asyncio
+import hashlib
+import hmac
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, List, Optional
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 
@@ -16,6 +23,21 @@ if not ENCRYPTION_KEY:
 cipher = Fernet(ENCRYPTION_KEY.encode() if isinstance(
     ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
 
+# Key for blind indexes (deterministic keyed hashes of encrypted values).
+# When not provided it is derived from the encryption key, so both stay in sync.
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY")
+blind_index_key = BLIND_INDEX_KEY.encode() if BLIND_INDEX_KEY else hmac.new(
+    ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY,
+    b"blind-index", hashlib.sha256).digest()
+
+# Decrypted values kept per request, by ciphertext
+DECRYPTION_CACHE_SIZE = 1024
+# Ciphertexts decrypted per thread pool task by decrypt_many_async
+DECRYPTION_CHUNK_SIZE = 200
+
+_decryption_cache: ContextVar[Optional[OrderedDict]] = ContextVar(
+    "decryption_cache", default=None)
+
 
 def encrypt_data(data: str) -> str:
     """
@@ -44,4 +66,120 @@ def decrypt_data(encrypted_data: str) -> str:
     """
     if not encrypted_data:
         return ""
+    cache = _decryption_cache.get()
+    if cache is None:
+        return _decrypt(encrypted_data)
+    if encrypted_data in cache:
+        cache.move_to_end(encrypted_data)
+        return cache[encrypted_data]
+    data = _decrypt(encrypted_data)
+    _cache_decrypted(cache, encrypted_data, data)
+    return data
+
+
+def decrypt_many(encrypted_values: Iterable[str]) -> List[str]:
+    """
+    Decrypt several values, each distinct ciphertext once
+
+    Args:
+        encrypted_values: The encrypted strings to decrypt
+
+    Returns:
+        Decrypted strings, in the same order
+    """
+    encrypted_values = list(encrypted_values)
+    decrypted = {}
+    for encrypted_data in encrypted_values:
+        if encrypted_data not in decrypted:
+            decrypted[encrypted_data] = decrypt_data(encrypted_data)
+    return [decrypted[encrypted_data] for encrypted_data in encrypted_values]
+
+
+async def decrypt_many_async(encrypted_values: Iterable[str]) -> List[str]:
+    """
+    Same as decrypt_many, decrypting in the default thread pool so the
+    event loop is not blocked
+
+    Args:
+        encrypted_values: The encrypted strings to decrypt
+
+    Returns:
+        Decrypted strings, in the same order
+    """
+    encrypted_values = list(encrypted_values)
+    cache = _decryption_cache.get()
+    pending = list({encrypted_data for encrypted_data in encrypted_values
+                    if encrypted_data and (cache is None or encrypted_data not in cache)})
+    chunks = [pending[i:i + DECRYPTION_CHUNK_SIZE]
+              for i in range(0, len(pending), DECRYPTION_CHUNK_SIZE)]
+    # The threads only decrypt, the cache is filled back in the event loop
+    results = await asyncio.gather(*[
+        asyncio.to_thread(lambda chunk=chunk: [_decrypt(value) for value in chunk])
+        for chunk in chunks
+    ])
+
+    decrypted = {}
+    for chunk, values in zip(chunks, results):
+        decrypted.update(zip(chunk, values))
+    if cache is not None:
+        for encrypted_data, data in decrypted.items():
+            _cache_decrypted(cache, encrypted_data, data)
+    return [decrypted[encrypted_data] if encrypted_data in decrypted else decrypt_data(encrypted_data)
+            for encrypted_data in encrypted_values]
+
+
+@contextmanager
+def decryption_cache():
+    """
+    Cache the values decrypted in the current context (e.g. a request),
+    keeping the most recently used ones
+    """
+    token = _decryption_cache.set(OrderedDict())
+    try:
+        yield
+    finally:
+        _decryption_cache.reset(token)
+
+
+class DecryptionCacheMiddleware:
+    """ASGI middleware giving each HTTP request its own decryption cache"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with decryption_cache():
+            await self.app(scope, receive, send)
+
+
+def _decrypt(encrypted_data: str) -> str:
     return cipher.decrypt(encrypted_data.encode()).decode()
+
+
+def _cache_decrypted(cache: OrderedDict, encrypted_data: str, data: str):
+    cache[encrypted_data] = data
+    cache.move_to_end(encrypted_data)
+    while len(cache) > DECRYPTION_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def compute_blind_index(data: str) -> str:
+    """
+    Compute a blind index for sensitive data
+
+    Fernet output is randomized, so encrypted columns cannot be queried by
+    value. The blind index is a keyed HMAC of the plain value that can be
+    stored alongside the ciphertext and used for equality lookups.
+
+    Args:
+        data: The string data to index
+
+    Returns:
+        Hex digest of the keyed hash
+    """
+    if not data:
+        return ""
+    return hmac.new(blind_index_key, data.encode(), hashlib.sha256).hexdigest()
@@ -0,0 +1,67 @@
+from importlib.util import find_spec
+from typing import Optional
+import httpx
+from src.api.common.utils.http_transport import AsyncRetryTransport, RetryTransport
+
+# Connection pool shared by all the requests to the integrations
+HTTP_LIMITS = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=60.0
+)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# HTTP/2 requires the optional h2 package (httpx[http2]).
+# It is negotiated per host, so upstreams without HTTP/2 keep using HTTP/1.1.
+HTTP2_ENABLED = find_spec("h2") is not None
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Create an async HTTP client with the shared pool settings, rate limits and retries"""
+    transport = AsyncRetryTransport(
+        httpx.AsyncHTTPTransport(limits=HTTP_LIMITS, http2=HTTP2_ENABLED))
+    return httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+
+
+def create_sync_client() -> httpx.Client:
+    """Create a sync HTTP client with the shared pool settings, rate limits and retries"""
+    transport = RetryTransport(
+        httpx.HTTPTransport(limits=HTTP_LIMITS, http2=HTTP2_ENABLED))
+    return httpx.Client(transport=transport, timeout=HTTP_TIMEOUT)
+
+
+def get_async_client() -> Optional[httpx.AsyncClient]:
+    """Get the application-scoped async HTTP client, if the application started it"""
+    if _async_client is None or _async_client.is_closed:
+        return None
+    return _async_client
+
+
+def get_sync_client() -> Optional[httpx.Client]:
+    """Get the application-scoped sync HTTP client, if the application started it"""
+    if _sync_client is None or _sync_client.is_closed:
+        return None
+    return _sync_client
+
+
+def open_http_clients() -> None:
+    """Create the application-scoped HTTP clients. Called on application startup."""
+    global _async_client, _sync_client
+    if get_async_client() is None:
+        _async_client = create_async_client()
+    if get_sync_client() is None:
+        _sync_client = create_sync_client()
+
+
+async def close_http_clients() -> None:
+    """Close the application-scoped HTTP clients. Called on application shutdown."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
@@ -0,0 +1,224 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import httpx
+from fastapi.logger import logger
+
+from src.api.common.constants.integrations import (
+    INTEGRATION_BACKOFF_BASE_SECONDS,
+    INTEGRATION_BACKOFF_MAX_SECONDS,
+    INTEGRATION_MAX_RETRIES,
+    INTEGRATION_RATE_LIMITS,
+    INTEGRATION_RETRY_STATUS_CODES,
+)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, shared by threads and event loops.
+    Callers reserve a token and wait the returned time before sending the request.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve a token and return the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+@dataclass
+class UpstreamStats:
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+    throttled: int = 0
+    throttled_seconds: float = 0.0
+
+
+class _Upstream:
+    def __init__(self, host: str):
+        rate_limit = INTEGRATION_RATE_LIMITS.get(host)
+        self.bucket = TokenBucket(*rate_limit) if rate_limit else None
+        self.stats = UpstreamStats()
+
+    def reserve(self) -> float:
+        wait = self.bucket.reserve() if self.bucket else 0.0
+        self.stats.requests += 1
+        if wait > 0:
+            self.stats.throttled += 1
+            self.stats.throttled_seconds += wait
+        return wait
+
+
+_upstreams: Dict[str, _Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def _get_upstream(host: str) -> _Upstream:
+    with _upstreams_lock:
+        if host not in _upstreams:
+            _upstreams[host] = _Upstream(host)
+        return _upstreams[host]
+
+
+def get_http_stats() -> Dict[str, Dict]:
+    """Get the request counters of each upstream host"""
+    with _upstreams_lock:
+        return {host: asdict(upstream.stats) for host, upstream in _upstreams.items()}
+
+
+def reset_http_stats() -> None:
+    """Reset the rate limiters and request counters of all upstream hosts"""
+    with _upstreams_lock:
+        _upstreams.clear()
+
+
+def _is_idempotent(request: httpx.Request) -> bool:
+    # Read-only POST requests (e.g. Notion database queries) opt in with extensions={"idempotent": True}
+    return request.method in IDEMPOTENT_METHODS or bool(request.extensions.get("idempotent"))
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse the Retry-After header, given in seconds or as an HTTP date"""
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Retry-After if the upstream sent it, exponential backoff with full jitter otherwise"""
+    retry_after = _retry_after_seconds(response) if response is not None else None
+    if retry_after is not None:
+        return min(retry_after, INTEGRATION_BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(INTEGRATION_BACKOFF_MAX_SECONDS,
+                                 INTEGRATION_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _should_retry(request: httpx.Request, attempt: int, max_retries: int) -> bool:
+    return attempt < max_retries and _is_idempotent(request)
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport applying the per-upstream rate limits and retrying
+    idempotent requests on transient errors.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_retries: int = INTEGRATION_MAX_RETRIES):
+        self._transport = transport
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream = _get_upstream(request.url.host)
+        attempt = 0
+        while True:
+            wait = upstream.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if not _should_retry(request, attempt, self.max_retries):
+                    upstream.stats.failures += 1
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning(
+                    f"{request.method} {request.url} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code == 429:
+                    upstream.stats.rate_limited += 1
+                if response.status_code not in INTEGRATION_RETRY_STATUS_CODES:
+                    return response
+                if not _should_retry(request, attempt, self.max_retries):
+                    upstream.stats.failures += 1
+                    return response
+                delay = _retry_delay(attempt, response)
+                await response.aclose()
+                logger.warning(
+                    f"{request.method} {request.url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            upstream.stats.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    Sync transport applying the per-upstream rate limits and retrying
+    idempotent requests on transient errors.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_retries: int = INTEGRATION_MAX_RETRIES):
+        self._transport = transport
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        upstream = _get_upstream(request.url.host)
+        attempt = 0
+        while True:
+            wait = upstream.reserve()
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as e:
+                if not _should_retry(request, attempt, self.max_retries):
+                    upstream.stats.failures += 1
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning(
+                    f"{request.method} {request.url} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code == 429:
+                    upstream.stats.rate_limited += 1
+                if response.status_code not in INTEGRATION_RETRY_STATUS_CODES:
+                    return response
+                if not _should_retry(request, attempt, self.max_retries):
+                    upstream.stats.failures += 1
+                    return response
+                delay = _retry_delay(attempt, response)
+                response.close()
+                logger.warning(
+                    f"{request.method} {request.url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            upstream.stats.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self._transport.close()
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.logger import logger
 from fastapi.responses import JSONResponse
@@ -6,14 +7,18 @@ from sqlmodel import Session
 from src.api.integrations.fourgeeks.log_error import log_contract_error, log_student_error
 from src.api.services.services.service_period_service import ServicePeriodService
 from src.api.common.utils.database import get_db
+from src.api.common.utils.encryption import decrypt_many_async
 from src.api.services.services.service_contract import ServiceContractService
-from src.api.integrations.fourgeeks import FourGeeksClient, FourGeeksConfig, FourGeeksCredentials
+from src.api.integrations.fourgeeks import AsyncFourGeeksClient, FourGeeksClient, FourGeeksConfig, FourGeeksCredentials
 from src.api.clients.services.client_service import ClientService
 from src.api.services.services.service_service import ServiceService
 from src.api.integrations.fourgeeks.processor import EnrollmentProcessor, StudentProcessor
 
 router = APIRouter(prefix="/integrations/fourgeeks", tags=["integrations"])
 
+# Contracts whose enrollments are written in a single commit
+ENROLLMENTS_BATCH_SIZE = 100
+
 
 def get_client_service(db: Session = Depends(get_db)):
     return ClientService(db)
@@ -42,6 +47,21 @@ def get_fourgeeks_client():
     return client
 
 
+async def get_async_fourgeeks_client():
+    config = FourGeeksConfig()
+    credentials = FourGeeksCredentials(
+        username=config.username,
+        password=config.password
+    )
+    client = AsyncFourGeeksClient(
+        credentials, max_concurrent_requests=config.max_concurrent_requests)
+    await client.login()  # Authenticates with 4Geeks API
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
 @router.route('/test', methods=['GET'])
 def test_fourgeeks_integration(request: Request):
     """
@@ -219,17 +239,40 @@ def test_fourgeeks_integration(request: Request):
 #         )
 
 
+def _log_contract_enrollments_error(processor: EnrollmentProcessor, e: Exception, contract_id: int, db: Session):
+    processor.stats["errors"] += 1
+    error_msg = log_contract_error(e, contract_id)
+    processor.stats["error_details"].append(error_msg)
+
+    # Log the error to our integration error table
+    try:
+        from src.api.integrations.utils.error_logger import log_integration_error
+        log_integration_error(
+            integration_name="fourgeeks",
+            operation_type="sync_enrollments",
+            external_id=str(contract_id),
+            entity_type="contract",
+            error_message=str(e),
+            error_details={"contract_id": contract_id, "error_msg": error_msg},
+            contract_id=contract_id,
+            db=db
+        )
+    except Exception as log_error:
+        logger.error(f"Failed to log integration error: {log_error}")
+
+
 @router.get("/sync-enrollments-from-clients")
-def sync_client_enrollments(
+async def sync_client_enrollments(
     client_service: ClientService = Depends(get_client_service),
     period_service: ServicePeriodService = Depends(get_period_service),
     contract_service: ServiceContractService = Depends(get_contract_service),
     service_service: ServiceService = Depends(get_service_service),
-    fourgeeks_client: FourGeeksClient = Depends(get_fourgeeks_client),
+    fourgeeks_client: AsyncFourGeeksClient = Depends(get_async_fourgeeks_client),
     db: Session = Depends(get_db)
 ) -> dict:
     """
     Synchronize all enrollments associated with client's 4Geeks users.
+    Enrollments of different users are fetched concurrently.
 
     Returns:
         dict: Statistics about the synchronization process including counts of
@@ -241,10 +284,9 @@ def sync_client_enrollments(
 
 
     try:
-        contracts = contract_service.get_active_contracts()
-
-        for contract in contracts:
-            #  Get the client enrollments from 4Geeks
+        # Clients and their external IDs are loaded with the contracts
+        contracts_to_sync = []
+        for contract in contract_service.iter_active_contracts():
             try:
                 fourgeeks_external_id = contract.client.get_external_id(
                     system="fourgeeks")
@@ -254,40 +296,32 @@ def sync_client_enrollments(
                         f"No fourgeeks external ID found for client {contract.client.id}"
                     )
                     continue
-
-                enrollments = []
-                for academy_id in academy_ids:
-                    enrollments = fourgeeks_client.get_user_enrollments(
-                        user_id=fourgeeks_external_id,
-                        params={"roles": "STUDENT"},
-                        academy_id=academy_id
-                    )
-                    if len(enrollments) > 0:
-                        break
-
-                for enrollment in enrollments:
-                    processor.process_enrollment(enrollment, contract.id)
-
+                contracts_to_sync.append((contract.id, fourgeeks_external_id))
             except Exception as e:
-                processor.stats["errors"] += 1
-                error_msg = log_contract_error(e, contract.id)
-                processor.stats["error_details"].append(error_msg)
-                
-                # Log the error to our integration error table
-                try:
-                    from src.api.integrations.utils.error_logger import log_integration_error
-                    log_integration_error(
-                        integration_name="fourgeeks",
-                        operation_type="sync_enrollments",
-                        external_id=str(contract.id),
-                        entity_type="contract",
-                        error_message=str(e),
-                        error_details={"contract_id": contract.id, "error_msg": error_msg},
-                        contract_id=contract.id,
-                        db=db
-                    )
-                except Exception as log_error:
-                    logger.error(f"Failed to log integration error: {log_error}")
+                _log_contract_enrollments_error(processor, e, contract.id, db)
+
+        # Get the client enrollments from 4Geeks, the client limits the requests in flight
+        contracts_enrollments = await asyncio.gather(*[
+            fourgeeks_client.get_user_enrollments_in_academies(
+                user_id=fourgeeks_external_id,
+                academy_ids=academy_ids,
+                params={"roles": "STUDENT"}
+            )
+            for _, fourgeeks_external_id in contracts_to_sync
+        ], return_exceptions=True)
+
+        # The periods of each batch of contracts are written in a single commit
+        batch = []
+        for (contract_id, _), enrollments in zip(contracts_to_sync, contracts_enrollments):
+            if isinstance(enrollments, Exception):
+                _log_contract_enrollments_error(processor, enrollments, contract_id, db)
+                continue
+            batch.append((contract_id, enrollments))
+            if len(batch) == ENROLLMENTS_BATCH_SIZE:
+                processor.process_contracts_enrollments(batch)
+                batch = []
+        if batch:
+            processor.process_contracts_enrollments(batch)
 
         return {
             "success": True,
@@ -317,15 +351,15 @@ def sync_client_enrollments(
 
 
 @router.get("/sync-students-from-clients")
-def sync_students_from_clients(
+async def sync_students_from_clients(
     client_service: ClientService = Depends(get_client_service),
-    fourgeeks_client: FourGeeksClient = Depends(get_fourgeeks_client),
+    fourgeeks_client: AsyncFourGeeksClient = Depends(get_async_fourgeeks_client),
     db: Session = Depends(get_db)
 ) -> dict:
     """
     Syncs clients in the local database with 4Geeks students by email.
     Adds the 4Geeks user ID as an external ID to matching clients
-    who don't already have one.
+    who don't already have one. Students are searched concurrently.
 
     Returns:
         dict: Statistics about the synchronization process including counts
@@ -336,59 +370,68 @@ def sync_students_from_clients(
     academy_ids = [int(a.strip()) for a in academy_ids if a.strip()]
 
     try:
-        clients_to_sync = client_service.get_clients_with_no_external_id(
-            "fourgeeks")
-        logger.info(
-            f"Found {len(clients_to_sync)} clients without a 4Geeks external ID.")
-
-        # Track which clients still need to be found after each academy_id
-        clients_remaining = [(client.id, client.identifier.lower()) for client in clients_to_sync]
         not_found_details = []
         error_details = []
         linked = 0
         errors = 0
         not_found = 0
+        clients_count = 0
+
+        # Clients are streamed in batches, each batch is searched in every academy
+        for clients_batch in client_service.iter_clients_with_no_external_id("fourgeeks"):
+            clients_count += len(clients_batch)
+            identifiers = await decrypt_many_async(
+                [encrypted_identifier for _, encrypted_identifier in clients_batch])
+            # Track which clients still need to be found after each academy_id
+            clients_remaining = [(client_id, identifier.lower())
+                                 for (client_id, _), identifier in zip(clients_batch, identifiers)]
+
+            for academy_id in academy_ids:
+                next_clients_remaining = []
+                results = await asyncio.gather(*[
+                    processor.find_and_link_student_async(
+                        client_id, client_identifier, academy_id=academy_id
+                    )
+                    for client_id, client_identifier in clients_remaining
+                ])
+                for (client_id, client_identifier), (linked_id, error_msg) in zip(clients_remaining, results):
+                    if linked_id:
+                        linked += 1
+                    elif error_msg == "not_found":
+                        next_clients_remaining.append((client_id, client_identifier))
+                    else:
+                        errors += 1
+                        if error_msg:
+                            error_details.append(log_student_error(error_msg))
+                            
+                            # Log the error to our integration error table
+                            try:
+                                from src.api.integrations.utils.error_logger import log_integration_error
+                                log_integration_error(
+                                    integration_name="fourgeeks",
+                                    operation_type="sync_students",
+                                    external_id=str(client_id),
+                                    entity_type="client",
+                                    error_message=error_msg,
+                                    error_details={"client_id": client_id, "client_identifier": client_identifier, "academy_id": academy_id},
+                                    client_id=client_id,
+                                    db=db
+                                )
+                            except Exception as log_error:
+                                logger.error(f"Failed to log integration error: {log_error}")
+                            
+                        next_clients_remaining.append((client_id, client_identifier))
+                clients_remaining = next_clients_remaining
+                # Only retry not found/errors in the next academy_id
+                if not clients_remaining:
+                    break
 
-        for academy_id in academy_ids:
-            next_clients_remaining = []
-            for client_id, client_identifier in clients_remaining:
-                linked_id, error_msg = processor.find_and_link_student(
-                    client_id, client_identifier, academy_id=academy_id
-                )
-                if linked_id:
-                    linked += 1
-                elif error_msg == "not_found":
-                    next_clients_remaining.append((client_id, client_identifier))
-                else:
-                    errors += 1
-                    if error_msg:
-                        error_details.append(log_student_error(error_msg))
-                        
-                        # Log the error to our integration error table
-                        try:
-                            from src.api.integrations.utils.error_logger import log_integration_error
-                            log_integration_error(
-                                integration_name="fourgeeks",
-                                operation_type="sync_students",
-                                external_id=str(client_id),
-                                entity_type="client",
-                                error_message=error_msg,
-                                error_details={"client_id": client_id, "client_identifier": client_identifier, "academy_id": academy_id},
-                                client_id=client_id,
-                                db=db
-                            )
-                        except Exception as log_error:
-                            logger.error(f"Failed to log integration error: {log_error}")
-                        
-                    next_clients_remaining.append((client_id, client_identifier))
-            clients_remaining = next_clients_remaining
-            # Only retry not found/errors in the next academy_id
-            if not clients_remaining:
-                break
-
-        if len(clients_remaining) > 0:
             not_found += len(clients_remaining)
-            not_found_details = [client_identifier for client_id, client_identifier in clients_remaining]
+            not_found_details.extend(
+                client_identifier for client_id, client_identifier in clients_remaining)
+
+        logger.info(
+            f"Found {clients_count} clients without a 4Geeks external ID.")
 
         logger.info(
             f"Sync completed. Linked: {linked}, Not Found: {not_found}, Errors: {errors}")
@@ -1,6 +1,5 @@
-from datetime import datetime
 import logging
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.logger import logger
 from fastapi.responses import JSONResponse
@@ -13,17 +12,24 @@ from src.api.services.endpoints.service import get_service_service
 from src.api.services.endpoints.service_contract import get_service_contract_service
 from src.api.services.services import ServiceService
 from src.api.services.services.service_service import ServiceService
+from src.api.services.services.service_catalogue import ServiceCatalogue
 from src.api.integrations.holded import HoldedClient, HoldedConfig
+from src.api.integrations.holded.contacts import HoldedContactCache
+from src.api.integrations.holded.processor import DocumentImportResult, HoldedDocumentsProcessor, get_invoice_data, is_credit_note
 from src.api.integrations.utils.error_logger import log_integration_error
+from src.api.integrations.services.integration_sync_state_service import IntegrationSyncStateService
 from src.api.clients.services.client_service import ClientService
 from src.api.invoices.services.invoice_service import InvoiceService
 from src.api.clients.schemas.client import ClientCreate, ClientExternalIdCreate
-from src.api.invoices.schemas.invoice import InvoiceCreate, InvoiceUpdate
+from src.api.invoices.schemas.invoice import InvoiceUpdate
 from src.api.services.schemas.service import ServiceRead
 from src.api.accruals.models.contract_accrual import ContractAccrualStatus
 
 router = APIRouter(prefix="/integrations/holded", tags=["integrations"])
 
+# Sync state resource of the invoices and credit notes import
+DOCUMENTS_SYNC_RESOURCE = "documents"
+
 
 def get_client_service(db: Session = Depends(get_db)):
     return ClientService(db)
@@ -43,16 +49,18 @@ def accepted_service(service):
         service.get("name")[0:2] == "ES" or service.get("name")[0:2] == "EU")
 
 
-def _create_client(contact, client_service):
+def _client_data(contact) -> ClientCreate:
     try:
-        client_data = ClientCreate(
+        return ClientCreate(
             identifier=contact.get("email"),
             name=contact.get("name", "")
         )
     except Exception as e:
         raise Exception(f"Missing email for contact: {contact.get('id')}.")
 
-    client = client_service.create_client(client_data)
+
+def _create_client(contact, client_service):
+    client = client_service.create_client(_client_data(contact))
 
     # Add external ID
     external_id_data = ClientExternalIdCreate(
@@ -65,51 +73,120 @@ def _create_client(contact, client_service):
 
 
 def _is_credit_note(document):
-    return document.get("docNumber").startswith("CN") and document.get("from", {}).get("docType", "") == "invoice"
+    return is_credit_note(document)
 
 
-async def _get_or_create_client(contact_id, client_service, holded_client):
-    client = client_service.get_client_by_external_id(
-        "holded", contact_id)
-    if not client:
-        contact = await holded_client.get_contact(contact_id)
-        if not contact:
-            raise Exception("Contact id not found")
-        client = _create_client(contact, client_service)
-    return client
+async def _resolve_contacts(contact_ids, client_service: ClientService, contact_cache: HoldedContactCache,
+                            known_clients: Dict) -> Dict[str, str]:
+    """
+    Get or create the clients of the Holded contacts that are not known yet.
+    New clients are created in a single transaction, or one by one if it fails.
+
+    Returns:
+        Error message of each contact whose client could not be resolved
+    """
+    contact_ids = [contact_id for contact_id in dict.fromkeys(contact_ids)
+                   if contact_id not in known_clients]
+    if not contact_ids:
+        return {}
+
+    errors = {}
+    clients_data = {}
+    contacts = await contact_cache.get_many(contact_ids)
+    for contact_id, contact in contacts.items():
+        try:
+            if isinstance(contact, Exception):
+                raise contact
+            if not contact:
+                raise Exception("Contact id not found")
+            clients_data[contact_id] = _client_data(contact)
+        except Exception as e:
+            errors[contact_id] = str(e)
+
+    if not clients_data:
+        return errors
+    try:
+        known_clients.update(client_service.create_clients_with_external_ids(
+            "holded", clients_data))
+    except Exception as e:
+        logger.error(
+            f"Error creating {len(clients_data)} clients, creating them one by one: {e}")
+        client_service.db.rollback()
+        for contact_id in clients_data:
+            try:
+                known_clients[contact_id] = _create_client(
+                    contacts[contact_id], client_service)
+            except Exception as e:
+                client_service.db.rollback()
+                errors[contact_id] = str(e)
+    return errors
 
 
 def _create_invoice(document, client, invoice_service):
-    # Convert to datetime as needed
-    invoice_date = datetime.fromtimestamp(
-        document.get("date")).date()
-    due_date = datetime.fromtimestamp(document.get(
-        "dueDate")).date() if document.get("dueDate") else None
-
-    invoice_data = InvoiceCreate(
-        external_id=document.get("id"),
-        client_id=client.id if client else None,
-        invoice_number=document.get("docNumber", ""),
-        invoice_date=invoice_date,
-        due_date=due_date,
-        total_amount=document.get("total", 0.0),
-        currency=document.get("currency", "EUR"),
-        status=document.get("status", "pending")
-    )
-
-    invoice = invoice_service.create_invoice(invoice_data)
+    invoice = invoice_service.create_invoice(
+        get_invoice_data(document, client))
     return invoice
 
+
+class _DocumentsWatermark:
+    """
+    Tracks the most recent document imported in a sync run.
+    It never goes past a failed document, so the next incremental run fetches it again.
+    """
+
+    def __init__(self):
+        self.last_imported: Optional[Tuple[int, str]] = None
+        self.first_failed: Optional[int] = None
+
+    def imported(self, document: dict):
+        timestamp = document.get("date")
+        if timestamp is not None and (self.last_imported is None or timestamp >= self.last_imported[0]):
+            self.last_imported = (timestamp, document.get("id"))
+
+    def failed(self, document: dict):
+        timestamp = document.get("date")
+        if timestamp is not None and (self.first_failed is None or timestamp < self.first_failed):
+            self.first_failed = timestamp
+
+    def get(self) -> Optional[Tuple[int, Optional[str]]]:
+        """Get the watermark timestamp and cursor, or None if nothing was imported"""
+        if self.last_imported is None:
+            return None
+        if self.first_failed is not None and self.first_failed <= self.last_imported[0]:
+            return self.first_failed, None
+        return self.last_imported
+
+
+def _covers_watermark(start_timestamp: Optional[int], stored_timestamp: Optional[int]) -> bool:
+    """
+    Whether a run may record its watermark.
+
+    Only runs continuing from the stored watermark do: full runs, and windows
+    starting at or before the stored watermark, incremental or not. A window
+    starting later would move the watermark past documents never imported,
+    and incremental runs would skip them for good.
+    """
+    if start_timestamp is None or stored_timestamp is None:
+        return True
+    return start_timestamp <= stored_timestamp
+
+
 # Get the account identifier from products in Holded documents,
 # and get the service from the account external id
 
 
-def _get_service_from_products(products, service_service: ServiceService) -> ServiceRead:
+def _get_service_from_products(products, service_service: ServiceService,
+                               service_catalogue: Optional[ServiceCatalogue] = None) -> ServiceRead:
     service = None
     try:
         service_external_id = products[0].get("account")
-        service = service_service.get_service_by_external_id(
-            service_external_id)
+        if service_catalogue is not None:
+            service_id = service_catalogue.get_service_id(service_external_id)
+            service = service_service.get_service(
+                service_id) if service_id else None
+        else:
+            service = service_service.get_service_by_external_id(
+                service_external_id)
         if not service:
             raise Exception(f"Service not found: {service_external_id}")
     except Exception as e:
@@ -118,6 +195,107 @@ def _get_service_from_products(products, service_service: ServiceService) -> Ser
     return service
 
 
+def _import_document(document, client, invoice_service: InvoiceService, service_service: ServiceService,
+                     service_contract_service: ServiceContractService,
+                     service_catalogue: Optional[ServiceCatalogue] = None) -> DocumentImportResult:
+    """Import a single Holded document, committing each change"""
+    document_id = document.get("id")
+    try:
+        logger.info(f"Processing document: {document_id}")
+
+        # Check if invoice already exists
+        invoice = invoice_service.get_invoice_by_external_id(
+            document_id)
+        new_amount = 0
+        invoice_was_created = False
+        if not invoice:
+            try:
+                # If the document is a credit note, we need to negate the total amount
+                if _is_credit_note(document):
+                    document["total"] = - \
+                        abs(float(document.get("total", 0)))
+                invoice = _create_invoice(
+                    document, client, invoice_service)
+                new_amount = invoice.total_amount
+                invoice_was_created = True
+            except Exception as e:
+                logger.error(
+                    f"Error creating invoice for document_id {document_id}: {e}")
+                invoice_service.db.rollback()
+                raise e
+
+        # Get service by Holded account ID
+        service = _get_service_from_products(
+            document.get("products"), service_service, service_catalogue)
+        if not service:
+            logger.info(
+                f"Service not found. Skipping document_id: {document_id}")
+            return DocumentImportResult(document, "skipped", client)
+
+        # Create service contract if it doesn't exist
+        service_contract = service_contract_service.get_service_contract_by_client_and_service(
+            client.id, service.id)
+        if not service_contract:
+            try:
+                service_contract = service_contract_service.create_service_contract(
+                    client.id, service.id, first_invoice=invoice)
+            except Exception as e:
+                logger.error(
+                    f"Error creating service contract for document_id {document_id}: {e}")
+                raise e
+        else:
+            if new_amount != 0:
+                service_contract = service_contract_service.update_contract_amount(
+                    service_contract.id, new_amount, invoice_id=invoice.id)
+            if round(service_contract.contract_amount, 0) > 0 and service_contract.status != ServiceContractStatus.ACTIVE:
+                service_contract_service.update_contract_status(
+                    service_contract.id, ServiceContractUpdate(status=ServiceContractStatus.ACTIVE))
+            elif round(service_contract.contract_amount, 0) == 0 and service_contract.status == ServiceContractStatus.ACTIVE:
+                service_contract_service.update_contract_status(
+                    service_contract.id, ServiceContractUpdate(status=ServiceContractStatus.CANCELED))
+
+        # Handle contract accrual updates for new invoices
+        # Note: For ACTIVE accruals, the update_contract_amount method now handles this automatically
+        # For COMPLETED accruals, we still need to reactivate them manually
+        contract_accrual = getattr(
+            service_contract, 'contract_accrual', None)
+        if contract_accrual and contract_accrual.accrual_status == ContractAccrualStatus.COMPLETED and new_amount != 0:
+            # Reactivate completed accrual when new invoices arrive
+            contract_accrual.accrual_status = ContractAccrualStatus.ACTIVE
+            contract_accrual.total_amount_to_accrue += invoice.total_amount
+            contract_accrual.remaining_amount_to_accrue += invoice.total_amount
+            service_contract_service.db.add(contract_accrual)
+            service_contract_service.db.commit()
+
+        # Update invoice with service contract id
+        invoice_service.update_invoice(invoice.id, InvoiceUpdate(
+            service_contract_id=service_contract.id
+        ))
+
+        return DocumentImportResult(document, "created" if invoice_was_created else "updated", client)
+    except Exception as e:
+        return DocumentImportResult(document, "error", client, str(e))
+
+
+def _log_document_error(document, client, error, db: Session):
+    # Log to integration errors table
+    try:
+        log_integration_error(
+            integration_name="holded",
+            operation_type="invoice",
+            external_id=str(document.get("id")),
+            entity_type="invoice",
+            error_message=str(error),
+            error_details={"document_data": document,
+                           "client_id": client.id if client else None},
+            client_id=client.id if client else None,
+            db=db
+        )
+    except Exception as log_error:
+        logger.error(
+            f"Failed to log integration error: {log_error}")
+
+
 @router.route('/test', methods=['GET'])
 async def test_holded_integration(request: Request):
     """
@@ -219,15 +397,47 @@ async def sync_invoices_and_clients(
         get_service_contract_service),
     db: Session = Depends(get_db),
     start_timestamp: Optional[int] = None,
-    end_timestamp: Optional[int] = None
+    end_timestamp: Optional[int] = None,
+    incremental: bool = False,
+    prefetch_contacts: bool = False
 ):
-    """Sync invoices with their respective clients from Holded to the local database"""
+    """
+    Sync invoices with their respective clients from Holded to the local database.
+
+    In incremental mode only documents dated from the last imported one onwards
+    are requested, regardless of an earlier start_timestamp. Runs starting after
+    the last imported document leave the watermark untouched.
+    With prefetch_contacts all the Holded contacts are listed upfront instead of
+    requesting the unknown ones one by one.
+    """
     try:
-        invoices = await holded_client.list_documents(
-            document_type="invoice", starttmp=start_timestamp, endtmp=end_timestamp)
-        credit_notes = await holded_client.list_documents(
-            document_type="creditnote", starttmp=start_timestamp, endtmp=end_timestamp)
-        documents = invoices + credit_notes
+        sync_state_service = IntegrationSyncStateService(db)
+        watermark = _DocumentsWatermark()
+        watermark_timestamp, watermark_cursor = None, None
+        sync_state = sync_state_service.get_state(
+            "holded", DOCUMENTS_SYNC_RESOURCE)
+        stored_timestamp = sync_state.last_synced_timestamp if sync_state else None
+        # Decided before start_timestamp is moved to the watermark
+        record_watermark = _covers_watermark(start_timestamp, stored_timestamp)
+        if incremental and stored_timestamp is not None:
+            watermark_timestamp = stored_timestamp
+            watermark_cursor = sync_state.cursor
+            start_timestamp = max(start_timestamp or 0, watermark_timestamp)
+
+        # Invoices and credit notes are fetched concurrently, page by page
+        documents_pages = holded_client.iter_documents_concurrently(
+            ["invoice", "creditnote"], starttmp=start_timestamp, endtmp=end_timestamp)
+        known_clients = {}
+        # Services are resolved in memory, reloaded only if sync_services changes them
+        service_catalogue = ServiceCatalogue(db).load()
+        contact_cache = HoldedContactCache(holded_client)
+        if prefetch_contacts:
+            try:
+                await contact_cache.prefetch()
+            except Exception as e:
+                logger.error(
+                    f"Error prefetching contacts, requesting them one by one: {e}")
+        total_received = 0
         processed_count = 0
         created_count = 0
         updated_count = 0
@@ -235,121 +445,83 @@ async def sync_invoices_and_clients(
         error_count = 0
         errors = []
 
-        for document in documents:
-            try:
+        async for _, documents in documents_pages:
+            total_received += len(documents)
+            # Resolve the already linked contacts of the page in a single query
+            known_clients.update(client_service.resolve_external_ids(
+                "holded", [document.get("contact") for document in documents]))
+
+            # Get or create the clients of the contacts not linked yet
+            contact_errors = await _resolve_contacts(
+                [document.get("contact") for document in documents],
+                client_service, contact_cache, known_clients)
+
+            page_documents = []
+            for document in documents:
                 document_id = document.get("id")
-                logger.info(f"Processing document: {document_id}")
+                # The last document imported by the previous incremental run
+                if document_id == watermark_cursor and document.get("date") == watermark_timestamp:
+                    skipped_count += 1
+                    continue
 
-                # Get client by Holded contact ID
-                try:
-                    contact_id = document.get("contact")
-                    client = await _get_or_create_client(contact_id, client_service, holded_client)
-                except Exception as e:
+                contact_error = contact_errors.get(document.get("contact"))
+                if contact_error:
                     logger.error(
-                        f"Error getting client for document_id {document_id}: {e}")
-                    client_service.db.rollback()
-                    raise e
-
-                # Check if invoice already exists
-                invoice = invoice_service.get_invoice_by_external_id(
-                    document_id)
-                new_amount = 0
-                invoice_was_created = False
-                if not invoice:
-                    try:
-                        # If the document is a credit note, we need to negate the total amount
-                        if _is_credit_note(document):
-                            document["total"] = - \
-                                abs(float(document.get("total", 0)))
-                        invoice = _create_invoice(
-                            document, client, invoice_service)
-                        new_amount = invoice.total_amount
-                        invoice_was_created = True
-                    except Exception as e:
-                        logger.error(
-                            f"Error creating invoice for document_id {document_id}: {e}")
-                        invoice_service.db.rollback()
-                        raise e
-
-                # Get service by Holded account ID
-                service = _get_service_from_products(
-                    document.get("products"), service_service)
-                if not service:
-                    logger.info(
-                        f"Service not found. Skipping document_id: {document_id}")
-                    skipped_count += 1
+                        f"Error getting client for document_id {document_id}: {contact_error}")
+                    error_count += 1
+                    errors.append(contact_error)
+                    watermark.failed(document)
+                    _log_document_error(
+                        document, None, contact_error, invoice_service.db)
                     continue
+                page_documents.append(document)
 
-                # Create service contract if it doesn't exist
-                service_contract = service_contract_service.get_service_contract_by_client_and_service(
-                    client.id, service.id)
-                if not service_contract:
-                    try:
-                        service_contract = service_contract_service.create_service_contract(
-                            client.id, service.id, first_invoice=invoice)
-                    except Exception as e:
-                        logger.error(
-                            f"Error creating service contract for document_id {document_id}: {e}")
-                        raise e
-                else:
-                    if new_amount != 0:
-                        service_contract = service_contract_service.update_contract_amount(
-                            service_contract.id, new_amount, invoice_id=invoice.id)
-                    if round(service_contract.contract_amount, 0) > 0 and service_contract.status != ServiceContractStatus.ACTIVE:
-                        service_contract_service.update_contract_status(
-                            service_contract.id, ServiceContractUpdate(status=ServiceContractStatus.ACTIVE))
-                    elif round(service_contract.contract_amount, 0) == 0 and service_contract.status == ServiceContractStatus.ACTIVE:
-                        service_contract_service.update_contract_status(
-                            service_contract.id, ServiceContractUpdate(status=ServiceContractStatus.CANCELED))
-
-                # Handle contract accrual updates for new invoices
-                # Note: For ACTIVE accruals, the update_contract_amount method now handles this automatically
-                # For COMPLETED accruals, we still need to reactivate them manually
-                contract_accrual = getattr(
-                    service_contract, 'contract_accrual', None)
-                if contract_accrual and contract_accrual.accrual_status == ContractAccrualStatus.COMPLETED and new_amount != 0:
-                    # Reactivate completed accrual when new invoices arrive
-                    contract_accrual.accrual_status = ContractAccrualStatus.ACTIVE
-                    contract_accrual.total_amount_to_accrue += invoice.total_amount
-                    contract_accrual.remaining_amount_to_accrue += invoice.total_amount
-                    service_contract_service.db.add(contract_accrual)
-                    service_contract_service.db.commit()
-
-                # Update invoice with service contract id
-                invoice_service.update_invoice(invoice.id, InvoiceUpdate(
-                    service_contract_id=service_contract.id
-                ))
+            if not page_documents:
+                continue
 
+            # Import the page in a single transaction, or document by document if it fails
+            try:
+                results = HoldedDocumentsProcessor(db, service_catalogue).process_page(
+                    page_documents, known_clients)
+            except Exception as e:
+                logger.error(
+                    f"Error importing page of {len(page_documents)} documents, importing them one by one: {e}")
+                results = [
+                    _import_document(document, known_clients.get(document.get("contact")),
+                                     invoice_service, service_service, service_contract_service,
+                                     service_catalogue)
+                    for document in page_documents
+                ]
+
+            for result in results:
+                if result.status == "error":
+                    error_count += 1
+                    errors.append(result.error)
+                    watermark.failed(result.document)
+                    logging.error(f"Error creating invoice: {result.error}")
+                    _log_document_error(
+                        result.document, result.client, result.error, invoice_service.db)
+                    continue
+
+                watermark.imported(result.document)
+                if result.status == "skipped":
+                    skipped_count += 1
+                    continue
                 processed_count += 1
-                if invoice_was_created:
+                if result.status == "created":
                     created_count += 1
                 else:
                     updated_count += 1
 
-            except Exception as e:
-                error_count += 1
-                errors.append(str(e))
-                logging.error(f"Error creating invoice: {e}")
+        # Record the watermark for the next incremental run
+        new_watermark = watermark.get()
+        if new_watermark and record_watermark:
+            sync_state_service.update_watermark(
+                "holded", DOCUMENTS_SYNC_RESOURCE, *new_watermark)
 
-                # Log to integration errors table
-                try:
-                    log_integration_error(
-                        integration_name="holded",
-                        operation_type="invoice",
-                        external_id=str(document_id),
-                        entity_type="invoice",
-                        error_message=str(e),
-                        error_details={"document_data": document,
-                                       "client_id": client.id if client else None},
-                        client_id=client.id if client else None,
-                        db=invoice_service.db
-                    )
-                except Exception as log_error:
-                    logger.error(
-                        f"Failed to log integration error: {log_error}")
         return {
             "success": True,
-            "total_received": len(documents),
+            "total_received": total_received,
             "processed": processed_count,
             "created": created_count,
             "updated": updated_count,
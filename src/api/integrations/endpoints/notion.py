@@ -3,6 +3,7 @@ from fastapi.responses import JSONResponse
 from src.api.integrations.notion import NotionClient, NotionConfig
 from sqlmodel import Session
 from src.api.common.utils.database import get_db
+from src.api.common.utils.encryption import decrypt_many_async
 from src.api.clients.services.client_service import ClientService
 from src.api.clients.schemas.client import ClientExternalIdCreate
 import logging
@@ -86,84 +87,85 @@ async def sync_page_ids_from_clients(
             raise HTTPException(
                 status_code=400, detail="No database_id provided and NOTION_DATABASE_ID is not set in environment.")
         notion_client = NotionClient(config)
-        # Only get clients missing a Notion external ID
-        clients = client_service.get_clients_with_no_external_id("notion")
         synced = []
         not_found = []
-        for client in clients:
-            identifier = client.identifier
-            # Query Notion for this client's page ID by email
-            try:
-                page_id = await notion_client.get_page_id(db_id, "Email", identifier)
-            except Exception as e:
-                # Get full error message including exception type and details
-                error_type = type(e).__name__
-                error_str = str(e)
-                # Try to get more details from the exception
-                error_details_dict = {
-                    "client_id": client.id,
-                    "identifier": identifier,
-                    "error_type": error_type,
-                    "error_message": error_str
-                }
+        # Only get clients missing a Notion external ID, streamed in batches
+        for clients_batch in client_service.iter_clients_with_no_external_id("notion"):
+            identifiers = await decrypt_many_async(
+                [encrypted_identifier for _, encrypted_identifier in clients_batch])
+            for (client_id, _), identifier in zip(clients_batch, identifiers):
+                # Query Notion for this client's page ID by email
+                try:
+                    page_id = await notion_client.get_page_id(db_id, "Email", identifier)
+                except Exception as e:
+                    # Get full error message including exception type and details
+                    error_type = type(e).__name__
+                    error_str = str(e)
+                    # Try to get more details from the exception
+                    error_details_dict = {
+                        "client_id": client_id,
+                        "identifier": identifier,
+                        "error_type": error_type,
+                        "error_message": error_str
+                    }
 
-                # If it's an HTTPException, try to extract the detail
-                if hasattr(e, 'detail'):
-                    error_details_dict["http_detail"] = str(e.detail)
-                    error_msg = f"Error querying Notion: {error_type}: {e.detail}"
-                elif hasattr(e, 'response') and hasattr(e.response, 'text'):
-                    # Try to get response text if available
-                    try:
-                        response_text = e.response.text if hasattr(
-                            e.response, 'text') else str(e.response)
-                        error_details_dict["response_text"] = response_text
-                        error_msg = f"Error querying Notion: {error_type}: {error_str}. Response: {response_text}"
-                    except:
+                    # If it's an HTTPException, try to extract the detail
+                    if hasattr(e, 'detail'):
+                        error_details_dict["http_detail"] = str(e.detail)
+                        error_msg = f"Error querying Notion: {error_type}: {e.detail}"
+                    elif hasattr(e, 'response') and hasattr(e.response, 'text'):
+                        # Try to get response text if available
+                        try:
+                            response_text = e.response.text if hasattr(
+                                e.response, 'text') else str(e.response)
+                            error_details_dict["response_text"] = response_text
+                            error_msg = f"Error querying Notion: {error_type}: {error_str}. Response: {response_text}"
+                        except:
+                            error_msg = f"Error querying Notion: {error_type}: {error_str}"
+                    else:
                         error_msg = f"Error querying Notion: {error_type}: {error_str}"
-                else:
-                    error_msg = f"Error querying Notion: {error_type}: {error_str}"
 
-                not_found.append({
-                    "client_id": client.id,
-                    "identifier": identifier,
-                    "reason": error_msg
-                })
+                    not_found.append({
+                        "client_id": client_id,
+                        "identifier": identifier,
+                        "reason": error_msg
+                    })
 
-                # Log the error to our integration error table
-                try:
-                    from src.api.integrations.utils.error_logger import log_integration_error
-                    log_integration_error(
-                        integration_name="notion",
-                        operation_type="sync_page_id",
-                        external_id=str(client.id),
-                        entity_type="client",
-                        error_message=error_msg,
-                        error_details=error_details_dict,
-                        client_id=client.id,
-                        db=db
-                    )
-                except Exception as log_error:
-                    logger.error(
-                        f"Failed to log integration error: {log_error}")
+                    # Log the error to our integration error table
+                    try:
+                        from src.api.integrations.utils.error_logger import log_integration_error
+                        log_integration_error(
+                            integration_name="notion",
+                            operation_type="sync_page_id",
+                            external_id=str(client_id),
+                            entity_type="client",
+                            error_message=error_msg,
+                            error_details=error_details_dict,
+                            client_id=client_id,
+                            db=db
+                        )
+                    except Exception as log_error:
+                        logger.error(
+                            f"Failed to log integration error: {log_error}")
 
-                continue
-            if not page_id:
-                not_found.append({
-                    "client_id": client.id,
+                    continue
+                if not page_id:
+                    not_found.append({
+                        "client_id": client_id,
+                        "identifier": identifier,
+                        "reason": "No matching Notion page"
+                    })
+                    continue
+                # Register new external ID
+                external_id_data = ClientExternalIdCreate(
+                    system="notion", external_id=page_id)
+                client_service.add_external_id(client_id, external_id_data)
+                synced.append({
+                    "client_id": client_id,
                     "identifier": identifier,
-                    "reason": "No matching Notion page"
+                    "page_id": page_id,
+                    "created": True
                 })
-                continue
-            # Register new external ID
-            external_id_data = ClientExternalIdCreate(
-                system="notion", external_id=page_id)
-            client_service.add_external_id(client.id, external_id_data)
-            synced.append({
-                "client_id": client.id,
-                "identifier": identifier,
-                "page_id": page_id,
-                "created": True
-            })
         return {
             "success": True,
             "linked": len(synced),
@@ -1,4 +1,4 @@
-from .client import FourGeeksClient, FourGeeksCredentials
+from .client import AsyncFourGeeksClient, FourGeeksClient, FourGeeksCredentials
 from .config import FourGeeksConfig
 
-__all__ = ['FourGeeksClient', 'FourGeeksCredentials', 'FourGeeksConfig'] 
\ No newline at end of file
+__all__ = ['AsyncFourGeeksClient', 'FourGeeksClient', 'FourGeeksCredentials', 'FourGeeksConfig']
@@ -1,9 +1,12 @@
 import os
+import asyncio
 import httpx
 import logging
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException
 from dataclasses import dataclass
+from src.api.common.utils.http_clients import create_async_client, create_sync_client, get_async_client, get_sync_client
+from src.api.integrations.fourgeeks.config import DEFAULT_MAX_CONCURRENT_REQUESTS
 
 
 @dataclass
@@ -15,10 +18,14 @@ class FourGeeksCredentials:
 class FourGeeksClient:
     BASE_URL = "https://breathecode.herokuapp.com/v1"
 
-    def __init__(self, credentials: FourGeeksCredentials):
+    def __init__(self, credentials: FourGeeksCredentials, http_client: Optional[httpx.Client] = None):
         self.credentials = credentials
         self._token: Optional[str] = None
-        self._client = httpx.Client()
+        # Reuse the application-scoped connection pool when available
+        self._client = http_client or get_sync_client()
+        self._owns_client = self._client is None
+        if self._owns_client:
+            self._client = create_sync_client()
 
     def _get_headers(self, academy_id: int = 6) -> Dict[str, str]:
         headers = {
@@ -38,7 +45,9 @@ class FourGeeksClient:
                     "email": self.credentials.username,
                     "password": self.credentials.password
                 },
-                headers=self._get_headers()
+                headers=self._get_headers(),
+                # Logging in again is harmless, so it can be retried like a GET request
+                extensions={"idempotent": True}
             )
             response.raise_for_status()
             self._token = response.json()["token"]
@@ -151,7 +160,160 @@ class FourGeeksClient:
             raise HTTPException(
                 status_code=500, detail=f"Error occurred in FourGeeksClient get_user_cohorts: {e}")
 
+    def close(self) -> None:
+        """Close the HTTP client, unless it is shared"""
+        if getattr(self, '_owns_client', False) and not self._client.is_closed:
+            self._client.close()
+
     def __del__(self):
         """Close the httpx client when the object is destroyed"""
-        if hasattr(self, '_client') and self._client:
-            self._client.close()
+        self.close()
+
+
+
+class AsyncFourGeeksClient:
+    """
+    Async variant of FourGeeksClient.
+    Requests can run concurrently, up to max_concurrent_requests at a time.
+    """
+    BASE_URL = FourGeeksClient.BASE_URL
+
+    def __init__(self, credentials: FourGeeksCredentials, http_client: Optional[httpx.AsyncClient] = None,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS):
+        self.credentials = credentials
+        self._token: Optional[str] = None
+        self._login_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        # Reuse the application-scoped connection pool when available
+        self._client = http_client or get_async_client()
+        self._owns_client = self._client is None
+        if self._owns_client:
+            self._client = create_async_client()
+
+    def _get_headers(self, academy_id: int = 6) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+            "Academy": str(academy_id),
+        }
+        if self._token:
+            headers["Authorization"] = f"Token {self._token}"
+        return headers
+
+    async def login(self) -> None:
+        """Authenticate with 4Geeks API and get token"""
+        try:
+            async with self._semaphore:
+                response = await self._client.post(
+                    f"{self.BASE_URL}/auth/login/",
+                    json={
+                        "email": self.credentials.username,
+                        "password": self.credentials.password
+                    },
+                    headers=self._get_headers(),
+                    extensions={"idempotent": True}
+                )
+            response.raise_for_status()
+            self._token = response.json()["token"]
+        except httpx.HTTPStatusError as e:
+            logging.error(f"HTTP error occurred in AsyncFourGeeksClient login: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"HTTP error occurred in AsyncFourGeeksClient login: {e}")
+        except Exception as e:
+            logging.error(f"Error occurred in AsyncFourGeeksClient login: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error occurred in AsyncFourGeeksClient login: {e}")
+
+    async def _ensure_login(self) -> None:
+        """Log in once, even if several requests need the token at the same time"""
+        if self._token:
+            return
+        async with self._login_lock:
+            if not self._token:
+                await self.login()
+
+    async def _get(self, path: str, operation: str, params: Optional[Dict[str, Any]] = None, academy_id: int = 6) -> Any:
+        await self._ensure_login()
+
+        try:
+            async with self._semaphore:
+                response = await self._client.get(
+                    f"{self.BASE_URL}{path}",
+                    params=params,
+                    headers=self._get_headers(academy_id=academy_id)
+                )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logging.error(
+                f"HTTP error occurred in AsyncFourGeeksClient {operation}: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"HTTP error occurred in AsyncFourGeeksClient {operation}: {e}")
+        except Exception as e:
+            logging.error(
+                f"Error occurred in AsyncFourGeeksClient {operation}: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error occurred in AsyncFourGeeksClient {operation}: {e}")
+
+    async def get_member_by_email(self, email: str, roles: List[str] = ["student"], academy_id: Optional[int] = 6) -> Dict[str, Any]:
+        """Get student information by email"""
+        await self._ensure_login()
+
+        try:
+            async with self._semaphore:
+                response = await self._client.get(
+                    f"{self.BASE_URL}/auth/academy/member/{email}",
+                    params={"roles": ",".join(roles)},
+                    headers=self._get_headers(academy_id=academy_id)
+                )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            if status_code == 404:
+                logging.error(
+                    f"Email not found")
+                raise HTTPException(
+                    status_code=status_code, detail=f"Email not found")
+            else:
+                logging.error(
+                    f"HTTP error in trying to get_member_by_email: {e}")
+                raise HTTPException(
+                    status_code=status_code, detail=f"HTTP error in trying to get_member_by_email: {e.response.text}")
+        except Exception as e:
+            logging.error(
+                f"Error in trying to get_member_by_email: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error in trying to get_member_by_email: {e}")
+
+    async def get_cohort(self, cohort_id: int) -> Dict[str, Any]:
+        """Get cohort information by ID"""
+        return await self._get(f"/admissions/cohort/{cohort_id}", "get_cohort")
+
+    async def get_cohort_user(self, cohort_id: int, user_id: int) -> Dict[str, Any]:
+        """Get cohort user information"""
+        return await self._get(f"/admissions/cohort/{cohort_id}/user/{user_id}", "get_cohort_user")
+
+    async def get_user_enrollments(self, user_id: int, params: Optional[Dict[str, Any]] = {}, academy_id: Optional[int] = 6) -> List[Dict[str, Any]]:
+        """Get all cohorts for a specific user"""
+        return await self._get(
+            "/admissions/academy/cohort/user",
+            "get_user_cohorts",
+            params={"users": user_id, **params},
+            academy_id=academy_id
+        )
+
+    async def get_user_enrollments_in_academies(self, user_id: int, academy_ids: List[int],
+                                                params: Optional[Dict[str, Any]] = {}) -> List[Dict[str, Any]]:
+        """Get the cohorts of a user from the first academy where they have any"""
+        enrollments = []
+        for academy_id in academy_ids:
+            enrollments = await self.get_user_enrollments(
+                user_id=user_id, params=params, academy_id=academy_id)
+            if len(enrollments) > 0:
+                break
+        return enrollments
+
+    async def aclose(self) -> None:
+        """Close the HTTP client, unless it is shared"""
+        if self._owns_client:
+            await self._client.aclose()
@@ -1,6 +1,11 @@
 import os
 from pydantic import BaseModel
 
+# Maximum number of requests in flight to the 4Geeks API per async client
+DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+
 class FourGeeksConfig(BaseModel):
     username: str = os.getenv("4GEEKS_USERNAME")
-    password: str = os.getenv("4GEEKS_PASSWORD") 
\ No newline at end of file
+    password: str = os.getenv("4GEEKS_PASSWORD")
+    max_concurrent_requests: int = int(os.getenv(
+        "4GEEKS_MAX_CONCURRENT_REQUESTS", DEFAULT_MAX_CONCURRENT_REQUESTS))
@@ -1,8 +1,8 @@
 from datetime import date, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi.logger import logger
 from src.api.clients.schemas.client import ClientExternalIdCreate
-from src.api.integrations.fourgeeks.client import FourGeeksClient
+from src.api.integrations.fourgeeks.client import AsyncFourGeeksClient, FourGeeksClient
 from src.api.integrations.fourgeeks.log_error import log_enrollment_error
 from src.api.integrations.utils.error_logger import log_integration_error
 from src.api.common.constants.services import ServicePeriodStatus, map_educational_status
@@ -11,10 +11,11 @@ from src.api.services.services.service_period_service import ServicePeriodServic
 from src.api.services.services.service_service import ServiceService
 from src.api.services.services.service_contract import ServiceContractService
 from src.api.services.schemas.service_period import ServicePeriodCreate
+from src.api.services.models.service_contract import ServiceContract
+from src.api.services.models.service_period import ServicePeriod
 from src.api.services.utils import (
     get_service_type_from_service_name,
-    get_service_type_from_service_period_name,
-    validate_service_period_compatibility
+    get_service_type_from_service_period_name
 )
 from src.api.common.utils.datetime import get_date
 
@@ -30,11 +31,20 @@ def _adjust_start_date_to_service(start_date_str: str | None, cohort_slug: str)
 
 
 class EnrollmentProcessor:
+    """
+    Creates and updates the service periods of contracts from their 4Geeks enrollments.
+
+    process_enrollment writes each enrollment on its own. process_contracts_enrollments
+    preloads the contracts, services and periods of a batch of contracts and writes all
+    their periods in a single commit.
+    """
+
     def __init__(self, period_service: ServicePeriodService, client_service: ClientService, service_service: ServiceService, contract_service: ServiceContractService):
         self.period_service = period_service
         self.client_service = client_service
         self.service_service = service_service
         self.contract_service = contract_service
+        self.db = period_service.db
         self.stats = {
             "created": 0,
             "updated": 0,
@@ -43,59 +53,139 @@ class EnrollmentProcessor:
             "compatibility_errors": 0,
             "error_details": []
         }
+        # Batch caches, filled by process_contracts_enrollments
+        self._contracts: Dict[int, ServiceContract] = {}
+        self._periods: Dict[Tuple[int, str], ServicePeriod] = {}
+        self._cohort_service_types: Dict[str, str] = {}
 
     def process_enrollment(self, enrollment: dict, contract_id: int):
         try:
-            cohort = enrollment.get("cohort", {})
+            self._process_enrollment(enrollment, contract_id)
+            self.db.commit()
+        except Exception as e:
+            self._log_enrollment_error(e, enrollment, contract_id)
+
+    def process_contracts_enrollments(self, contracts_enrollments: List[Tuple[int, List[dict]]]):
+        """
+        Process the enrollments of a batch of contracts in a single transaction.
+
+        If the batch cannot be written, its enrollments are processed one by one.
+
+        Args:
+            contracts_enrollments: Contract ID and its enrollments, for each contract of the batch
+        """
+        stats = {key: value for key, value in self.stats.items() if key != "error_details"}
+        error_details_count = len(self.stats["error_details"])
+        failed_enrollments = []
+        try:
+            self._preload_contracts(
+                [contract_id for contract_id, _ in contracts_enrollments])
+            for contract_id, enrollments in contracts_enrollments:
+                for enrollment in enrollments:
+                    try:
+                        self._process_enrollment(enrollment, contract_id)
+                    except Exception as e:
+                        failed_enrollments.append((e, enrollment, contract_id))
+            self.db.commit()
+        except Exception as e:
+            logger.error(
+                f"Error writing enrollments batch, processing them one by one: {e}")
+            self.db.rollback()
+            self.stats.update(stats)
+            del self.stats["error_details"][error_details_count:]
+            self._clear_batch_cache()
+            for contract_id, enrollments in contracts_enrollments:
+                for enrollment in enrollments:
+                    self.process_enrollment(enrollment, contract_id)
+            return
+
+        # Errors are logged once the batch is committed, logging commits the session
+        for e, enrollment, contract_id in failed_enrollments:
+            self._log_enrollment_error(e, enrollment, contract_id)
+
+    def _process_enrollment(self, enrollment: dict, contract_id: int):
+        """Add the period changes of an enrollment to the session"""
+        cohort = enrollment.get("cohort", {})
+
+        if not self._validate_enrollment(cohort):
+            return
+
+        cohort_slug = cohort.get("slug")
+
+        # Validate cohort-service compatibility
+        if not self._validate_service_period_compatibility(cohort_slug, contract_id):
+            return
 
-            if not self._validate_enrollment(cohort):
-                return
+        start_date = cohort.get("kickoff_date")
+        end_date = cohort.get("ending_date")
 
-            cohort_slug = cohort.get("slug")
-            
-            # Validate cohort-service compatibility
-            if not self._validate_service_period_compatibility(cohort_slug, contract_id):
-                return
+        educational_status = map_educational_status(
+            enrollment.get("educational_status"))
 
-            start_date = cohort.get("kickoff_date")
-            end_date = cohort.get("ending_date")
+        fallback_date = start_date if educational_status == ServicePeriodStatus.ACTIVE else None
+        status_change_date = get_date(enrollment.get("updated_at", fallback_date))
 
-            educational_status = map_educational_status(
-                enrollment.get("educational_status"))
+        self._process_period(
+            contract_id=contract_id,
+            cohort_slug=cohort_slug,
+            start_date=start_date,
+            end_date=end_date,
+            status=educational_status,
+            status_change_date=status_change_date
+        )
 
-            fallback_date = start_date if educational_status == ServicePeriodStatus.ACTIVE else None
-            status_change_date = get_date(enrollment.get("updated_at", fallback_date))
+    def _log_enrollment_error(self, e: Exception, enrollment: dict, contract_id: int):
+        cohort_slug = (enrollment.get("cohort") or {}).get("slug")
+        self.stats["errors"] += 1
+        error_msg = log_enrollment_error(e, cohort_slug, contract_id)
+        self.stats["error_details"].append(error_msg)
 
-            self._process_period(
+        # Log to integration errors table
+        try:
+            log_integration_error(
+                integration_name="fourgeeks",
+                operation_type="enrollment",
+                external_id=cohort_slug,
+                entity_type="cohort",
+                error_message=str(e),
+                error_details={"contract_id": contract_id, "enrollment_data": enrollment},
                 contract_id=contract_id,
-                cohort_slug=cohort_slug,
-                start_date=start_date,
-                end_date=end_date,
-                status=educational_status,
-                status_change_date=status_change_date
+                db=self.client_service.db
             )
-
-        except Exception as e:
-            self.stats["errors"] += 1
-            error_msg = log_enrollment_error(e, cohort_slug, contract_id)
-            self.stats["error_details"].append(error_msg)
-            
-            # Log to integration errors table
-            try:
-                log_integration_error(
-                    integration_name="fourgeeks",
-                    operation_type="enrollment",
-                    external_id=cohort_slug,
-                    entity_type="cohort",
-                    error_message=str(e),
-                    error_details={"contract_id": contract_id, "enrollment_data": enrollment},
-                    contract_id=contract_id,
-                    db=self.client_service.db
-                )
-            except Exception as log_error:
-                logger.error(f"Failed to log integration error: {log_error}")
-            
-            self.client_service.db.rollback()
+        except Exception as log_error:
+            logger.error(f"Failed to log integration error: {log_error}")
+
+        self.client_service.db.rollback()
+
+    def _preload_contracts(self, contract_ids: List[int]):
+        """Load the contracts with their services and periods"""
+        self._clear_batch_cache()
+        for contract in self.contract_service.get_contracts_with_services(contract_ids):
+            self._contracts[contract.id] = contract
+        for period in self.period_service.get_periods_by_contracts(contract_ids):
+            # Same as get_period_by_external_id, the first period wins
+            self._periods.setdefault(
+                (period.contract_id, period.external_id), period)
+
+    def _clear_batch_cache(self):
+        self._contracts.clear()
+        self._periods.clear()
+
+    def _get_contract(self, contract_id: int) -> Optional[ServiceContract]:
+        if contract_id in self._contracts:
+            return self._contracts[contract_id]
+        return self.contract_service.get_contract(contract_id)
+
+    def _get_period(self, contract_id: int, cohort_slug: str) -> Optional[ServicePeriod]:
+        if contract_id in self._contracts:
+            return self._periods.get((contract_id, cohort_slug))
+        return self.period_service.get_period_by_external_id(contract_id, cohort_slug)
+
+    def _get_cohort_service_type(self, cohort_slug: str) -> str:
+        if cohort_slug not in self._cohort_service_types:
+            self._cohort_service_types[cohort_slug] = get_service_type_from_service_period_name(
+                cohort_slug)
+        return self._cohort_service_types[cohort_slug]
 
     def _validate_enrollment(self, cohort: dict) -> bool:
         cohort_slug = cohort.get("slug")
@@ -117,7 +207,7 @@ class EnrollmentProcessor:
         """
         try:
             # Get the service contract and its service
-            contract = self.contract_service.get_contract(contract_id)
+            contract = self._get_contract(contract_id)
             if not contract:
                 self.stats["error_details"].append(
                     f"Contract {contract_id} not found for cohort {cohort_slug}"
@@ -125,7 +215,7 @@ class EnrollmentProcessor:
                 self.stats["compatibility_errors"] += 1
                 return False
 
-            service = self.service_service.get_service(contract.service_id)
+            service = contract.service
             if not service:
                 self.stats["error_details"].append(
                     f"Service {contract.service_id} not found for contract {contract_id}"
@@ -134,11 +224,11 @@ class EnrollmentProcessor:
                 return False
 
             # Get program types
-            cohort_service_type = get_service_type_from_service_period_name(cohort_slug)
+            cohort_service_type = self._get_cohort_service_type(cohort_slug)
             service_service_type = service.computed_service_type
 
-            # Validate compatibility
-            if not validate_service_period_compatibility(cohort_slug, service_service_type):
+            # Validate compatibility, same as validate_service_period_compatibility
+            if cohort_service_type != service_service_type:
                 error_msg = (
                     f"Cohort-Service compatibility error: "
                     f"Cohort '{cohort_slug}' (program: {cohort_service_type}) "
@@ -173,13 +263,12 @@ class EnrollmentProcessor:
         end_date: str,
         status: ServicePeriodStatus
     ):
-        existing_period = self.period_service.get_period_by_external_id(
-            contract_id, cohort_slug
-        )
+        """Add the created or updated period to the session"""
+        existing_period = self._get_period(contract_id, cohort_slug)
 
         if existing_period:
-            self.period_service.update_period_status(
-                existing_period.id,
+            self.period_service.set_period_status(
+                existing_period,
                 status,
                 status_change_date
             )
@@ -195,12 +284,14 @@ class EnrollmentProcessor:
                 status=status,
                 status_change_date=status_change_date
             )
-            self.period_service.create_period(period_data)
+            period = self.period_service.add_period(period_data)
+            if contract_id in self._contracts:
+                self._periods[(contract_id, cohort_slug)] = period
             self.stats["created"] += 1
 
 
 class StudentProcessor:
-    def __init__(self, client_service: ClientService, fourgeeks_client: FourGeeksClient):
+    def __init__(self, client_service: ClientService, fourgeeks_client: FourGeeksClient | AsyncFourGeeksClient):
         self.client_service = client_service
         self.fourgeeks_client = fourgeeks_client
         self.stats = {
@@ -268,7 +359,35 @@ class StudentProcessor:
                 roles=["student", "assistant"],
                 academy_id=academy_id
             )
+            return self._link_student(client_id, client_identifier, students_response)
 
+        except Exception as e:
+            return None, self._student_error_message(client_id, e)
+
+    async def find_and_link_student_async(self,
+                                          client_id: int,
+                                          client_identifier: str,
+                                          academy_id: int = 6
+                                          ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Same as find_and_link_student, for an AsyncFourGeeksClient.
+        Several students can be searched concurrently.
+        """
+        try:
+            students_response = await self.fourgeeks_client.get_member_by_email(
+                email=client_identifier,
+                roles=["student", "assistant"],
+                academy_id=academy_id
+            )
+            return self._link_student(client_id, client_identifier, students_response)
+
+        except Exception as e:
+            return None, self._student_error_message(client_id, e)
+
+    def _link_student(self, client_id: int, client_identifier: str,
+                      students_response: list | dict | None) -> tuple[Optional[str], Optional[str]]:
+        """Link the student found in the 4Geeks API response to the client"""
+        try:
             if not students_response:
                 logger.warning(
                     f"No 4Geeks student found for client {client_id}")
@@ -302,8 +421,11 @@ class StudentProcessor:
             return str(student_user_id), None
 
         except Exception as e:
-            error_msg = f"FourGeeksClient error on Client {client_id}: {str(e)}"
-            logger.error(error_msg)
-            # Consider if specific exceptions need different handling
-            # E.g., API connection errors vs. data validation errors
-            return None, error_msg
+            return None, self._student_error_message(client_id, e)
+
+    def _student_error_message(self, client_id: int, error: Exception) -> str:
+        error_msg = f"FourGeeksClient error on Client {client_id}: {str(error)}"
+        logger.error(error_msg)
+        # Consider if specific exceptions need different handling
+        # E.g., API connection errors vs. data validation errors
+        return error_msg
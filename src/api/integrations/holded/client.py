@@ -1,18 +1,33 @@
+import asyncio
 import logging
 import httpx
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import HTTPException
+from src.api.common.utils.http_clients import create_async_client, get_async_client
 from src.api.integrations.holded.config import HoldedConfig
 
+# Holded returns at most 500 documents per request
+DOCUMENTS_PAGE_SIZE = 500
+CONTACTS_PAGE_SIZE = 500
+
 
 class HoldedClient:
-    def __init__(self, config: HoldedConfig):
+    def __init__(self, config: HoldedConfig, http_client: Optional[httpx.AsyncClient] = None):
         self.config = config
         self.headers = {
             "key": config.api_key,
             "Content-Type": "application/json"
         }
-        self._client = httpx.AsyncClient()
+        # Reuse the application-scoped connection pool when available
+        self._client = http_client or get_async_client()
+        self._owns_client = self._client is None
+        if self._owns_client:
+            self._client = create_async_client()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client, unless it is shared"""
+        if self._owns_client:
+            await self._client.aclose()
 
     async def list_contacts(self, page: int = 1, per_page: int = 50) -> Dict:
         """
@@ -26,14 +41,13 @@ class HoldedClient:
             Dict containing the contacts data
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.config.base_url}/contacts",
-                    headers=self.headers,
-                    params={"page": page, "per_page": per_page}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.get(
+                f"{self.config.base_url}/contacts",
+                headers=self.headers,
+                params={"page": page, "per_page": per_page}
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logging.error(
                 f"HTTP error occurred in HoldedClient list_contacts: {e}")
@@ -44,6 +58,34 @@ class HoldedClient:
             raise HTTPException(
                 status_code=500, detail=f"Error occurred in HoldedClient list_contacts: {e}")
 
+    async def iter_contacts(self, per_page: int = CONTACTS_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """
+        Iterate over all the pages of contacts from Holded.
+
+        Args:
+            per_page: Number of items per page
+
+        Yields:
+            List of contacts of each page
+        """
+        page = 1
+        seen_ids = set()
+        while True:
+            contacts = await self.list_contacts(page=page, per_page=per_page)
+
+            # Stop if the page only repeats contacts (pagination not applied)
+            contacts = [
+                contact for contact in contacts if contact.get("id") not in seen_ids]
+            if not contacts:
+                break
+            seen_ids.update(contact.get("id") for contact in contacts)
+            yield contacts
+
+            # A short page is the last one
+            if len(contacts) < per_page:
+                break
+            page += 1
+
     async def get_contact(self, contact_id: str) -> Dict:
         """
         Get a specific contact by ID.
@@ -184,6 +226,88 @@ class HoldedClient:
             raise HTTPException(
                 status_code=500, detail=f"Error occurred in HoldedClient list_documents: {e}")
 
+    async def iter_documents(self, document_type: str = "invoice", starttmp: int = None, endtmp: int = None,
+                             per_page: int = DOCUMENTS_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """
+        Iterate over all the pages of documents from Holded.
+        The next page is requested while the current one is being processed.
+
+        Args:
+            document_type: The type of document to retrieve.
+            starttmp: Starting timestamp
+            endtmp: Ending timestamp
+            per_page: Number of items per page
+
+        Yields:
+            List of documents of each page
+        """
+        page = 1
+        seen_ids = set()
+        next_page = asyncio.create_task(self.list_documents(
+            document_type=document_type, page=page, per_page=per_page, starttmp=starttmp, endtmp=endtmp))
+        try:
+            while next_page:
+                documents = await next_page
+                next_page = None
+
+                # Stop if the page only repeats documents (pagination not applied)
+                documents = [
+                    document for document in documents if document.get("id") not in seen_ids]
+                if not documents:
+                    break
+                seen_ids.update(document.get("id") for document in documents)
+
+                # A full page means there may be more documents
+                if len(documents) >= per_page:
+                    page += 1
+                    next_page = asyncio.create_task(self.list_documents(
+                        document_type=document_type, page=page, per_page=per_page, starttmp=starttmp, endtmp=endtmp))
+
+                yield documents
+        finally:
+            if next_page:
+                next_page.cancel()
+
+    async def iter_documents_concurrently(self, document_types: List[str], starttmp: int = None,
+                                          endtmp: int = None) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        Fetch the pages of several document types concurrently.
+
+        Pages are yielded grouped by type, in the order of document_types, while
+        the pages of the following types are fetched in the background.
+
+        Args:
+            document_types: The types of document to retrieve.
+            starttmp: Starting timestamp
+            endtmp: Ending timestamp
+
+        Yields:
+            Tuples of document type and list of documents of each page
+        """
+        queues = {document_type: asyncio.Queue() for document_type in document_types}
+
+        async def fetch(document_type: str):
+            queue = queues[document_type]
+            try:
+                async for documents in self.iter_documents(document_type, starttmp=starttmp, endtmp=endtmp):
+                    await queue.put(documents)
+            except Exception as e:
+                await queue.put(e)
+                return
+            await queue.put(None)
+
+        fetchers = [asyncio.create_task(fetch(document_type))
+                    for document_type in document_types]
+        try:
+            for document_type in document_types:
+                while (documents := await queues[document_type].get()) is not None:
+                    if isinstance(documents, Exception):
+                        raise documents
+                    yield document_type, documents
+        finally:
+            for fetcher in fetchers:
+                fetcher.cancel()
+
     async def get_document(self, document_id: str) -> Dict:
         """
         Get a specific document by ID.
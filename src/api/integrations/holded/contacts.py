@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Union
+from src.api.integrations.holded.client import HoldedClient
+
+
+class HoldedContactCache:
+    """
+    Contacts of a sync run, so each contact is requested to Holded at most once.
+
+    The cache can be filled upfront with all the contacts (prefetch), otherwise
+    contacts are requested one by one the first time they are needed.
+    """
+
+    def __init__(self, holded_client: HoldedClient):
+        self.holded_client = holded_client
+        self._contacts: Dict[str, Optional[Dict]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.prefetched = False
+        self.requested_count = 0
+
+    async def prefetch(self) -> int:
+        """
+        Load all the contacts from Holded, page by page.
+
+        Returns:
+            Number of contacts loaded
+        """
+        async for contacts in self.holded_client.iter_contacts():
+            for contact in contacts:
+                self._contacts[contact.get("id")] = contact
+        self.prefetched = True
+        return len(self._contacts)
+
+    async def get(self, contact_id: str) -> Optional[Dict]:
+        """Get a contact, requesting it to Holded if it is not cached"""
+        if contact_id in self._contacts:
+            return self._contacts[contact_id]
+        # Concurrent lookups of the same contact share the request
+        if contact_id not in self._pending:
+            self._pending[contact_id] = asyncio.create_task(
+                self._request(contact_id))
+        return await self._pending[contact_id]
+
+    async def get_many(self, contact_ids: Iterable[str]) -> Dict[str, Union[Dict, None, Exception]]:
+        """
+        Get several contacts, requesting the missing ones concurrently.
+
+        Returns:
+            Dictionary mapping each contact ID to its contact, None if it does not
+            exist, or the exception raised while requesting it
+        """
+        contact_ids = list(dict.fromkeys(contact_ids))
+        contacts = await asyncio.gather(*(self.get(contact_id) for contact_id in contact_ids),
+                                        return_exceptions=True)
+        return dict(zip(contact_ids, contacts))
+
+    async def _request(self, contact_id: str) -> Optional[Dict]:
+        try:
+            self.requested_count += 1
+            try:
+                contact = await self.holded_client.get_contact(contact_id)
+            except Exception as e:
+                # Not cached, so a later lookup retries it
+                logging.error(f"Error getting contact {contact_id}: {e}")
+                raise
+            self._contacts[contact_id] = contact or None
+            return self._contacts[contact_id]
+        finally:
+            self._pending.pop(contact_id, None)
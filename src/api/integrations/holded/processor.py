@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi.logger import logger
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from src.api.accruals.models.contract_accrual import ContractAccrualStatus
+from src.api.clients.models.client import Client
+from src.api.common.constants.services import ServiceContractStatus
+from src.api.common.utils.datetime import get_current_datetime
+from src.api.invoices.models.invoice import Invoice
+from src.api.invoices.schemas.invoice import InvoiceCreate
+from src.api.services.models.service_contract import ServiceContract
+from src.api.services.services.service_catalogue import ServiceCatalogue
+from src.api.services.services.service_contract import ServiceContractService
+
+
+def is_credit_note(document: dict) -> bool:
+    return document.get("docNumber").startswith("CN") and document.get("from", {}).get("docType", "") == "invoice"
+
+
+def get_invoice_data(document: dict, client: Optional[Client]) -> InvoiceCreate:
+    """Map a Holded document to the invoice to create"""
+    # Convert to datetime as needed
+    invoice_date = datetime.fromtimestamp(
+        document.get("date")).date()
+    due_date = datetime.fromtimestamp(document.get(
+        "dueDate")).date() if document.get("dueDate") else None
+
+    return InvoiceCreate(
+        external_id=document.get("id"),
+        client_id=client.id if client else None,
+        invoice_number=document.get("docNumber", ""),
+        invoice_date=invoice_date,
+        due_date=due_date,
+        total_amount=document.get("total", 0.0),
+        currency=document.get("currency", "EUR"),
+        status=document.get("status", "pending")
+    )
+
+
+def get_service_account(document: dict) -> Optional[str]:
+    """Get the account identifier of the first product of a Holded document"""
+    try:
+        return document.get("products")[0].get("account")
+    except Exception as e:
+        logger.error(
+            f"Error getting service from products: {e}")
+        return None
+
+
+@dataclass
+class DocumentImportResult:
+    document: dict
+    # "created", "updated", "skipped" or "error"
+    status: str
+    client: Optional[Client] = None
+    error: Optional[str] = None
+
+
+class HoldedDocumentsProcessor:
+    """
+    Imports a page of Holded documents (invoices and credit notes) in a single transaction.
+
+    Existing invoices and contracts of the page are prefetched by key, services
+    are resolved with the service catalogue, the changes are built in memory and
+    new invoices are written with a bulk INSERT ... ON CONFLICT (external_id).
+    """
+
+    def __init__(self, db: Session, service_catalogue: Optional[ServiceCatalogue] = None):
+        self.db = db
+        self.contract_service = ServiceContractService(db)
+        self.service_catalogue = service_catalogue or ServiceCatalogue(db).load()
+
+    def process_page(self, documents: List[dict], clients_by_contact: Dict[str, Client]) -> List[DocumentImportResult]:
+        """
+        Import the documents of a page.
+
+        Args:
+            documents: Holded documents, processed in order
+            clients_by_contact: Local clients by Holded contact ID
+
+        Returns:
+            Result of each document, in order
+
+        Raises:
+            Exception: If the page could not be written; nothing is committed then
+        """
+        try:
+            results = self._process_page(documents, clients_by_contact)
+            self.db.commit()
+            return results
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _process_page(self, documents: List[dict], clients_by_contact: Dict[str, Client]) -> List[DocumentImportResult]:
+        invoices = self._get_invoices_by_external_id(
+            document.get("id") for document in documents)
+        service_ids = {document.get("id"): self.service_catalogue.get_service_id(get_service_account(document))
+                       for document in documents}
+        page_clients = [clients_by_contact[document.get("contact")] for document in documents
+                        if document.get("contact") in clients_by_contact]
+        contracts = self._get_contracts_by_client_and_service(
+            list({client.id for client in page_clients}),
+            list({service_id for service_id in service_ids.values() if service_id})
+        )
+
+        results = []
+        new_invoices: Dict[str, dict] = {}
+        invoice_contracts: Dict[str, ServiceContract] = {}
+        for document in documents:
+            document_id = document.get("id")
+            client = clients_by_contact.get(document.get("contact"))
+            if client is None:
+                results.append(DocumentImportResult(
+                    document, "error", error=f"Client not found for contact {document.get('contact')}"))
+                continue
+
+            new_amount = 0
+            invoice_was_created = False
+            invoice = invoices.get(document_id)
+            if invoice is None and document_id in new_invoices:
+                invoice = InvoiceCreate(**new_invoices[document_id])
+            elif invoice is None:
+                # If the document is a credit note, we need to negate the total amount
+                if is_credit_note(document):
+                    document["total"] = -abs(float(document.get("total", 0)))
+                invoice = get_invoice_data(document, client)
+                new_invoices[document_id] = invoice.model_dump()
+                new_amount = invoice.total_amount
+                invoice_was_created = True
+
+            service_id = service_ids.get(document_id)
+            if not service_id:
+                logger.info(
+                    f"Service not found. Skipping document_id: {document_id}")
+                results.append(DocumentImportResult(document, "skipped", client))
+                continue
+
+            contract = contracts.get((client.id, service_id))
+            if not contract:
+                # The contract starts with its first invoice
+                contract = ServiceContract(
+                    client_id=client.id,
+                    service_id=service_id,
+                    contract_date=invoice.invoice_date,
+                    contract_amount=invoice.total_amount,
+                    contract_currency="EUR",
+                    status=ServiceContractStatus.ACTIVE
+                )
+                self.db.add(contract)
+                contracts[(client.id, service_id)] = contract
+            else:
+                self._update_contract(contract, new_amount)
+
+            invoice_contracts[document_id] = contract
+            results.append(DocumentImportResult(
+                document, "created" if invoice_was_created else "updated", client))
+
+        # New contracts need their IDs before the invoices are linked to them
+        self.db.flush()
+        for document_id, contract in invoice_contracts.items():
+            if document_id in new_invoices:
+                new_invoices[document_id]["service_contract_id"] = contract.id
+            else:
+                invoices[document_id].service_contract_id = contract.id
+                self.db.add(invoices[document_id])
+
+        self._upsert_invoices(list(new_invoices.values()))
+        return results
+
+    def _update_contract(self, contract: ServiceContract, new_amount: float):
+        if new_amount != 0:
+            self.contract_service.add_contract_amount(contract, new_amount)
+        if round(contract.contract_amount, 0) > 0 and contract.status != ServiceContractStatus.ACTIVE:
+            self.contract_service.set_contract_status(
+                contract, ServiceContractStatus.ACTIVE)
+        elif round(contract.contract_amount, 0) == 0 and contract.status == ServiceContractStatus.ACTIVE:
+            self.contract_service.set_contract_status(
+                contract, ServiceContractStatus.CANCELED)
+
+        # Reactivate completed accrual when new invoices arrive
+        contract_accrual = contract.contract_accrual
+        if contract_accrual and contract_accrual.accrual_status == ContractAccrualStatus.COMPLETED and new_amount != 0:
+            contract_accrual.accrual_status = ContractAccrualStatus.ACTIVE
+            contract_accrual.total_amount_to_accrue += new_amount
+            contract_accrual.remaining_amount_to_accrue += new_amount
+            self.db.add(contract_accrual)
+
+    def _upsert_invoices(self, rows: List[dict]):
+        """Insert the new invoices, linking them to their contract if another run created them meanwhile"""
+        if not rows:
+            return
+
+        now = get_current_datetime()
+        for row in rows:
+            row["created_at"] = now
+            row["updated_at"] = now
+
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(Invoice).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Invoice.external_id],
+            set_={
+                "service_contract_id": statement.excluded.service_contract_id,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        self.db.execute(statement)
+
+    def _get_invoices_by_external_id(self, external_ids: Iterable[str]) -> Dict[str, Invoice]:
+        external_ids = {external_id for external_id in external_ids if external_id}
+        if not external_ids:
+            return {}
+        invoices = self.db.exec(
+            select(Invoice).where(Invoice.external_id.in_(external_ids))).all()
+        return {invoice.external_id: invoice for invoice in invoices}
+
+    def _get_contracts_by_client_and_service(self, client_ids: List[int], service_ids: List[int]) -> Dict[Tuple[int, int], ServiceContract]:
+        if not client_ids or not service_ids:
+            return {}
+        contracts = self.db.exec(
+            select(ServiceContract)
+            .where(ServiceContract.client_id.in_(client_ids), ServiceContract.service_id.in_(service_ids))
+            .order_by(ServiceContract.id)
+        ).all()
+        # Same as get_service_contract_by_client_and_service, the first contract wins
+        contracts_by_key = {}
+        for contract in contracts:
+            contracts_by_key.setdefault(
+                (contract.client_id, contract.service_id), contract)
+        return contracts_by_key
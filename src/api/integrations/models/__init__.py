@@ -1,3 +1,4 @@
 from .integration_error import IntegrationError
+from .integration_sync_state import IntegrationSyncState
 
-__all__ = ["IntegrationError"]
+__all__ = ["IntegrationError", "IntegrationSyncState"]
@@ -0,0 +1,26 @@
+from typing import Optional
+from sqlalchemy import BigInteger, UniqueConstraint
+from sqlmodel import Field
+from src.api.common.models.base import BaseModel, TimestampMixin
+
+
+class IntegrationSyncState(BaseModel, TimestampMixin, table=True):
+    """
+    Watermark of the last successful import of a resource from an integration,
+    used by incremental syncs to request only newer data.
+    """
+    __table_args__ = (
+        UniqueConstraint("integration_name", "resource",
+                         name="uq_integrationsyncstate_integration_resource"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    integration_name: str = Field(nullable=False, description="Name of the integration (e.g., 'holded')")
+    resource: str = Field(nullable=False, description="Synced resource (e.g., 'documents')")
+    # Unix timestamp of the most recent successfully imported item
+    last_synced_timestamp: Optional[int] = Field(default=None, sa_type=BigInteger)
+    # External ID of the last imported item at last_synced_timestamp
+    cursor: Optional[str] = Field(default=None)
+
+    class Config:
+        from_attributes = True
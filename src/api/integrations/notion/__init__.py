@@ -1,6 +1,6 @@
 from .client import NotionClient
 from .config import NotionConfig
-from .utils import is_educational_status_ended, is_educational_status_dropped, categorize_educational_status, get_client_educational_data
+from .utils import is_educational_status_ended, is_educational_status_dropped, categorize_educational_status, get_client_educational_data, EducationalStatusSnapshot, load_educational_status_snapshot
 
 __all__ = [
     "NotionClient", 
@@ -8,5 +8,7 @@ __all__ = [
     "is_educational_status_ended",
     "is_educational_status_dropped", 
     "categorize_educational_status",
-    "get_client_educational_data"
+    "get_client_educational_data",
+    "EducationalStatusSnapshot",
+    "load_educational_status_snapshot"
 ] 
\ No newline at end of file
@@ -1,11 +1,16 @@
 import logging
 import httpx
+from typing import Optional
 from fastapi import HTTPException
+from src.api.common.utils.http_clients import create_async_client, get_async_client
 from .config import NotionConfig
 
+# Database queries are read-only, so they can be retried like GET requests
+QUERY_EXTENSIONS = {"idempotent": True}
+
 
 class NotionClient:
-    def __init__(self, config: NotionConfig):
+    def __init__(self, config: NotionConfig, http_client: Optional[httpx.AsyncClient] = None):
         self.config = config
         self.headers = {
             "Authorization": f"Bearer {config.access_token}",
@@ -13,7 +18,16 @@ class NotionClient:
             "Content-Type": "application/json"
         }
         self.base_url = config.base_url
-        self._client = httpx.AsyncClient()
+        # Reuse the application-scoped connection pool when available
+        self._client = http_client or get_async_client()
+        self._owns_client = self._client is None
+        if self._owns_client:
+            self._client = create_async_client()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client, unless it is shared"""
+        if self._owns_client:
+            await self._client.aclose()
 
     async def get_current_user(self):
         try:
@@ -43,7 +57,7 @@ class NotionClient:
             }
         payload = {"filter": filter_payload}
         try:
-            response = await self._client.post(url, headers=self.headers, json=payload)
+            response = await self._client.post(url, headers=self.headers, json=payload, extensions=QUERY_EXTENSIONS)
             response.raise_for_status()
             data = response.json()
             results = data.get("results", [])
@@ -89,7 +103,7 @@ class NotionClient:
             }
         payload = {"filter": filter_payload}
         try:
-            response = await self._client.post(url, headers=self.headers, json=payload)
+            response = await self._client.post(url, headers=self.headers, json=payload, extensions=QUERY_EXTENSIONS)
             response.raise_for_status()
             data = response.json()
             results = data.get("results", [])
@@ -128,7 +142,7 @@ class NotionClient:
                     }]
                 if next_cursor:
                     payload["start_cursor"] = next_cursor
-                response = await self._client.post(url, headers=self.headers, json=payload)
+                response = await self._client.post(url, headers=self.headers, json=payload, extensions=QUERY_EXTENSIONS)
                 response.raise_for_status()
                 data = response.json()
                 results = data.get("results", [])
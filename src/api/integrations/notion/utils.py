@@ -4,7 +4,7 @@ Notion integration utilities for educational status validation and processing.
 This module contains business logic specific to Notion educational statuses
 and their mapping to contract processing outcomes.
 """
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import date
 from fastapi.logger import logger
 
@@ -71,25 +71,45 @@ async def get_client_educational_data(client) -> Optional[Dict]:
     notion_config = NotionConfig()
     notion_client = NotionClient(notion_config)
     try:
-        page = await notion_client.get_page_content(client.get_external_id('notion'))
-    except Exception as e:
+        # Skip the lookups that cannot match, they would only spend the Notion rate limit
         page = None
+        notion_page_id = client.get_external_id('notion')
+        if notion_page_id:
+            try:
+                page = await notion_client.get_page_content(notion_page_id)
+            except Exception as e:
+                page = None
 
-    if not page:
-        try:
-            page = await notion_client.get_page_by_email(
-                database_id=notion_config.database_id, 
-                property_name="Email", 
-                value=client.identifier
-            )
-        except Exception as e:
-            print('get_client_educational_data_error', e)
-            logger.warning(f"Failed to check client {client.id} in Notion: {str(e)}")
-            return None
+        if not page and notion_config.database_id:
+            try:
+                page = await notion_client.get_page_by_email(
+                    database_id=notion_config.database_id, 
+                    property_name="Email", 
+                    value=client.identifier
+                )
+            except Exception as e:
+                print('get_client_educational_data_error', e)
+                logger.warning(f"Failed to check client {client.id} in Notion: {str(e)}")
+                return None
+    finally:
+        await notion_client.aclose()
 
     if not page:
         return None
 
+    return parse_educational_data(page)
+
+
+def parse_educational_data(page: Dict) -> Dict:
+    """
+    Extract educational data from a Notion student page.
+    
+    Args:
+        page: Notion page object with its properties
+        
+    Returns:
+        Dictionary with educational_status and status_change_date
+    """
     # Parse Notion page properties
     properties = page.get('properties', {})
     
@@ -114,4 +134,80 @@ async def get_client_educational_data(client) -> Optional[Dict]:
     return {
         'educational_status': educational_status,
         'status_change_date': status_change_date
-    } 
\ No newline at end of file
+    } 
+
+
+class EducationalStatusSnapshot:
+    """
+    In-memory snapshot of the Notion student database.
+    
+    Resolves clients the same way as get_client_educational_data (Notion page ID
+    first, then email) without issuing a request per client.
+    """
+
+    def __init__(self, pages: List[Dict]):
+        self._by_page_id: Dict[str, Dict] = {}
+        self._by_email: Dict[str, Dict] = {}
+        for page in pages:
+            educational_data = parse_educational_data(page)
+            if page.get('id'):
+                self._by_page_id[_normalize_page_id(page['id'])] = educational_data
+            email = (page.get('properties', {}).get('Email') or {}).get('email')
+            if email:
+                # Keep the first match, as the email query does
+                self._by_email.setdefault(email, educational_data)
+
+    def __len__(self) -> int:
+        return len(self._by_page_id)
+
+    def get(self, client) -> Optional[Dict]:
+        """
+        Get educational data for a client.
+        
+        Args:
+            client: Client object with identifier and external_id methods
+            
+        Returns:
+            Dictionary with educational_status and status_change_date, or None if not found
+        """
+        page_id = client.get_external_id('notion')
+        if page_id and _normalize_page_id(page_id) in self._by_page_id:
+            return self._by_page_id[_normalize_page_id(page_id)]
+        return self._by_email.get(client.identifier)
+
+
+def _normalize_page_id(page_id: str) -> str:
+    """Notion page IDs are accepted with or without dashes."""
+    return page_id.replace('-', '').lower()
+
+
+async def load_educational_status_snapshot() -> Optional[EducationalStatusSnapshot]:
+    """
+    Fetch the whole Notion student database with paginated queries.
+    
+    Returns:
+        EducationalStatusSnapshot, or None if the database is not configured or
+        no pages could be fetched
+    """
+    from .config import NotionConfig
+    from .client import NotionClient
+
+    notion_config = NotionConfig()
+    if not notion_config.database_id:
+        return None
+
+    notion_client = NotionClient(notion_config)
+    try:
+        # No sorting needed, the snapshot is keyed by page ID and email
+        pages = await notion_client.list_pages(notion_config.database_id, date_property=None)
+    except Exception as e:
+        logger.warning(f"Failed to fetch Notion educational status snapshot: {str(e)}")
+        return None
+    finally:
+        await notion_client.aclose()
+
+    if not pages:
+        return None
+
+    logger.info(f"Loaded Notion educational status snapshot with {len(pages)} pages")
+    return EducationalStatusSnapshot(pages)
@@ -1,3 +1,4 @@
 from .integration_error_service import IntegrationErrorService
+from .integration_sync_state_service import IntegrationSyncStateService
 
-__all__ = ["IntegrationErrorService"]
+__all__ = ["IntegrationErrorService", "IntegrationSyncStateService"]
@@ -0,0 +1,43 @@
+from typing import Optional
+from sqlmodel import Session, select
+from src.api.integrations.models.integration_sync_state import IntegrationSyncState
+from src.api.common.utils.datetime import get_current_datetime
+
+
+class IntegrationSyncStateService:
+    """Service class for managing the watermarks of incremental syncs"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_state(self, integration_name: str, resource: str) -> Optional[IntegrationSyncState]:
+        """Get the sync state of a resource, or None if it was never synced"""
+        return self.db.exec(
+            select(IntegrationSyncState).where(
+                IntegrationSyncState.integration_name == integration_name,
+                IntegrationSyncState.resource == resource
+            )
+        ).first()
+
+    def update_watermark(self, integration_name: str, resource: str,
+                         last_synced_timestamp: int, cursor: Optional[str] = None) -> IntegrationSyncState:
+        """
+        Record the last successfully imported item of a resource.
+
+        The watermark never moves backwards, so a run over an older window
+        does not make the next incremental run fetch data again.
+        """
+        state = self.get_state(integration_name, resource)
+        if state is None:
+            state = IntegrationSyncState(
+                integration_name=integration_name, resource=resource)
+            self.db.add(state)
+        elif state.last_synced_timestamp is not None and last_synced_timestamp < state.last_synced_timestamp:
+            return state
+
+        state.last_synced_timestamp = last_synced_timestamp
+        state.cursor = cursor
+        state.updated_at = get_current_datetime()
+        self.db.commit()
+        self.db.refresh(state)
+        return state
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the monthly accrual rollup from the accrued periods
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from sqlmodel import Session
+from src.api.common.utils.database import engine
+from src.api.accruals.services.accrual_rollup_service import AccrualRollupService
+
+# Import all models to avoid circular import issues
+from src.api.services.models import service, service_contract, service_period
+from src.api.clients.models import client
+from src.api.accruals.models import accrued_period, contract_accrual, accrual_monthly_rollup
+from src.api.invoices.models import invoice
+
+
+def rebuild_accrual_rollup():
+    """
+    Rebuild the monthly accrual rollup (month x service x contract status)
+    """
+    print("🔧 Rebuilding monthly accrual rollup...")
+
+    with Session(engine) as db:
+        rows_count = AccrualRollupService(db).rebuild()
+
+    print(f"💾 Rebuilt monthly accrual rollup with {rows_count} rows")
+
+
+if __name__ == "__main__":
+    rebuild_accrual_rollup()
@@ -84,4 +84,4 @@ def get_active_contracts_by_date(
     service_service: ServiceContractService = Depends(get_service_contract_service)
 ):
     """Get all active contracts on a specific date"""
-    return service_service.get_active_contracts_by_date(target_date)
+    return service_service.get_active_contracts(target_date)
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING, List
 from datetime import date
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 from src.api.common.models.base import BaseModel, TimestampMixin
 from src.api.common.constants.services import ServiceContractStatus
@@ -15,6 +16,10 @@ class ServiceContract(BaseModel, TimestampMixin, table=True):
     """
     Model to store client contracts for services
     """
+    __table_args__ = (
+        Index("ix_servicecontract_client_id_status", "client_id", "status"),
+    )
+
     id: int = Field(default=None, primary_key=True)
 
     # Service relationship
@@ -1,4 +1,5 @@
 from src.api.services.services.service_service import ServiceService
 from src.api.services.services.service_period_service import ServicePeriodService
 from src.api.services.services.service_contract import ServiceContractService
-__all__ = ["ServiceService", "ServicePeriodService", "ServiceContractService"] 
\ No newline at end of file
+from src.api.services.services.service_catalogue import ServiceCatalogue
+__all__ = ["ServiceService", "ServicePeriodService", "ServiceContractService", "ServiceCatalogue"] 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import threading
+from typing import Dict, Optional
+from sqlmodel import Session, select
+from src.api.services.models.service import Service
+
+# Incremented whenever a service is created, updated or deleted
+_catalogue_version = 0
+_catalogue_version_lock = threading.Lock()
+
+
+def get_service_catalogue_version() -> int:
+    """Get the current version of the services"""
+    return _catalogue_version
+
+
+def invalidate_service_catalogue() -> None:
+    """Mark the loaded service catalogues as stale, so they are reloaded on their next lookup"""
+    global _catalogue_version
+    with _catalogue_version_lock:
+        _catalogue_version += 1
+
+
+class ServiceCatalogue:
+    """
+    In-memory lookup of service IDs by external ID (the Holded income account).
+
+    It is loaded once per sync and reloaded on the next lookup after a service
+    is created, updated or deleted.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.version: Optional[int] = None
+        self._service_ids: Dict[str, int] = {}
+
+    def load(self) -> "ServiceCatalogue":
+        """Load the services from the database"""
+        # Read the version first, so changes made while loading trigger a reload
+        version = get_service_catalogue_version()
+        rows = self.db.exec(
+            select(Service.external_id, Service.id).where(Service.external_id.is_not(None))).all()
+        self._service_ids = {external_id: service_id for external_id, service_id in rows}
+        self.version = version
+        return self
+
+    def get_service_id(self, external_id: Optional[str]) -> Optional[int]:
+        """Get the ID of the service with an external ID, or None if there is no such service"""
+        if self.version != get_service_catalogue_version():
+            self.load()
+        return self._service_ids.get(external_id) if external_id else None
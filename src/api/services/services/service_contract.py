@@ -1,11 +1,18 @@
 from src.api.services.models.service import Service  #  noqa
 from datetime import date
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from src.api.clients.models.client import Client
 from src.api.common.constants.services import ServiceContractStatus
 from src.api.invoices.schemas.invoice import InvoiceBase
 from src.api.services.models.service_contract import ServiceContract
+from src.api.services.models.service_period import ServicePeriod
 from src.api.services.schemas.service_contract import ServiceContractCreate, ServiceContractUpdate
+from src.api.accruals.services.accrual_rollup_service import AccrualRollupService
+
+# Contracts loaded per query when streaming active contracts
+ACTIVE_CONTRACTS_CHUNK_SIZE = 500
 
 
 class ServiceContractService:
@@ -32,6 +39,16 @@ class ServiceContractService:
         """Get an contract by ID"""
         return self.db.get(ServiceContract, contract_id)
 
+    def get_contracts_with_services(self, contract_ids: List[int]) -> List[ServiceContract]:
+        """Get several contracts by ID, loading their services in the same round-trip"""
+        if not contract_ids:
+            return []
+        return self.db.exec(
+            select(ServiceContract)
+            .where(ServiceContract.id.in_(contract_ids))
+            .options(selectinload(ServiceContract.service))
+        ).all()
+
     def get_contracts_by_service(self, service_id: int) -> List[ServiceContract]:
         """Get all contracts for a service"""
         return self.db.exec(select(ServiceContract).where(ServiceContract.service_id == service_id)).all()
@@ -84,6 +101,19 @@ class ServiceContractService:
         if not aggregated_amount or aggregated_amount == 0:
             return contract
 
+        self.add_contract_amount(contract, aggregated_amount)
+        self.db.commit()
+        self.db.refresh(contract)
+        return contract
+
+    def add_contract_amount(self, contract: ServiceContract, aggregated_amount: float):
+        """
+        Add an amount to a contract and to its accrual.
+
+        Changes are added to the session; committing is left to the caller.
+        """
+        contract_id = contract.id
+
         # Update status and corresponding date if contract_amount is changing
         old_amount = contract.contract_amount
         contract.contract_amount += aggregated_amount
@@ -118,9 +148,6 @@ class ServiceContractService:
                   f'new_remaining_to_accrue_{contract_accrual.remaining_amount_to_accrue}')
 
         self.db.add(contract)
-        self.db.commit()
-        self.db.refresh(contract)
-        return contract
 
     def update_contract_status(self, contract_id: int, contract_data: ServiceContractUpdate) -> Optional[ServiceContract]:
         """Update an contract status"""
@@ -132,9 +159,7 @@ class ServiceContractService:
 
         # Update status and corresponding date if status is changing
         if "status" in contract_data_dict:
-            new_status = contract_data_dict["status"]
-            if new_status != contract.status:
-                contract.status = new_status
+            self.set_contract_status(contract, contract_data_dict["status"])
 
         # Update other fields
         for key, value in contract_data_dict.items():
@@ -146,21 +171,64 @@ class ServiceContractService:
         self.db.refresh(contract)
         return contract
 
+    def set_contract_status(self, contract: ServiceContract, new_status: ServiceContractStatus):
+        """
+        Change the status of a contract, moving its amounts in the accrual rollup.
+
+        Changes are added to the session; committing is left to the caller.
+        """
+        if new_status != contract.status:
+            previous_status = contract.status
+            contract.status = new_status
+            AccrualRollupService(self.db).move_contract_status(
+                contract, previous_status)
+
     def get_active_contracts(self, target_date: Optional[date] = None) -> List[ServiceContract]:
         """Get all active contracts on a specific date"""
-        # Get all contracts
-        contracts = self.db.exec(select(ServiceContract)).all()
-
-        # Filter for active contracts on the target date
-        active_contracts = []
-        for contract in contracts:
-            service = self.db.get(Service, contract.service_id)
+        return list(self.iter_active_contracts(target_date))
+
+    def iter_active_contracts(
+        self,
+        target_date: Optional[date] = None,
+        with_client_external_ids: bool = True,
+        chunk_size: int = ACTIVE_CONTRACTS_CHUNK_SIZE
+    ) -> Iterator[ServiceContract]:
+        """
+        Stream the active contracts, in chunks ordered by ID.
 
-            # Check if the contract is active on the target date
-            if (contract.status == ServiceContractStatus.ACTIVE and (target_date is None or service.start_date <= target_date <= service.end_date)):
-                active_contracts.append(contract)
+        Args:
+            target_date: If given, only contracts with a service period covering the date
+            with_client_external_ids: Eager-load the client and its external IDs of each contract
+            chunk_size: Number of contracts loaded per query
 
-        return active_contracts
+        Yields:
+            ServiceContract: The active contracts
+        """
+        statement = select(ServiceContract).where(
+            ServiceContract.status == ServiceContractStatus.ACTIVE)
+        if target_date is not None:
+            statement = statement.where(
+                select(ServicePeriod.id).where(
+                    ServicePeriod.contract_id == ServiceContract.id,
+                    ServicePeriod.start_date <= target_date,
+                    ServicePeriod.end_date >= target_date
+                ).exists()
+            )
+        if with_client_external_ids:
+            statement = statement.options(
+                selectinload(ServiceContract.client).selectinload(Client.external_ids))
+
+        last_id = 0
+        while True:
+            contracts = self.db.exec(
+                statement.where(ServiceContract.id > last_id)
+                .order_by(ServiceContract.id)
+                .limit(chunk_size)
+            ).all()
+            yield from contracts
+            if len(contracts) < chunk_size:
+                return
+            last_id = contracts[-1].id
 
     def get_service_contract_by_client_and_service(self, client_id: int, service_id: int) -> Optional[ServiceContract]:
         """Retrieve a service contract by client and service IDs"""
@@ -12,13 +12,21 @@ class ServicePeriodService:
 
     def create_period(self, period_data: ServicePeriodCreate) -> ServicePeriod:
         """Create a new service period"""
-        period = ServicePeriod(**period_data.model_dump())
-
-        self.db.add(period)
+        period = self.add_period(period_data)
         self.db.commit()
         self.db.refresh(period)
         return period
 
+    def add_period(self, period_data: ServicePeriodCreate) -> ServicePeriod:
+        """
+        Build a new service period.
+
+        Changes are added to the session; committing is left to the caller.
+        """
+        period = ServicePeriod(**period_data.model_dump())
+        self.db.add(period)
+        return period
+
     def get_period(self, period_id: int) -> Optional[ServicePeriod]:
         """Get a period by ID"""
         return self.db.get(ServicePeriod, period_id)
@@ -66,13 +74,31 @@ class ServicePeriodService:
         if not period:
             return None
 
-        period.status = status
-        period.status_change_date = status_change_date
-        self.db.add(period)
+        self.set_period_status(period, status, status_change_date)
         self.db.commit()
         self.db.refresh(period)
         return period
 
+    def set_period_status(self, period: ServicePeriod, status: ServicePeriodStatus, status_change_date: date | None = None):
+        """
+        Change the status of a service period.
+
+        Changes are added to the session; committing is left to the caller.
+        """
+        period.status = status
+        period.status_change_date = status_change_date
+        self.db.add(period)
+
+    def get_periods_by_contracts(self, contract_ids: List[int]) -> List[ServicePeriod]:
+        """Get all periods of several contracts"""
+        if not contract_ids:
+            return []
+        return self.db.exec(
+            select(ServicePeriod)
+            .where(ServicePeriod.contract_id.in_(contract_ids))
+            .order_by(ServicePeriod.id)
+        ).all()
+
     def delete_period(self, period_id: int) -> bool:
         """Delete a service period"""
         period = self.db.get(ServicePeriod, period_id)
@@ -3,6 +3,7 @@ from sqlmodel import Session, select
 from datetime import date
 from src.api.services.models.service import Service
 from src.api.services.schemas.service import ServiceCreate, ServiceUpdate
+from src.api.services.services.service_catalogue import invalidate_service_catalogue
 from src.api.services.utils import get_service_type_from_service_name
 
 
@@ -43,6 +44,7 @@ class ServiceService:
 
         self.db.add(service)
         self.db.commit()
+        invalidate_service_catalogue()
         self.db.refresh(service)
         return service
 
@@ -84,6 +86,7 @@ class ServiceService:
 
         self.db.add(service)
         self.db.commit()
+        invalidate_service_catalogue()
         self.db.refresh(service)
         return service
 
@@ -95,5 +98,6 @@ class ServiceService:
 
         self.db.delete(service)
         self.db.commit()
+        invalidate_service_catalogue()
         return True
 
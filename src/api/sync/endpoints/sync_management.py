@@ -1,11 +1,18 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 
 from src.api.common.utils.database import get_db
 from src.api.sync.models.sync_requests import SyncStepRequest, SyncProcessRequest, SyncStatusResponse
 from src.api.sync.models.sync_execution import SyncExecution
-from src.api.sync.services.sync_management_service import SyncManagementService
+from src.api.sync.services.sync_jobs import SyncJobManager, get_sync_job_manager
+from src.api.sync.services.sync_management_service import (
+    SyncManagementService,
+    process_events,
+    run_process_job,
+)
 
 router = APIRouter()
 
@@ -76,9 +83,13 @@ async def execute_single_sync_step(
 @router.post("/execute-process", response_model=SyncStatusResponse)
 async def execute_sync_process(
     request: SyncProcessRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    job_manager: SyncJobManager = Depends(get_sync_job_manager)
 ):
-    """Execute a complete sync process."""
+    """
+    Start a complete sync process in the background.
+    Its progress is available at /status/{process_id} and streamed at /events/{process_id}.
+    """
     try:
         # Validate required parameters
         if request.process_type == "import":
@@ -95,7 +106,7 @@ async def execute_sync_process(
                 )
 
         sync_service = SyncManagementService(db)
-        result = await sync_service.execute_process(
+        execution = sync_service.create_process_execution(
             process_type=request.process_type,
             # Use first step as starting point
             starting_point=request.steps[0] if request.steps else "invoices",
@@ -104,11 +115,20 @@ async def execute_sync_process(
             end_date=request.end_date,
             month=request.month
         )
+        process_id = execution.process_id
+        job_manager.submit(
+            process_id, lambda: run_process_job(process_id, job_manager))
 
         return SyncStatusResponse(
             status="success",
-            message=f"{request.process_type.title()} process completed successfully",
-            data=result
+            message=f"{request.process_type.title()} process started",
+            data={
+                "process_id": process_id,
+                "process_type": execution.process_type,
+                "status": execution.status,
+                "steps": json.loads(execution.steps),
+                "progress": json.loads(execution.progress)
+            }
         )
 
     except Exception as e:
@@ -141,6 +161,7 @@ async def get_process_status(
                 "start_date": execution.start_date,
                 "end_date": execution.end_date,
                 "result": execution.result,
+                "progress": execution.progress,
                 "error_message": execution.error_message,
                 "created_at": execution.created_at.isoformat() if execution.created_at else None,
                 "updated_at": execution.updated_at.isoformat() if execution.updated_at else None
@@ -151,6 +172,19 @@ async def get_process_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/events/{process_id}")
+async def stream_process_events(
+    process_id: str,
+    job_manager: SyncJobManager = Depends(get_sync_job_manager)
+):
+    """Stream the progress of a sync process as Server-Sent Events until it finishes."""
+    return StreamingResponse(
+        process_events(process_id, job_manager),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/latest-processed-month-year")
 async def get_latest_processed_month_year(
     db: Session = Depends(get_db)
@@ -1,3 +1,4 @@
+from typing import Optional
 from sqlmodel import Field, SQLModel, Column, String, Integer, Text, DateTime
 from sqlalchemy import Enum
 from src.api.common.models.base import BaseModel, TimestampMixin
@@ -16,9 +17,10 @@ class SyncExecution(BaseModel, TimestampMixin, table=True):
     process_type: str = Field()  # "import" or "accrual"
     status: SyncExecutionStatus = Field(default=SyncExecutionStatus.RUNNING)
     steps: str = Field()  # JSON string of steps
-    year: int = Field(default=None)
-    month: int = Field(default=None)
-    start_date: str = Field(default=None)
-    end_date: str = Field(default=None)
-    result: str = Field(default=None)  # JSON string of results
-    error_message: str = Field(default=None)
\ No newline at end of file
+    year: Optional[int] = Field(default=None)
+    month: Optional[int] = Field(default=None)
+    start_date: Optional[str] = Field(default=None)
+    end_date: Optional[str] = Field(default=None)
+    result: Optional[str] = Field(default=None)  # JSON string of results
+    progress: Optional[str] = Field(default=None)  # JSON string of the progress while running
+    error_message: Optional[str] = Field(default=None)
\ No newline at end of file
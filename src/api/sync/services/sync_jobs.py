@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.api.common.utils.encryption import decryption_cache
+
+logger = logging.getLogger(__name__)
+
+# Sync processes write the same tables, so by default they run one at a time
+DEFAULT_MAX_CONCURRENT_JOBS = 1
+
+
+class SyncJobManager:
+    """
+    In-process queue of sync jobs, run as asyncio tasks.
+
+    Jobs wait for a free slot in submission order. Their progress events are
+    delivered to the subscribers of each process (e.g. SSE streams).
+    """
+
+    def __init__(self, max_concurrent_jobs: Optional[int] = None):
+        self.max_concurrent_jobs = max_concurrent_jobs or int(os.environ.get(
+            "SYNC_MAX_CONCURRENT_JOBS", DEFAULT_MAX_CONCURRENT_JOBS))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    def submit(self, process_id: str, job: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Queue a job of a sync process.
+
+        Args:
+            process_id: ID of the sync process
+            job: Function returning the coroutine to run
+
+        Returns:
+            The task running the job
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+
+        async def run():
+            async with self._semaphore:
+                # The task copies the submitting request's context; use a decryption cache of its own
+                with decryption_cache():
+                    return await job()
+
+        task = asyncio.create_task(run(), name=f"sync-{process_id}")
+        self._tasks[process_id] = task
+        task.add_done_callback(lambda _: self._finish(process_id))
+        return task
+
+    def is_running(self, process_id: str) -> bool:
+        """Whether a job of the process is queued or running in this process"""
+        return process_id in self._tasks
+
+    def publish(self, process_id: str, event: Dict[str, Any]) -> None:
+        """Deliver a progress event to the subscribers of a process"""
+        for queue in self._subscribers.get(process_id, []):
+            queue.put_nowait(event)
+
+    def subscribe(self, process_id: str) -> asyncio.Queue:
+        """Get a queue receiving the progress events of a process"""
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(process_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, process_id: str, queue: asyncio.Queue) -> None:
+        """Stop receiving the progress events of a process"""
+        subscribers = self._subscribers.get(process_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(process_id, None)
+
+    async def shutdown(self) -> None:
+        """Cancel the queued and running jobs. Called on application shutdown."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _finish(self, process_id: str) -> None:
+        task = self._tasks.pop(process_id, None)
+        if task and not task.cancelled() and task.exception():
+            logger.error(
+                f"Sync process {process_id} failed: {task.exception()}")
+
+
+sync_job_manager = SyncJobManager()
+
+
+def get_sync_job_manager() -> SyncJobManager:
+    return sync_job_manager
@@ -1,14 +1,27 @@
+import asyncio
+import copy
 import os
 import uuid
 import json
 import logging
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Any, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
+from sqlmodel import Session as SQLModelSession
 import httpx
 
+from src.api.common.utils.database import engine
+
 from src.api.sync.models.sync_execution import SyncExecution, SyncExecutionStatus
+from src.api.sync.services.sync_jobs import SyncJobManager
+from src.api.sync.services.sync_steps import (
+    SYNC_STEPS_MODE_HTTP,
+    SYNC_STEPS_MODE_IN_PROCESS,
+    get_sync_step,
+    run_sync_step,
+)
 from src.api.invoices.models.invoice import Invoice
 from src.api.accruals.models.accrued_period import AccruedPeriod
 
@@ -16,10 +29,13 @@ logger = logging.getLogger(__name__)
 
 
 class SyncManagementService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, steps_mode: Optional[str] = None):
         self.db = db
         self.base_url = os.environ.get(
             "VITE_API_URL", "http://localhost:3001/api")
+        # Steps run in process with this session, or through the API for remote workers
+        self.steps_mode = steps_mode or os.environ.get(
+            "SYNC_STEPS_MODE", SYNC_STEPS_MODE_IN_PROCESS)
         self.running_processes: Dict[str, Dict[str, Any]] = {}
 
     async def execute_single_step(
@@ -58,7 +74,7 @@ class SyncManagementService:
                     year)
 
             # Execute the step
-            result = await self._execute_step_api_call(
+            result = await self._execute_step(
                 step=step,
                 year=year,
                 start_date=start_date,
@@ -168,6 +184,20 @@ class SyncManagementService:
         month: Optional[int] = None
     ) -> Dict[str, Any]:
         """Execute a complete sync process."""
+        execution = self.create_process_execution(
+            process_type, starting_point, year, start_date, end_date, month)
+        return await self.run_process(execution.process_id)
+
+    def create_process_execution(
+        self,
+        process_type: str,
+        starting_point: str,
+        year: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        month: Optional[int] = None
+    ) -> SyncExecution:
+        """Create the execution record of a sync process, to be run by run_process."""
         process_id = str(uuid.uuid4())
 
         # Get steps to execute from starting point
@@ -186,10 +216,31 @@ class SyncManagementService:
             year=year,
             month=month,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            progress=json.dumps(self._initial_progress(steps))
         )
         self.db.add(execution)
         self.db.commit()
+        return execution
+
+    async def run_process(
+        self,
+        process_id: str,
+        progress_listener: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the steps of a sync process created by create_process_execution.
+
+        The progress is saved to the SyncExecution after each step and month,
+        and sent to the progress listener, if any.
+        """
+        execution = self.db.query(SyncExecution).filter(
+            SyncExecution.process_id == process_id).one()
+        process_type = execution.process_type
+        steps = json.loads(execution.steps)
+        year, month = execution.year, execution.month
+        start_date, end_date = execution.start_date, execution.end_date
+        progress = self._initial_progress(steps)
 
         try:
             # Generate monthly timestamps if needed
@@ -212,15 +263,27 @@ class SyncManagementService:
                 "total_errors": 0
             }
 
+            def on_month(month_label: str, month_stats: Dict[str, Any]):
+                progress["current_month"] = month_label
+                progress["completed_months"].append(month_label)
+                self._save_progress(execution, progress, total_stats,
+                                    step_results, progress_listener)
+
             for step in steps:
+                progress["current_step"] = step
+                progress["current_month"] = None
+                progress["completed_months"] = []
+                self._save_progress(execution, progress, total_stats,
+                                    step_results, progress_listener)
                 try:
-                    result = await self._execute_step_api_call(
+                    result = await self._execute_step(
                         step=step,
                         year=year,
                         start_date=start_date,
                         end_date=end_date,
                         month=month,
-                        monthly_timestamps=monthly_timestamps
+                        monthly_timestamps=monthly_timestamps,
+                        on_month=on_month
                     )
 
                     # Extract statistics
@@ -241,6 +304,8 @@ class SyncManagementService:
 
                 except Exception as e:
                     logger.error(f"Error executing step {step}: {str(e)}")
+                    # Discard the failed step's pending changes before saving the progress
+                    self.db.rollback()
                     step_results.append({
                         "step": step,
                         "result": None,
@@ -258,13 +323,16 @@ class SyncManagementService:
                     })
                     total_stats["total_errors"] += 1
 
+                progress["completed_steps"] += 1
+                self._save_progress(execution, progress, total_stats,
+                                    step_results, progress_listener)
+
             # Update execution record
+            progress["current_step"] = None
+            progress["current_month"] = None
             execution.status = SyncExecutionStatus.COMPLETED
-            execution.result = json.dumps({
-                "total_stats": total_stats,
-                "step_results": step_results
-            })
-            self.db.commit()
+            self._save_progress(execution, progress, total_stats,
+                                step_results, progress_listener)
 
             return {
                 "process_id": process_id,
@@ -274,19 +342,70 @@ class SyncManagementService:
                 "step_results": step_results
             }
 
-        except Exception as e:
-            logger.error(f"Error executing process {process_type}: {str(e)}")
+        except (Exception, asyncio.CancelledError) as e:
+            error_message = str(e) if not isinstance(
+                e, asyncio.CancelledError) else "Sync process interrupted"
+            logger.error(f"Error executing process {process_type}: {error_message}")
+            self.db.rollback()
             execution.status = SyncExecutionStatus.FAILED
-            execution.error_message = str(e)
+            execution.error_message = error_message
             self.db.commit()
+            if progress_listener:
+                progress_listener(self._progress_event(execution, progress))
+            if isinstance(e, asyncio.CancelledError):
+                raise
 
             return {
                 "process_id": process_id,
                 "process_type": process_type,
                 "status": "failed",
-                "error": str(e)
+                "error": error_message
             }
 
+    def _initial_progress(self, steps: List[str]) -> Dict[str, Any]:
+        return {
+            "total_steps": len(steps),
+            "completed_steps": 0,
+            "current_step": None,
+            "current_month": None,
+            "completed_months": []
+        }
+
+    def _save_progress(
+        self,
+        execution: SyncExecution,
+        progress: Dict[str, Any],
+        total_stats: Dict[str, Any],
+        step_results: List[Dict[str, Any]],
+        progress_listener: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """Save the progress and the results so far of a running process, and notify it."""
+        execution.progress = json.dumps(progress)
+        execution.result = json.dumps({
+            "total_stats": total_stats,
+            "step_results": step_results
+        })
+        self.db.add(execution)
+        self.db.commit()
+        if progress_listener:
+            progress_listener(self._progress_event(execution, progress, total_stats))
+
+    def _progress_event(
+        self,
+        execution: SyncExecution,
+        progress: Dict[str, Any],
+        total_stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return {
+            "process_id": execution.process_id,
+            "process_type": execution.process_type,
+            "status": SyncExecutionStatus(execution.status).value,
+            # Copied, as the process keeps updating them
+            "progress": copy.deepcopy(progress),
+            "total_stats": copy.deepcopy(total_stats),
+            "error_message": execution.error_message
+        }
+
     def get_available_steps(self) -> Dict[str, List[Dict[str, str]]]:
         """Get available sync steps."""
         return {
@@ -347,19 +466,23 @@ class SyncManagementService:
             return timestamps
         return []
 
-    async def _execute_step_api_call(
+    async def _execute_step(
         self,
         step: str,
         year: Optional[int] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         month: Optional[int] = None,
-        monthly_timestamps: Optional[List[int]] = None
+        monthly_timestamps: Optional[List[int]] = None,
+        on_month: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
-        """Execute API call for a specific step."""
-        async with httpx.AsyncClient(timeout=600.0) as client:
+        """
+        Execute a specific step, in process or through the API depending on the steps mode.
+        on_month is called with the statistics of each month processed by the step.
+        """
+        async with self._step_caller() as call_step:
             if step == "services":
-                return await self._call_api(client, f"{self.base_url}/integrations/holded/sync-services")
+                return await call_step("services")
 
             elif step == "invoices":
                 if monthly_timestamps:
@@ -380,13 +503,10 @@ class SyncManagementService:
                         start_timestamp = monthly_timestamps[i]
                         end_timestamp = monthly_timestamps[i + 1]
 
-                        result = await self._call_api(
-                            client,
-                            f"{self.base_url}/integrations/holded/sync-invoices-and-clients",
-                            params={
-                                "start_timestamp": start_timestamp,
-                                "end_timestamp": end_timestamp
-                            }
+                        result = await call_step(
+                            "invoices",
+                            start_timestamp=start_timestamp,
+                            end_timestamp=end_timestamp
                         )
 
                         # Accumulate stats
@@ -400,23 +520,27 @@ class SyncManagementService:
                         total_stats["total_errors"] += month_stats["total_errors"]
                         total_stats["total_received"] += month_stats.get("total_received", 0)
                         total_stats["months_processed"] += 1
+                        month_label = datetime.fromtimestamp(
+                            start_timestamp).strftime('%Y-%m')
                         total_stats["monthly_results"].append({
-                            "month": datetime.fromtimestamp(start_timestamp).strftime('%Y-%m'),
+                            "month": month_label,
                             "stats": month_stats
                         })
+                        if on_month:
+                            on_month(month_label, month_stats)
 
                     return total_stats
                 else:
                     raise ValueError("Invoices step requires date range")
 
             elif step == "crm-clients":
-                return await self._call_api(client, f"{self.base_url}/integrations/fourgeeks/sync-students-from-clients")
+                return await call_step("crm-clients")
 
             elif step == "service-periods":
-                return await self._call_api(client, f"{self.base_url}/integrations/fourgeeks/sync-enrollments-from-clients")
+                return await call_step("service-periods")
 
             elif step == "notion-external-id":
-                return await self._call_api(client, f"{self.base_url}/integrations/notion/sync-page-ids-from-clients")
+                return await call_step("notion-external-id")
 
             elif step == "accruals":
                 if monthly_timestamps:
@@ -431,28 +555,26 @@ class SyncManagementService:
                         "total_errors": 0
                     }
 
-                    # Process each month, excluding the last timestamp which is just the end boundary
-                    for i in range(len(monthly_timestamps) - 1):
-                        start_timestamp = monthly_timestamps[i]
-                        accrual_date = datetime.fromtimestamp(
-                            start_timestamp).strftime('%Y-%m-%d')
-
-                        result = await self._call_api(
-                            client,
-                            f"{self.base_url}/accruals/process-contracts",
-                            method="POST",
-                            json_data={"period_start_date": accrual_date}
-                        )
+                    # Process all months in one pass, excluding the last timestamp which is just the end boundary
+                    start_month = datetime.fromtimestamp(
+                        monthly_timestamps[0]).strftime('%Y-%m-%d')
+                    end_month = datetime.fromtimestamp(
+                        monthly_timestamps[-2]).strftime('%Y-%m-%d')
+
+                    def on_month_result(month_result: Dict[str, Any]):
+                        accrual_date = month_result.get("period_start_date")
 
                         # Extract stats
                         month_stats = self._extract_step_statistics(
-                            result, "accruals")
+                            month_result, "accruals")
                         total_results["months_processed"] += 1
                         total_results["monthly_results"].append({
                             "month": accrual_date,
                             "stats": month_stats
                         })
-                        
+                        if on_month:
+                            on_month(accrual_date, month_stats)
+
                         # Accumulate totals
                         total_results["total_processed"] += month_stats.get("total_processed", 0)
                         total_results["total_created"] += month_stats.get("total_created", 0)
@@ -461,6 +583,10 @@ class SyncManagementService:
                         total_results["total_failed"] += month_stats.get("total_failed", 0)
                         total_results["total_errors"] += month_stats.get("total_errors", 0)
 
+                    # Each month is reported as soon as it is processed
+                    await call_step("accruals", start_month=start_month,
+                                    end_month=end_month, on_month=on_month_result)
+
                     return total_results
                 else:
                     raise ValueError("Accruals step requires date range")
@@ -468,6 +594,39 @@ class SyncManagementService:
             else:
                 raise ValueError(f"Unknown step: {step}")
 
+    @asynccontextmanager
+    async def _step_caller(self) -> AsyncIterator[Callable[..., Awaitable[Dict[str, Any]]]]:
+        """
+        Provide a function calling a step with its parameters, in process or through the API.
+
+        on_month is called with each of the step monthly_results: as each month is
+        committed in process, and once the response is received through the API.
+        """
+        if self.steps_mode == SYNC_STEPS_MODE_HTTP:
+            async with httpx.AsyncClient(timeout=600.0) as client:
+                async def call_step(step: str, on_month: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                    **params) -> Dict[str, Any]:
+                    sync_step = get_sync_step(step)
+                    url = f"{self.base_url}{sync_step.http_path}"
+                    if sync_step.http_method == "POST":
+                        result = await self._call_api(client, url, method="POST", json_data=params)
+                    else:
+                        result = await self._call_api(client, url, params=params or None)
+                    if on_month:
+                        for month_result in result.get("monthly_results", []):
+                            on_month(month_result)
+                    return result
+
+                yield call_step
+        else:
+            async def call_step(step: str, on_month: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                **params) -> Dict[str, Any]:
+                if on_month:
+                    params["on_month"] = on_month
+                return await run_sync_step(step, self.db, **params)
+
+            yield call_step
+
     async def _call_api(
         self,
         client: httpx.AsyncClient,
@@ -660,3 +819,78 @@ class SyncManagementService:
             'year': None,
             'month': None
         }
+
+
+# Seconds between database checks of a process streamed over SSE
+PROCESS_EVENTS_POLL_SECONDS = 5.0
+
+
+def _new_session() -> SQLModelSession:
+    return SQLModelSession(engine)
+
+
+async def run_process_job(
+    process_id: str,
+    job_manager: SyncJobManager,
+    session_factory: Callable[[], Session] = _new_session
+) -> Dict[str, Any]:
+    """Run a sync process in the background, with its own session, publishing its progress."""
+    with session_factory() as db:
+        return await SyncManagementService(db).run_process(
+            process_id,
+            progress_listener=lambda event: job_manager.publish(process_id, event)
+        )
+
+
+def _load_process_event(process_id: str, session_factory: Callable[[], Session]) -> Optional[Dict[str, Any]]:
+    with session_factory() as db:
+        execution = db.query(SyncExecution).filter(
+            SyncExecution.process_id == process_id).first()
+        if not execution:
+            return None
+        result = json.loads(execution.result) if execution.result else {}
+        return {
+            "process_id": execution.process_id,
+            "process_type": execution.process_type,
+            "status": SyncExecutionStatus(execution.status).value,
+            "progress": json.loads(execution.progress) if execution.progress else None,
+            "total_stats": result.get("total_stats"),
+            "error_message": execution.error_message
+        }
+
+
+def _format_sse(event: Dict[str, Any], event_type: str = "progress") -> str:
+    return f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+
+
+async def process_events(
+    process_id: str,
+    job_manager: SyncJobManager,
+    session_factory: Callable[[], Session] = _new_session,
+    poll_seconds: float = PROCESS_EVENTS_POLL_SECONDS
+) -> AsyncIterator[str]:
+    """
+    Stream the progress of a sync process as Server-Sent Events, until it finishes.
+
+    Events come from the job manager when the process runs in this worker, and
+    from the SyncExecution record otherwise.
+    """
+    # Subscribe before reading the current state, so no event is missed
+    queue = job_manager.subscribe(process_id)
+    try:
+        event = _load_process_event(process_id, session_factory)
+        if event is None:
+            yield _format_sse({"process_id": process_id, "error": "Process not found"}, "error")
+            return
+
+        yield _format_sse(event)
+        while event["status"] == SyncExecutionStatus.RUNNING.value:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                event = _load_process_event(process_id, session_factory)
+                if event is None:
+                    return
+            yield _format_sse(event)
+    finally:
+        job_manager.unsubscribe(process_id, queue)
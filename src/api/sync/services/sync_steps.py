@@ -0,0 +1,140 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session
+
+from src.api.accruals.endpoints.accruals import run_contract_accruals_range
+from src.api.accruals.schemas import ContractAccrualRangeProcessingResponse, ProcessRangeRequest
+from src.api.clients.services.client_service import ClientService
+from src.api.integrations.endpoints import fourgeeks, holded, notion
+from src.api.invoices.services.invoice_service import InvoiceService
+from src.api.services.services.service_contract import ServiceContractService
+from src.api.services.services.service_period_service import ServicePeriodService
+from src.api.services.services.service_service import ServiceService
+
+# How the sync steps are executed
+SYNC_STEPS_MODE_IN_PROCESS = "in_process"
+SYNC_STEPS_MODE_HTTP = "http"
+
+
+@dataclass(frozen=True)
+class SyncStep:
+    """
+    A sync step, runnable in process with the caller's session or through
+    the HTTP endpoint that exposes it (for remote workers).
+    """
+    id: str
+    run: Callable[..., Awaitable[Dict[str, Any]]]
+    http_method: str
+    http_path: str
+
+
+SYNC_STEPS: Dict[str, SyncStep] = {}
+
+
+def register_sync_step(step_id: str, http_method: str, http_path: str):
+    """Register a function as the in-process runner of a sync step"""
+    def decorator(run: Callable[..., Awaitable[Any]]):
+        SYNC_STEPS[step_id] = SyncStep(step_id, run, http_method, http_path)
+        return run
+    return decorator
+
+
+def get_sync_step(step_id: str) -> Optional[SyncStep]:
+    """Get a registered sync step"""
+    return SYNC_STEPS.get(step_id)
+
+
+async def run_sync_step(step_id: str, db: Session, **params) -> Dict[str, Any]:
+    """
+    Run a sync step in process.
+
+    Args:
+        step_id: ID of the registered step
+        db: Session shared by the step
+        params: Parameters of the step, the same sent to its HTTP endpoint
+
+    Returns:
+        The step result, encoded as its HTTP endpoint would return it
+    """
+    step = get_sync_step(step_id)
+    if not step:
+        raise ValueError(f"Unknown step: {step_id}")
+    return jsonable_encoder(await step.run(db, **params))
+
+
+@register_sync_step("services", "GET", "/integrations/holded/sync-services")
+async def _sync_services(db: Session) -> Dict[str, Any]:
+    holded_client = holded.get_holded_client()
+    try:
+        return await holded.sync_services(
+            service_service=ServiceService(db),
+            holded_client=holded_client,
+            db=db
+        )
+    finally:
+        await holded_client.aclose()
+
+
+@register_sync_step("invoices", "GET", "/integrations/holded/sync-invoices-and-clients")
+async def _sync_invoices(db: Session, start_timestamp: Optional[int] = None,
+                         end_timestamp: Optional[int] = None) -> Dict[str, Any]:
+    holded_client = holded.get_holded_client()
+    try:
+        return await holded.sync_invoices_and_clients(
+            client_service=ClientService(db),
+            invoice_service=InvoiceService(db),
+            holded_client=holded_client,
+            service_service=ServiceService(db),
+            service_contract_service=ServiceContractService(db),
+            db=db,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp
+        )
+    finally:
+        await holded_client.aclose()
+
+
+@register_sync_step("crm-clients", "GET", "/integrations/fourgeeks/sync-students-from-clients")
+async def _sync_crm_clients(db: Session) -> Dict[str, Any]:
+    async with asynccontextmanager(fourgeeks.get_async_fourgeeks_client)() as fourgeeks_client:
+        return await fourgeeks.sync_students_from_clients(
+            client_service=ClientService(db),
+            fourgeeks_client=fourgeeks_client,
+            db=db
+        )
+
+
+@register_sync_step("service-periods", "GET", "/integrations/fourgeeks/sync-enrollments-from-clients")
+async def _sync_service_periods(db: Session) -> Dict[str, Any]:
+    async with asynccontextmanager(fourgeeks.get_async_fourgeeks_client)() as fourgeeks_client:
+        return await fourgeeks.sync_client_enrollments(
+            client_service=ClientService(db),
+            period_service=ServicePeriodService(db),
+            contract_service=ServiceContractService(db),
+            service_service=ServiceService(db),
+            fourgeeks_client=fourgeeks_client,
+            db=db
+        )
+
+
+@register_sync_step("notion-external-id", "GET", "/integrations/notion/sync-page-ids-from-clients")
+async def _sync_notion_external_ids(db: Session) -> Dict[str, Any]:
+    return await notion.sync_page_ids_from_clients(
+        database_id=None,
+        client_service=ClientService(db),
+        db=db
+    )
+
+
+@register_sync_step("accruals", "POST", "/accruals/process-range")
+async def _process_accruals(db: Session, start_month: str, end_month: str,
+                            on_month: Optional[Callable[[Dict[str, Any]], None]] = None
+                            ) -> ContractAccrualRangeProcessingResponse:
+    # Each month result is reported encoded, as in the monthly_results of the HTTP response
+    return await run_contract_accruals_range(
+        ProcessRangeRequest(start_month=start_month, end_month=end_month),
+        db=db,
+        on_month=(lambda month_result: on_month(jsonable_encoder(month_result))) if on_month else None
+    )
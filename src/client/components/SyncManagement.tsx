@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import {
   Button,
   Card,
@@ -13,7 +13,13 @@ import {
   Divider,
 } from "@heroui/react";
 import { Icon } from "@iconify/react";
-import { syncAPI, ApiResponse, SyncStatusResponse } from "../utils/api";
+import {
+  syncAPI,
+  ApiResponse,
+  SyncProgress,
+  SyncProgressEvent,
+  SyncStatusResponse,
+} from "../utils/api";
 import PageHeader from "./ui/PageHeader";
 
 interface SyncStep {
@@ -33,6 +39,8 @@ interface SyncResult {
   status: string;
   total_stats?: any;
   step_results?: any[];
+  progress?: SyncProgress | null;
+  error_message?: string | null;
 }
 
 const SyncManagement: React.FC = () => {
@@ -51,6 +59,10 @@ const SyncManagement: React.FC = () => {
   const [isLoading, setIsLoading] = useState(false);
   const [results, setResults] = useState<SyncResult | null>(null);
   const [showImportSteps, setShowImportSteps] = useState<boolean>(false);
+  const processEvents = useRef<EventSource | null>(null);
+
+  // Stop streaming the progress when leaving the page
+  useEffect(() => () => processEvents.current?.close(), []);
 
   // Load latest processed month and year from database
   useEffect(() => {
@@ -137,11 +149,61 @@ const SyncManagement: React.FC = () => {
           year,
           month: selectedMonth || undefined,
         });
-      setResults(response.data?.data);
+      const process = response.data?.data;
+      if (!process) {
+        throw new Error(response.error || "Process could not be started");
+      }
+      setResults(process);
+      followProcess(process.process_id);
     } catch (error) {
       console.error(`Error executing ${processType} process:`, error);
       alert(`Error executing ${processType} process: ${error}`);
-    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  // The process runs in the background: show its progress until it finishes
+  const followProcess = (processId: string) => {
+    processEvents.current?.close();
+    processEvents.current = syncAPI.subscribeToProcess(
+      processId,
+      (event: SyncProgressEvent) => {
+        setResults((current) => ({ ...current, ...event }));
+        if (event.status !== "running") {
+          loadProcessResults(processId);
+        }
+      },
+      () => loadProcessResults(processId),
+    );
+  };
+
+  const formatProgress = (progress: SyncProgress) => {
+    const step = Math.min(progress.completed_steps + 1, progress.total_steps);
+    return [
+      `Step ${step} of ${progress.total_steps}`,
+      progress.current_step,
+      progress.current_month,
+    ]
+      .filter(Boolean)
+      .join(" · ");
+  };
+
+  const loadProcessResults = async (processId: string) => {
+    const response = await syncAPI.getProcessStatus(processId);
+    const execution: any = response.data?.data;
+    if (execution) {
+      const result = execution.result ? JSON.parse(execution.result) : {};
+      setResults({
+        process_id: execution.process_id,
+        process_type: execution.process_type,
+        status: execution.status,
+        total_stats: result.total_stats,
+        step_results: result.step_results,
+        progress: execution.progress ? JSON.parse(execution.progress) : null,
+        error_message: execution.error_message,
+      });
+    }
+    if (!execution || execution.status !== "running") {
       setIsLoading(false);
     }
   };
@@ -494,6 +556,20 @@ const SyncManagement: React.FC = () => {
             </p>
           </div>
           <div className="p-5 space-y-4">
+            {results.status === "running" && results.progress && (
+              <div
+                className="flex items-center gap-2 text-sm"
+                style={{ color: "var(--muted-foreground)" }}
+              >
+                <Spinner size="sm" />
+                <span>{formatProgress(results.progress)}</span>
+              </div>
+            )}
+            {results.error_message && (
+              <p className="text-sm" style={{ color: "#dc2626" }}>
+                Error: {results.error_message}
+              </p>
+            )}
             <div className="grid grid-cols-2 md:grid-cols-4 gap-3">
               {[
                 {
@@ -108,12 +108,12 @@ export const clientApi = {
     return apiClient.get<ClientRead[]>("/clients");
   },
 
-  // Get clients with missing external IDs
+  // Get clients with missing external IDs, only the fields used by the list
   getClientsMissingExternalIds: async (): Promise<
-    ApiResponse<ClientMissingExternalId[]>
+    ApiResponse<Pick<ClientMissingExternalId, "id" | "system">[]>
   > => {
-    return apiClient.get<ClientMissingExternalId[]>(
-      "/clients/missing-external-ids",
+    return apiClient.get<Pick<ClientMissingExternalId, "id" | "system">[]>(
+      "/clients/missing-external-ids?fields=id,system",
     );
   },
 
@@ -492,6 +492,14 @@ export interface SyncProcessRequest {
   month?: number;
 }
 
+export interface SyncProgress {
+  total_steps: number;
+  completed_steps: number;
+  current_step: string | null;
+  current_month: string | null;
+  completed_months: string[];
+}
+
 export interface SyncStatusResponse {
   status: string;
   message: string;
@@ -501,9 +509,19 @@ export interface SyncStatusResponse {
     status: string;
     total_stats?: any;
     step_results?: any[];
+    progress?: SyncProgress;
   };
 }
 
+export interface SyncProgressEvent {
+  process_id: string;
+  process_type: string;
+  status: string;
+  progress: SyncProgress | null;
+  total_stats: any;
+  error_message: string | null;
+}
+
 export interface LatestProcessedMonthYear {
   year: number | null;
   month: number | null;
@@ -534,6 +552,29 @@ export const syncAPI = {
     return apiClient.post<SyncStatusResponse>("/sync/execute-process", request);
   },
 
+  // Stream the progress of a process until it finishes
+  subscribeToProcess: (
+    processId: string,
+    onEvent: (event: SyncProgressEvent) => void,
+    onError?: () => void,
+  ): EventSource => {
+    const source = new EventSource(`${API_BASE_URL}/sync/events/${processId}`);
+    source.addEventListener("progress", (message) => {
+      const event: SyncProgressEvent = JSON.parse(
+        (message as MessageEvent).data,
+      );
+      onEvent(event);
+      if (event.status !== "running") {
+        source.close();
+      }
+    });
+    source.addEventListener("error", () => {
+      source.close();
+      onError?.();
+    });
+    return source;
+  },
+
   // Get process status
   getProcessStatus: async (
     processId: string,
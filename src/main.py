@@ -1,14 +1,31 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from src.api.routes import api_router
+from src.api.common.utils.http_clients import open_http_clients, close_http_clients
+from src.api.common.utils.http_transport import get_http_stats
+from src.api.common.utils.encryption import DecryptionCacheMiddleware
+from src.api.sync.services.sync_jobs import get_sync_job_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Integration clients share these connection pools while the app is running
+    open_http_clients()
+    yield
+    # Interrupted sync processes are recorded as failed
+    await get_sync_job_manager().shutdown()
+    await close_http_clients()
+
 
 app = FastAPI(
     title="Devengo",
     description="Accrual accounting software",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -18,8 +35,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Values decrypted while handling a request are cached until it ends
+app.add_middleware(DecryptionCacheMiddleware)
+
 # Add all endpoints from the API with an "api" prefix
 app.include_router(api_router, prefix="/api")
 
@@ -27,6 +48,11 @@ app.include_router(api_router, prefix="/api")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/integrations")
+def integrations_health_check():
+    # Requests, retries and rate limiting counters of each integration upstream
+    return {"upstreams": get_http_stats()}
+
 # Serve static files from the public directory
 app.mount("/public", StaticFiles(directory="public"), name="public")
 
@@ -14,6 +14,7 @@ from src.api.services.models.service_period import ServicePeriod
 from src.api.services.models.service_contract import ServiceContract
 from src.api.accruals.models.accrued_period import AccruedPeriod
 from src.api.integrations.models.integration_error import IntegrationError
+from src.api.integrations.models.integration_sync_state import IntegrationSyncState
 
 
 @pytest.fixture(scope="session")
@@ -1,8 +1,14 @@
+import asyncio
+import csv
+import random
 import pytest
+from io import StringIO
 from datetime import date, datetime, timezone
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from decimal import Decimal
-from sqlmodel import Session
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
 
 from src.api.accruals.services.contract_accrual_processor import ContractAccrualProcessor
 from src.api.accruals.services.accrual_reports_service import AccrualReportsService
@@ -14,6 +20,11 @@ from src.api.clients.models.client import Client
 from src.api.invoices.models.invoice import Invoice
 from src.api.accruals.models.contract_accrual import ContractAccrual
 from src.api.accruals.constants.accruals import ContractAccrualStatus
+from src.api.accruals.schemas import ProcessPeriodRequest, ProcessingStatus
+from src.api.accruals.models.accrual_monthly_rollup import AccrualMonthlyRollup
+from src.api.accruals.services.accrual_rollup_service import AccrualRollupService
+from src.api.services.services.service_contract import ServiceContractService
+from src.api.services.schemas.service_contract import ServiceContractUpdate
 
 
 class TestContractAccrualProcessor:
@@ -482,6 +493,343 @@ class TestContractAccrualProcessor:
         assert contract_accrual.remaining_amount_to_accrue >= 0
 
 
+    @pytest.mark.asyncio
+    async def test_notion_snapshot_loaded_once_per_run(self, processor, test_session, test_data_factory):
+        """Test that contracts without service periods resolve against a single Notion snapshot"""
+        for name in ("Client A", "Client B"):
+            client = test_data_factory.create_client(test_session, name=name)
+            service = test_data_factory.create_service(test_session, name=f"Service {name}")
+            test_session.add(ServiceContract(
+                client_id=client.id,
+                service_id=service.id,
+                contract_date=date(2024, 1, 1),
+                contract_amount=3000.0,
+                status=ServiceContractStatus.ACTIVE
+            ))
+        test_session.commit()
+
+        snapshot = Mock()
+        snapshot.get.return_value = {'educational_status': 'ACTIVE', 'status_change_date': None}
+        module = 'src.api.accruals.services.contract_accrual_processor'
+        with patch(f'{module}.load_educational_status_snapshot', new_callable=AsyncMock, return_value=snapshot) as mock_load, \
+                patch(f'{module}.get_client_educational_data', new_callable=AsyncMock) as mock_get_data:
+            await processor.process_all_contracts(date(2024, 1, 1))
+
+        mock_load.assert_awaited_once()
+        assert snapshot.get.call_count == 2
+        mock_get_data.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_processing_merges_deterministically(self, processor, test_session, test_data_factory):
+        """Test that concurrent processing is bounded and keeps results and notifications in contract order"""
+        for name in ("Client A", "Client B", "Client C"):
+            client = test_data_factory.create_client(test_session, name=name)
+            service = test_data_factory.create_service(test_session, name=f"Service {name}")
+            test_session.add(ServiceContract(
+                client_id=client.id,
+                service_id=service.id,
+                contract_date=date(2024, 1, 20),
+                contract_amount=3000.0,
+                status=ServiceContractStatus.ACTIVE
+            ))
+        test_session.commit()
+        contract_ids = [c.id for c in processor._get_all_accruable_service_contracts(date(2024, 1, 1))]
+
+        in_flight = {'current': 0, 'max': 0}
+
+        async def slow_lookup(client):
+            # Later contracts finish first
+            in_flight['current'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            await asyncio.sleep(0.01 * (4 - client.id))
+            in_flight['current'] -= 1
+            return None
+
+        module = 'src.api.accruals.services.contract_accrual_processor'
+        with patch(f'{module}.load_educational_status_snapshot', new_callable=AsyncMock, return_value=None), \
+                patch(f'{module}.get_client_educational_data', side_effect=slow_lookup):
+            result = await processor.process_all_contracts(date(2024, 1, 1), max_concurrency=2)
+
+        assert in_flight['max'] == 2
+        assert [r.contract_id for r in result['results']] == contract_ids
+        assert result['skipped'] == 3
+        assert [n['message'] for n in result['notifications']] == [
+            f"Contract {contract_id} - Possibly a client missing in CRM" for contract_id in contract_ids]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_processing_not_allowed_in_unit_of_work(self, processor):
+        """Test that concurrency cannot be combined with unit-of-work mode"""
+        with pytest.raises(ValueError):
+            await processor.process_all_contracts(date(2024, 1, 1), unit_of_work=True, max_concurrency=2)
+
+        with pytest.raises(ValueError):
+            ProcessPeriodRequest(period_start_date=date(2024, 1, 1), unit_of_work=True, max_concurrency=2)
+
+    def _create_contract_with_active_period(self, session, test_data_factory, client_name, amount):
+        """Create a client, service, contract and ACTIVE period spanning Q1 2024"""
+        client = test_data_factory.create_client(session, name=client_name)
+        service = test_data_factory.create_service(session, name=f"Service {client_name}")
+        contract = ServiceContract(
+            client_id=client.id,
+            service_id=service.id,
+            contract_date=date(2024, 1, 1),
+            contract_amount=amount,
+            status=ServiceContractStatus.ACTIVE
+        )
+        session.add(contract)
+        session.commit()
+        session.add(ServicePeriod(
+            contract_id=contract.id,
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 3, 31),
+            status=ServicePeriodStatus.ACTIVE
+        ))
+        session.commit()
+        return contract
+
+    @pytest.mark.asyncio
+    async def test_unit_of_work_matches_default_processing(self, test_session, test_data_factory):
+        """Test that unit-of-work mode produces the same accruals as per-change commits"""
+        uow_engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(uow_engine)
+
+        with Session(uow_engine) as uow_session:
+            for session in (test_session, uow_session):
+                self._create_contract_with_active_period(session, test_data_factory, "Client A", 3000.0)
+                self._create_contract_with_active_period(session, test_data_factory, "Client B", 4500.0)
+
+            default_result = await ContractAccrualProcessor(test_session).process_all_contracts(date(2024, 1, 1))
+            uow_result = await ContractAccrualProcessor(uow_session).process_all_contracts(
+                date(2024, 1, 1), unit_of_work=True, chunk_size=1)
+
+            assert uow_result['successful'] == default_result['successful'] == 2
+            for session in (test_session, uow_session):
+                session.expire_all()
+
+            def accruals(session):
+                return sorted(
+                    (ap.contract_accrual.contract_id, ap.accrual_date, round(ap.accrued_amount, 2))
+                    for ap in session.query(AccruedPeriod).all())
+
+            assert accruals(uow_session) == accruals(test_session)
+            assert len(accruals(uow_session)) == 2
+            for contract_accrual in uow_session.query(ContractAccrual).all():
+                assert contract_accrual.total_amount_accrued > 0
+
+    @pytest.mark.asyncio
+    async def test_process_range_matches_monthly_processing(self, test_session, test_data_factory):
+        """Test that processing a range of months matches processing each month separately"""
+        range_engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(range_engine)
+        months = [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+        with Session(range_engine) as range_session:
+            for session in (test_session, range_session):
+                self._create_contract_with_active_period(session, test_data_factory, "Client A", 3000.0)
+                self._create_contract_with_active_period(session, test_data_factory, "Client B", 4500.0)
+
+            for month in months:
+                await ContractAccrualProcessor(test_session).process_all_contracts(month)
+
+            range_processor = ContractAccrualProcessor(range_session)
+            with patch.object(range_processor, '_load_service_contracts',
+                              wraps=range_processor._load_service_contracts) as mock_load:
+                result = await range_processor.process_range(date(2024, 1, 15), date(2024, 3, 1))
+
+            # Contracts and their relations are loaded once for the whole range
+            mock_load.assert_called_once()
+            assert [m['period_start_date'] for m in result['months']] == months
+            assert result['successful'] == 6
+
+            for session in (test_session, range_session):
+                session.expire_all()
+
+            def accruals(session):
+                return sorted(
+                    (ap.contract_accrual.contract_id, ap.accrual_date, round(ap.accrued_amount, 2))
+                    for ap in session.query(AccruedPeriod).all())
+
+            def contract_accruals(session):
+                return sorted(
+                    (ca.contract_id, round(ca.total_amount_accrued, 2), ca.accrual_status)
+                    for ca in session.query(ContractAccrual).all())
+
+            assert accruals(range_session) == accruals(test_session)
+            assert len(accruals(range_session)) == 6
+            assert contract_accruals(range_session) == contract_accruals(test_session)
+
+    def _rollup_rows(self, session):
+        return sorted(
+            (r.month, r.service_id, r.contract_status, round(r.accrued_amount, 2), r.accrued_periods_count)
+            for r in session.query(AccrualMonthlyRollup).all()
+            if r.accrued_periods_count)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("unit_of_work", [False, True])
+    async def test_monthly_rollup_maintained_by_processor(self, processor, test_session, test_data_factory, unit_of_work):
+        """Test that the processor keeps the monthly rollup in line with a full rebuild"""
+        contract = self._create_contract_with_active_period(test_session, test_data_factory, "Client A", 3000.0)
+        self._create_contract_with_active_period(test_session, test_data_factory, "Client B", 4500.0)
+        # Client A period ends in March, closing the contract
+        contract.periods[0].status = ServicePeriodStatus.ENDED
+        test_session.commit()
+
+        for month in [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]:
+            await processor.process_all_contracts(month, unit_of_work=unit_of_work)
+
+        test_session.expire_all()
+        incremental = self._rollup_rows(test_session)
+        assert test_session.get(ServiceContract, contract.id).status == ServiceContractStatus.CLOSED
+        # Client A amounts moved from ACTIVE to CLOSED
+        assert [row[2] for row in incremental if row[1] == contract.service_id] == [ServiceContractStatus.CLOSED] * 3
+        assert sum(row[3] for row in incremental if row[1] == contract.service_id) == 3000.0
+        assert sum(row[4] for row in incremental) == 6
+
+        AccrualRollupService(test_session).rebuild()
+        assert self._rollup_rows(test_session) == incremental
+
+    def test_monthly_rollup_moved_on_contract_status_update(self, test_session, test_data_factory):
+        """Test that updating a contract status moves its amounts in the rollup"""
+        contract = self._create_contract_with_active_period(test_session, test_data_factory, "Client A", 3000.0)
+        contract_accrual = ContractAccrual(
+            contract_id=contract.id,
+            total_amount_to_accrue=3000.0,
+            remaining_amount_to_accrue=2000.0,
+            total_sessions_to_accrue=60,
+            total_sessions_accrued=20,
+            sessions_remaining_to_accrue=40
+        )
+        test_session.add(contract_accrual)
+        test_session.commit()
+        test_session.add(AccruedPeriod(
+            contract_accrual_id=contract_accrual.id,
+            accrual_date=date(2024, 1, 1),
+            accrued_amount=1000.0,
+            accrual_portion=0.33,
+            status="ACTIVE",
+            sessions_in_period=20,
+            total_contract_amount=3000.0
+        ))
+        test_session.commit()
+        AccrualRollupService(test_session).rebuild()
+
+        ServiceContractService(test_session).update_contract_status(
+            contract.id, ServiceContractUpdate(status=ServiceContractStatus.CANCELED))
+
+        assert self._rollup_rows(test_session) == [
+            (date(2024, 1, 1), contract.service_id, ServiceContractStatus.CANCELED, 1000.0, 1)]
+        assert AccrualReportsService(test_session).get_monthly_accruals(2024)['total_year_amount'] == 1000.0
+
+    def test_monthly_rollup_concurrent_writers_add_up(self, test_engine, test_session, test_data_factory):
+        """Test that writers incrementing the same new rollup row in parallel add up instead of conflicting"""
+        contract = self._create_contract_with_active_period(test_session, test_data_factory, "Client A", 3000.0)
+        service_id, contract_status = contract.service_id, contract.status
+
+        def accrued_period(amount):
+            return AccruedPeriod(accrual_date=date(2024, 1, 1), accrued_amount=amount)
+
+        with Session(test_engine) as first, Session(test_engine) as second:
+            AccrualRollupService(first).add_accrued_periods(contract, [accrued_period(1000.0)])
+            AccrualRollupService(second).add_accrued_periods(contract, [accrued_period(500.0)])
+            first.commit()
+            second.commit()
+
+        test_session.expire_all()
+        assert self._rollup_rows(test_session) == [
+            (date(2024, 1, 1), service_id, contract_status, 1500.0, 2)]
+
+    @pytest.mark.asyncio
+    async def test_process_range_invalid_range(self, processor):
+        """Test that the start month must not be after the end month"""
+        with pytest.raises(ValueError):
+            await processor.process_range(date(2024, 3, 1), date(2024, 1, 1))
+
+    @pytest.mark.asyncio
+    async def test_unit_of_work_failed_contract_rolls_back_alone(self, processor, test_session, test_data_factory):
+        """Test that a failing contract in unit-of-work mode does not affect the others"""
+        ok_contract = self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client OK", 3000.0)
+        failing_contract = self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client KO", 4500.0)
+
+        original_portion = processor._calculate_monthly_portion
+
+        def failing_portion(contract_accrual, period, target_month):
+            if contract_accrual.contract_id == failing_contract.id:
+                raise Exception("Simulated failure")
+            return original_portion(contract_accrual, period, target_month)
+
+        with patch.object(processor, '_calculate_monthly_portion', side_effect=failing_portion):
+            result = await processor.process_all_contracts(date(2024, 1, 1), unit_of_work=True)
+
+        assert result['successful'] == 1
+        assert result['failed'] == 1
+
+        test_session.expire_all()
+        accruals_by_contract = {
+            ca.contract_id: ca for ca in test_session.query(ContractAccrual).all()}
+        # The failing contract accrual creation was rolled back with its savepoint
+        assert failing_contract.id not in accruals_by_contract
+        assert accruals_by_contract[ok_contract.id].total_amount_accrued > 0
+        assert test_session.query(AccruedPeriod).count() == 1
+
+    @pytest.mark.asyncio
+    async def test_db_error_fails_only_its_contract(self, processor, test_session, test_data_factory):
+        """Test that a contract failing with a DB error is rolled back and the next ones are processed"""
+        failing_contract = self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client KO", 4500.0)
+        ok_contract = self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client OK", 3000.0)
+
+        original_portion = processor._calculate_monthly_portion
+
+        def failing_portion(contract_accrual, period, target_month):
+            if contract_accrual.contract_id == failing_contract.id:
+                # A period without contract violates NOT NULL on flush
+                test_session.add(ServicePeriod(
+                    start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), status=ServicePeriodStatus.ACTIVE))
+                test_session.flush()
+            return original_portion(contract_accrual, period, target_month)
+
+        with patch.object(processor, '_calculate_monthly_portion', side_effect=failing_portion):
+            result = await processor.process_all_contracts(date(2024, 1, 1), max_concurrency=1)
+
+        assert result['failed'] == 1
+        assert result['successful'] == 1
+        results = {contract_result.contract_id: contract_result for contract_result in result['results']}
+        assert results[failing_contract.id].status == ProcessingStatus.FAILED
+        test_session.expire_all()
+        accrued_contract_ids = {ap.contract_accrual.contract_id for ap in test_session.query(AccruedPeriod).all()}
+        assert accrued_contract_ids == {ok_contract.id}
+
+    @pytest.mark.asyncio
+    async def test_rollup_error_fails_only_its_contract(self, processor, test_session, test_data_factory):
+        """Test that a rollup error turns its contract into a FAILED result"""
+        failing_contract = self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client KO", 4500.0)
+        self._create_contract_with_active_period(
+            test_session, test_data_factory, "Client OK", 3000.0)
+
+        original_add = processor._rollup_service.add_accrued_periods
+
+        def failing_add(contract, accrued_periods):
+            if contract.id == failing_contract.id:
+                raise Exception("Rollup failure")
+            return original_add(contract, accrued_periods)
+
+        with patch.object(processor._rollup_service, 'add_accrued_periods', side_effect=failing_add):
+            result = await processor.process_all_contracts(date(2024, 1, 1), max_concurrency=1)
+
+        assert result['failed'] == 1
+        assert result['successful'] == 1
+        failed = [contract_result for contract_result in result['results']
+                  if contract_result.status == ProcessingStatus.FAILED]
+        assert failed[0].contract_id == failing_contract.id
+        assert "Rollup failure" in failed[0].message
+
+
 class TestAccrualReportsService:
     """Test AccrualReportsService class"""
 
@@ -831,6 +1179,252 @@ class TestAccrualReportsService:
             client_names_in_export) == 4, f"Expected 4 contracts, found {len(client_names_in_export)}: {client_names_in_export}"
 
 
+    def test_csv_export_is_streamed_in_chunks(self, reports_service, test_session, test_data_factory):
+        """Test that the streamed CSV export matches the export data and is written in chunks"""
+        for i, name in enumerate(["Client A", "Client B", "Client C"]):
+            client = test_data_factory.create_client(test_session, name=name)
+            service = test_data_factory.create_service(test_session, name=f"Service {name}")
+            contract = ServiceContract(
+                client_id=client.id,
+                service_id=service.id,
+                contract_date=date(2024, 1, 1),
+                contract_amount=3000.0,
+                status=ServiceContractStatus.ACTIVE
+            )
+            test_session.add(contract)
+            test_session.commit()
+            contract_accrual = ContractAccrual(
+                contract_id=contract.id,
+                total_amount_to_accrue=3000.0,
+                remaining_amount_to_accrue=2000.0 - i,
+                total_sessions_to_accrue=60,
+                total_sessions_accrued=20,
+                sessions_remaining_to_accrue=40,
+                accrual_status=ContractAccrualStatus.ACTIVE
+            )
+            test_session.add(contract_accrual)
+            test_session.commit()
+            test_session.add(AccruedPeriod(
+                contract_accrual_id=contract_accrual.id,
+                accrual_date=date(2024, 1, 1),
+                accrued_amount=1000.0 + i,
+                accrual_portion=0.33,
+                status="ACTIVE",
+                sessions_in_period=20,
+                total_contract_amount=3000.0
+            ))
+            test_session.commit()
+
+        export_data = reports_service.get_accruals_export(date(2024, 1, 1), date(2024, 2, 29))
+        expected = StringIO()
+        writer = csv.DictWriter(expected, fieldnames=export_data["headers"])
+        writer.writeheader()
+        writer.writerows(export_data["data"])
+
+        with patch('src.api.accruals.services.accrual_reports_service.AccrualExportConstants.EXPORT_BATCH_SIZE', 1):
+            chunks = list(reports_service.iter_accruals_csv(date(2024, 1, 1), date(2024, 2, 29)))
+
+        # Header with the first row, one chunk per following row and the (empty) tail
+        assert len(chunks) == 4
+        assert "".join(chunks) == expected.getvalue()
+        assert "January 2024" in chunks[0] and "1001.0" in "".join(chunks)
+
+    def test_csv_export_endpoint_streams_with_own_session(self, reports_service, test_engine, test_session, test_data_factory):
+        """Test that the export endpoint streams the whole CSV with a session it closes"""
+        from fastapi.testclient import TestClient
+        from src.main import app
+
+        client = test_data_factory.create_client(test_session, name="Client A")
+        service = test_data_factory.create_service(test_session)
+        contract = ServiceContract(
+            client_id=client.id,
+            service_id=service.id,
+            contract_date=date(2024, 1, 1),
+            contract_amount=3000.0,
+            status=ServiceContractStatus.ACTIVE
+        )
+        test_session.add(contract)
+        test_session.commit()
+        expected = "".join(reports_service.iter_accruals_csv(date(2024, 1, 1), date(2024, 2, 29)))
+
+        closed_sessions = []
+
+        class RecordingSession(Session):
+            def close(self):
+                closed_sessions.append(self)
+                super().close()
+
+        with patch('src.api.accruals.endpoints.accruals.engine', test_engine), \
+                patch('src.api.accruals.endpoints.accruals.SQLModelSession', RecordingSession):
+            response = TestClient(app).get(
+                "/api/accruals/export/csv", params={"start_date": "2024-01-01", "end_date": "2024-02-29"})
+
+        assert response.status_code == 200
+        assert response.text == expected
+        assert "Client A" in response.text
+        assert len(closed_sessions) == 1
+
+    def test_csv_export_redistributes_null_period_accruals(self, reports_service, test_session, test_data_factory):
+        """Test that NULL-period accruals are moved to their periods without per-accrual queries"""
+        contract_accruals = []
+        for name in ["Client A", "Client B"]:
+            client = test_data_factory.create_client(test_session, name=name)
+            service = test_data_factory.create_service(test_session, name=f"Service {name}")
+            contract = ServiceContract(
+                client_id=client.id,
+                service_id=service.id,
+                contract_date=date(2024, 1, 1),
+                contract_amount=3000.0,
+                status=ServiceContractStatus.ACTIVE
+            )
+            test_session.add(contract)
+            test_session.commit()
+            for period_name, start, end in [("P1", date(2024, 1, 1), date(2024, 1, 31)),
+                                            ("P2", date(2024, 2, 1), date(2024, 2, 29))]:
+                test_session.add(ServicePeriod(
+                    contract_id=contract.id, name=f"{name} {period_name}", start_date=start, end_date=end,
+                    status=ServicePeriodStatus.ENDED))
+            contract_accrual = ContractAccrual(
+                contract_id=contract.id,
+                total_amount_to_accrue=3000.0,
+                remaining_amount_to_accrue=1000.0,
+                total_sessions_to_accrue=60,
+                total_sessions_accrued=40,
+                sessions_remaining_to_accrue=20,
+                accrual_status=ContractAccrualStatus.ACTIVE
+            )
+            test_session.add(contract_accrual)
+            test_session.commit()
+            contract_accruals.append(contract_accrual)
+            # Inside P1, and after all periods ended
+            for accrual_date, amount in [(date(2024, 1, 1), 500.0), (date(2024, 3, 1), 1500.0)]:
+                test_session.add(AccruedPeriod(
+                    contract_accrual_id=contract_accrual.id,
+                    service_period_id=None,
+                    accrual_date=accrual_date,
+                    accrued_amount=amount,
+                    accrual_portion=1.0,
+                    status="ENDED",
+                    sessions_in_period=20,
+                    total_contract_amount=3000.0
+                ))
+            test_session.commit()
+
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(test_session.bind, "before_cursor_execute", count_statement)
+        try:
+            accruals_by_period = reports_service._get_accruals_by_contract_period(
+                date(2024, 1, 1), date(2024, 3, 31))
+        finally:
+            event.remove(test_session.bind, "before_cursor_execute", count_statement)
+
+        # Accrued periods, contract accruals and service periods
+        assert len(statements) == 3
+        for contract_accrual in contract_accruals:
+            periods = {p.name: p.id for p in test_session.query(ServicePeriod).filter(
+                ServicePeriod.contract_id == contract_accrual.contract_id)}
+            p1, p2 = sorted(periods.items())
+            assert accruals_by_period[(contract_accrual.id, p1[1])] == {"2024-01": 500.0}
+            assert accruals_by_period[(contract_accrual.id, p2[1])] == {"2024-03": 1500.0}
+            assert accruals_by_period[(contract_accrual.id, None)] == {}
+
+    def _python_dashboard_summary(self, session, year=None):
+        """Reference implementation of get_dashboard_summary aggregating in Python"""
+        contracts_query = (
+            session.query(ServiceContract, ContractAccrual)
+            .outerjoin(ServiceContract.contract_accrual)
+            .filter(ServiceContract.status.in_([
+                ServiceContractStatus.ACTIVE,
+                ServiceContractStatus.CANCELED,
+                ServiceContractStatus.CLOSED
+            ]))
+        )
+        if year is not None:
+            year_start = date(year, 1, 1)
+            year_end = date(year, 12, 31)
+            contracts_with_accruals_in_year = (
+                session.query(AccruedPeriod.contract_accrual_id)
+                .filter(AccruedPeriod.accrual_date >= year_start, AccruedPeriod.accrual_date <= year_end)
+                .distinct()
+            )
+            contracts_query = contracts_query.filter(
+                ((ServiceContract.contract_date >= year_start) & (ServiceContract.contract_date <= year_end)) |
+                ContractAccrual.id.in_(contracts_with_accruals_in_year)
+            )
+        contracts = contracts_query.all()
+
+        accrued_amount = 0.0
+        pending_amount = 0.0
+        for contract, contract_accrual in contracts:
+            if contract_accrual:
+                accrued_amount += contract_accrual.total_amount_to_accrue - contract_accrual.remaining_amount_to_accrue
+                pending_amount += contract_accrual.remaining_amount_to_accrue
+            else:
+                pending_amount += contract.contract_amount
+        return {
+            "total_contracts": len(contracts),
+            "total_amount": sum(contract.contract_amount for contract, _ in contracts),
+            "accrued_amount": accrued_amount,
+            "pending_amount": pending_amount
+        }
+
+    def test_dashboard_summary_matches_python_aggregation(self, reports_service, test_session, test_data_factory):
+        """Test that the SQL dashboard summary matches the Python aggregation on a generated dataset"""
+        rng = random.Random(42)
+        services = [test_data_factory.create_service(test_session, name=f"Service {i}") for i in range(3)]
+        clients = [test_data_factory.create_client(test_session, name=f"Client {i}") for i in range(10)]
+
+        for i in range(60):
+            contract_amount = rng.choice([0.0, -250.0, round(rng.uniform(100, 9000), 2)])
+            contract = ServiceContract(
+                client_id=rng.choice(clients).id,
+                service_id=rng.choice(services).id,
+                contract_date=date(rng.choice([2022, 2023, 2024]), rng.randint(1, 12), rng.randint(1, 28)),
+                contract_amount=contract_amount,
+                status=rng.choice(list(ServiceContractStatus))
+            )
+            test_session.add(contract)
+            test_session.commit()
+            if rng.random() < 0.3:
+                continue
+
+            remaining = round(contract_amount * rng.random(), 2)
+            contract_accrual = ContractAccrual(
+                contract_id=contract.id,
+                total_amount_to_accrue=contract_amount,
+                remaining_amount_to_accrue=remaining,
+                total_amount_accrued=contract_amount - remaining,
+                total_sessions_to_accrue=60,
+                total_sessions_accrued=30,
+                sessions_remaining_to_accrue=30,
+                accrual_status=rng.choice(list(ContractAccrualStatus))
+            )
+            test_session.add(contract_accrual)
+            test_session.commit()
+            for _ in range(rng.randint(0, 3)):
+                test_session.add(AccruedPeriod(
+                    contract_accrual_id=contract_accrual.id,
+                    accrual_date=date(rng.choice([2022, 2023, 2024, 2025]), rng.randint(1, 12), 1),
+                    accrued_amount=round(rng.uniform(0, 500), 2),
+                    accrual_portion=0.1,
+                    status="ACTIVE",
+                    sessions_in_period=5,
+                    total_contract_amount=contract_amount
+                ))
+            test_session.commit()
+
+        for year in [None, 2022, 2023, 2024, 2025, 2030]:
+            expected = self._python_dashboard_summary(test_session, year)
+            summary = reports_service.get_dashboard_summary(year)
+
+            assert summary["total_contracts"] == expected["total_contracts"]
+            for key in ["total_amount", "accrued_amount", "pending_amount"]:
+                assert summary[key] == pytest.approx(expected[key], abs=1e-6), (year, key)
+
 class TestAccrualModels:
     """Test accrual-related models"""
 
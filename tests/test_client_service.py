@@ -1,10 +1,12 @@
 import pytest
 from unittest.mock import Mock, patch
 from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
 
 from src.api.clients.services.client_service import ClientService
 from src.api.clients.models.client import Client, ClientExternalId
 from src.api.clients.schemas.client import ClientCreate, ClientUpdate, ClientExternalIdCreate
+from src.api.common.utils.encryption import compute_blind_index
 
 
 class TestClientService:
@@ -106,6 +108,20 @@ class TestClientService:
         assert result is not None
         assert result.id == client2.id
 
+    def test_get_client_by_identifier_uses_blind_index(self, test_session, test_data_factory):
+        """Test identifier lookup relies on the blind index instead of decrypting"""
+        service = ClientService(test_session)
+        created_client = test_data_factory.create_client(test_session, identifier="indexed-id")
+
+        assert created_client.identifier_hash == compute_blind_index("indexed-id")
+
+        with patch('src.api.clients.models.client.decrypt_data') as mock_decrypt:
+            result = service.get_client_by_identifier("indexed-id")
+
+        assert result is not None
+        assert result.id == created_client.id
+        mock_decrypt.assert_not_called()
+
     def test_get_clients_default_pagination(self, test_session, test_data_factory):
         """Test getting clients with default pagination"""
         service = ClientService(test_session)
@@ -176,6 +192,29 @@ class TestClientService:
         assert client3.id in client_ids
         assert client2.id not in client_ids
 
+    def test_iter_clients_with_no_external_id_in_batches(self, test_session, test_data_factory):
+        """Test clients without external ID are streamed in batches of IDs and ciphertexts"""
+        service = ClientService(test_session)
+        clients = [
+            test_data_factory.create_client(test_session, name=f"Client {i}", identifier=f"id-{i}")
+            for i in range(5)
+        ]
+        service.add_external_id(clients[1].id, ClientExternalIdCreate(system="notion", external_id="n-1"))
+        service.add_external_id(clients[2].id, ClientExternalIdCreate(system="holded", external_id="h-2"))
+
+        batches = []
+        for batch in service.iter_clients_with_no_external_id("notion", batch_size=2):
+            batches.append(batch)
+            # Linking the clients of a batch does not skip the next ones
+            for client_id, _ in batch:
+                service.add_external_id(client_id, ClientExternalIdCreate(system="notion", external_id=f"page-{client_id}"))
+
+        assert [[client_id for client_id, _ in batch] for batch in batches] == [
+            [clients[0].id, clients[2].id], [clients[3].id, clients[4].id]
+        ]
+        assert batches[0][0][1] == clients[0].encrypted_identifier
+        assert list(service.iter_clients_with_no_external_id("notion")) == []
+
     def test_update_client_success(self, test_session, test_data_factory):
         """Test successful client update"""
         service = ClientService(test_session)
@@ -199,6 +238,18 @@ class TestClientService:
         assert result is not None
         assert result.identifier == "new-identifier"
 
+    def test_update_client_identifier_updates_blind_index(self, test_session, test_data_factory):
+        """Test updating the identifier keeps the blind index in sync"""
+        service = ClientService(test_session)
+        created_client = test_data_factory.create_client(test_session, identifier="old-identifier")
+
+        service.update_client(created_client.id, ClientUpdate(identifier="new-identifier"))
+
+        assert service.get_client_by_identifier("old-identifier") is None
+        result = service.get_client_by_identifier("new-identifier")
+        assert result is not None
+        assert result.id == created_client.id
+
     def test_update_client_not_found(self, test_session):
         """Test updating non-existent client"""
         service = ClientService(test_session)
@@ -316,6 +367,68 @@ class TestClientService:
         
         assert result is None
 
+    def test_get_client_by_external_id_uses_blind_index(self, test_session, test_data_factory):
+        """Test external ID lookup relies on the blind index instead of decrypting"""
+        service = ClientService(test_session)
+        created_client = test_data_factory.create_client(test_session)
+        added_external_id = service.add_external_id(
+            created_client.id, ClientExternalIdCreate(system="holded", external_id="ext-123"))
+
+        assert added_external_id.external_id_hash == compute_blind_index("ext-123")
+
+        with patch('src.api.clients.models.client.decrypt_data') as mock_decrypt:
+            result = service.get_client_by_external_id("holded", "ext-123")
+
+        assert result is not None
+        assert result.id == created_client.id
+        mock_decrypt.assert_not_called()
+
+    def test_add_external_id_duplicate_in_system(self, test_session, test_data_factory):
+        """Test that an external ID can only be linked once per system"""
+        service = ClientService(test_session)
+        client1 = test_data_factory.create_client(test_session, name="Client 1")
+        client2 = test_data_factory.create_client(test_session, name="Client 2")
+        service.add_external_id(client1.id, ClientExternalIdCreate(system="holded", external_id="ext-123"))
+
+        with pytest.raises(IntegrityError):
+            service.add_external_id(client2.id, ClientExternalIdCreate(system="holded", external_id="ext-123"))
+
+    def test_resolve_external_ids(self, test_session, test_data_factory):
+        """Test resolving many external IDs to clients at once"""
+        service = ClientService(test_session)
+        client1 = test_data_factory.create_client(test_session, name="Client 1")
+        client2 = test_data_factory.create_client(test_session, name="Client 2")
+        service.add_external_id(client1.id, ClientExternalIdCreate(system="holded", external_id="ext-1"))
+        service.add_external_id(client2.id, ClientExternalIdCreate(system="holded", external_id="ext-2"))
+        service.add_external_id(client2.id, ClientExternalIdCreate(system="fourgeeks", external_id="ext-3"))
+
+        result = service.resolve_external_ids("holded", ["ext-1", "ext-2", "ext-3", "ext-1", None])
+
+        assert set(result.keys()) == {"ext-1", "ext-2"}
+        assert result["ext-1"].id == client1.id
+        assert result["ext-2"].id == client2.id
+
+    def test_resolve_external_ids_empty(self, test_session):
+        """Test resolving an empty list of external IDs"""
+        service = ClientService(test_session)
+
+        assert service.resolve_external_ids("holded", []) == {}
+
+    def test_create_clients_with_external_ids(self, test_session):
+        """Test creating several clients with their external IDs in one transaction"""
+        service = ClientService(test_session)
+
+        with patch.object(test_session, "commit", wraps=test_session.commit) as commit:
+            result = service.create_clients_with_external_ids("holded", {
+                "ext-1": ClientCreate(identifier="one@example.com", name="Client 1"),
+                "ext-2": ClientCreate(identifier="two@example.com", name="Client 2")
+            })
+
+        assert commit.call_count == 1
+        assert result["ext-1"].name == "Client 1"
+        assert service.get_client_by_external_id("holded", "ext-1").id == result["ext-1"].id
+        assert service.get_client_by_external_id("holded", "ext-2").identifier == "two@example.com"
+
     def test_get_client_external_id_success(self, test_session, test_data_factory):
         """Test getting client external ID"""
         service = ClientService(test_session)
@@ -415,4 +528,88 @@ class TestClientService:
         )
         
         unicode_result = service.create_client(unicode_data)
-        assert unicode_result.identifier == "unicode-测试-🌍" 
\ No newline at end of file
+        assert unicode_result.identifier == "unicode-测试-🌍" 
+
+    def test_get_clients_sorted_and_filtered_by_contracts(self, test_session, test_data_factory):
+        """Test clients are sorted by missing external IDs and name, excluding clients without active contracts"""
+        from datetime import date
+        from src.api.services.models.service_contract import ServiceContract
+        from src.api.common.constants.services import ServiceContractStatus
+        service = ClientService(test_session)
+        linked = test_data_factory.create_client(test_session, name="alice", identifier="id-1")
+        service.add_external_id(linked.id, ClientExternalIdCreate(system="holded", external_id="h-1"))
+        service.add_external_id(linked.id, ClientExternalIdCreate(system="notion", external_id="n-1"))
+        unlinked = test_data_factory.create_client(test_session, name="Bob", identifier="id-2")
+        active = test_data_factory.create_client(test_session, name="carol", identifier="id-3")
+        canceled = test_data_factory.create_client(test_session, name="Dave", identifier="id-4")
+        catalogue_service = test_data_factory.create_service(test_session)
+        for client, status in ((active, ServiceContractStatus.ACTIVE), (canceled, ServiceContractStatus.CANCELED)):
+            test_session.add(ServiceContract(
+                client_id=client.id,
+                service_id=catalogue_service.id,
+                contract_date=date(2024, 1, 1),
+                contract_amount=1000.00,
+                status=status
+            ))
+        test_session.commit()
+
+        result = service.get_clients()
+
+        assert [client.name for client in result] == ["Bob", "carol", "alice"]
+
+    def test_get_clients_page_with_cursor(self, test_session, test_data_factory):
+        """Test keyset pagination returns every client once, in order"""
+        service = ClientService(test_session)
+        for i in range(7):
+            client = test_data_factory.create_client(
+                test_session, name=f"Client {i % 3}", identifier=f"id-{i}")
+            if i % 2:
+                service.add_external_id(client.id, ClientExternalIdCreate(system="holded", external_id=f"h-{i}"))
+
+        pages = []
+        clients, cursor = service.get_clients_page(limit=3)
+        pages.append(clients)
+        while cursor:
+            clients, cursor = service.get_clients_page(limit=3, cursor=cursor)
+            pages.append(clients)
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [client.id for page in pages for client in page] == [client.id for client in service.get_clients()]
+
+    def test_get_clients_page_invalid_cursor(self, test_session):
+        """Test an invalid cursor is rejected"""
+        service = ClientService(test_session)
+
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            service.get_clients_page(cursor="not-a-cursor")
+
+    def test_get_clients_missing_external_id_projection_skips_decryption(self, test_session, test_data_factory):
+        """Test identifiers are not decrypted when not requested"""
+        from src.api.common.utils import encryption
+        service = ClientService(test_session)
+        client = test_data_factory.create_client(test_session, name="Client", identifier="client@example.com")
+        service.add_external_id(client.id, ClientExternalIdCreate(system="holded", external_id="h-1"))
+
+        with patch.object(encryption, "_decrypt", wraps=encryption._decrypt) as decrypt:
+            result = service.get_clients_missing_external_id({"id", "system"})
+
+        assert decrypt.call_count == 0
+        assert sorted(result, key=lambda row: row["system"]) == [
+            {"id": client.id, "system": "fourgeeks"},
+            {"id": client.id, "system": "notion"}
+        ]
+
+        with patch.object(encryption, "_decrypt", wraps=encryption._decrypt) as decrypt:
+            result = service.get_clients_missing_external_id()
+
+        # One decryption per client, not per missing system
+        assert decrypt.call_count == 1
+        assert {row["identifier"] for row in result} == {"client@example.com"}
+
+    def test_project_clients(self, test_session, test_data_factory):
+        """Test clients are projected to the requested fields"""
+        service = ClientService(test_session)
+        client = test_data_factory.create_client(test_session, name="Client", identifier="client@example.com")
+
+        assert service.project_clients([client], {"id", "name"}) == [{"id": client.id, "name": "Client"}]
+        assert service.project_clients([client], {"identifier"}) == [{"identifier": "client@example.com"}]
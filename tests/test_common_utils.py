@@ -11,7 +11,7 @@ from src.api.common.utils.datetime import (
     get_month_start,
     get_month_end
 )
-from src.api.common.utils.encryption import encrypt_data, decrypt_data
+from src.api.common.utils.encryption import encrypt_data, decrypt_data, compute_blind_index
 from src.api.common.utils.database import (
     get_database_url,
     _get_database_url_from_env_vars
@@ -215,6 +215,67 @@ class TestEncryptionUtils:
         assert decrypt_data(encrypted2) == data
 
 
+    def test_blind_index_is_deterministic(self):
+        """Test that the blind index is stable for the same value"""
+        assert compute_blind_index("test data") == compute_blind_index("test data")
+        assert compute_blind_index("test data") != compute_blind_index("other data")
+        assert compute_blind_index("test data") != "test data"
+
+    def test_blind_index_empty_string(self):
+        """Test blind index of empty string"""
+        assert compute_blind_index("") == ""
+
+    def test_decryption_cache_decrypts_each_ciphertext_once(self):
+        """Test that values decrypted within a cache scope are reused"""
+        from src.api.common.utils import encryption
+        encrypted = encrypt_data("test data")
+
+        with patch.object(encryption, "_decrypt", wraps=encryption._decrypt) as decrypt:
+            with encryption.decryption_cache():
+                assert decrypt_data(encrypted) == "test data"
+                assert decrypt_data(encrypted) == "test data"
+            assert decrypt_data(encrypted) == "test data"
+
+        # Once in the cache scope and once after it
+        assert decrypt.call_count == 2
+
+    def test_decryption_cache_evicts_least_recently_used(self):
+        """Test that the cache keeps at most DECRYPTION_CACHE_SIZE values"""
+        from src.api.common.utils import encryption
+        values = [encrypt_data(f"value-{i}") for i in range(3)]
+
+        with patch.object(encryption, "DECRYPTION_CACHE_SIZE", 2), encryption.decryption_cache():
+            for value in values:
+                decrypt_data(value)
+            cache = encryption._decryption_cache.get()
+
+            assert list(cache) == values[1:]
+
+    def test_decrypt_many_keeps_order(self):
+        """Test bulk decryption returns the values in order, decrypting duplicates once"""
+        from src.api.common.utils import encryption
+        first, second = encrypt_data("first"), encrypt_data("second")
+
+        with patch.object(encryption, "_decrypt", wraps=encryption._decrypt) as decrypt:
+            result = encryption.decrypt_many([first, second, first, ""])
+
+        assert result == ["first", "second", "first", ""]
+        assert decrypt.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_decrypt_many_async_fills_cache(self):
+        """Test bulk decryption in the thread pool fills the request cache"""
+        from src.api.common.utils import encryption
+        values = [encrypt_data(f"value-{i}") for i in range(5)]
+
+        with patch.object(encryption, "DECRYPTION_CHUNK_SIZE", 2), encryption.decryption_cache():
+            result = await encryption.decrypt_many_async(values + [values[0]])
+            cache = encryption._decryption_cache.get()
+
+            assert result == [f"value-{i}" for i in range(5)] + ["value-0"]
+            assert set(cache) == set(values)
+
+
 class TestDatabaseUtils:
     """Test database utility functions"""
 
@@ -325,4 +386,188 @@ class TestDatabaseUtils:
         
         assert engine is not None
         # In test environment, echo should be True (since ENV != "production")
-        assert engine.echo is True 
\ No newline at end of file
+        assert engine.echo is True 
+
+class TestHttpClientsUtils:
+    """Test application-scoped HTTP clients"""
+
+    @pytest.fixture
+    def holded_config(self):
+        from src.api.integrations.holded.config import HoldedConfig
+        with patch('src.api.integrations.holded.config.os.getenv') as mock_getenv:
+            mock_getenv.return_value = "test_api_key"
+            yield HoldedConfig()
+
+    @pytest.mark.asyncio
+    async def test_clients_share_app_scoped_pool(self, holded_config):
+        """Test that integration clients reuse the application-scoped clients"""
+        from src.api.common.utils import http_clients
+        from src.api.integrations.holded.client import HoldedClient
+        from src.api.integrations.fourgeeks.client import FourGeeksClient, FourGeeksCredentials
+
+        http_clients.open_http_clients()
+        try:
+            first = HoldedClient(holded_config)
+            second = HoldedClient(holded_config)
+            fourgeeks = FourGeeksClient(FourGeeksCredentials(username="user", password="pass"))
+
+            assert first._client is second._client is http_clients.get_async_client()
+            assert fourgeeks._client is http_clients.get_sync_client()
+
+            # Closing an integration client leaves the shared pool open
+            await first.aclose()
+            fourgeeks.close()
+            assert not http_clients.get_async_client().is_closed
+            assert not http_clients.get_sync_client().is_closed
+        finally:
+            await http_clients.close_http_clients()
+
+        assert http_clients.get_async_client() is None
+        assert http_clients.get_sync_client() is None
+
+    @pytest.mark.asyncio
+    async def test_clients_own_pool_without_app(self, holded_config):
+        """Test that integration clients create and close their own client outside the app"""
+        from src.api.integrations.holded.client import HoldedClient
+
+        client = HoldedClient(holded_config)
+        assert client._owns_client is True
+
+        await client.aclose()
+        assert client._client.is_closed
+
+    def test_app_lifespan_opens_and_closes_clients(self):
+        """Test that the application opens the clients on startup and closes them on shutdown"""
+        from fastapi.testclient import TestClient
+        from src.api.common.utils import http_clients
+        from src.main import app
+
+        with TestClient(app):
+            shared_client = http_clients.get_async_client()
+            assert shared_client is not None
+            assert http_clients.get_sync_client() is not None
+
+        assert shared_client.is_closed
+        assert http_clients.get_async_client() is None
+
+
+class TestHttpTransportUtils:
+    """Test rate limiting and retries of the integrations HTTP transport"""
+
+    HOST = "api.notion.com"
+
+    @pytest.fixture(autouse=True)
+    def reset_stats(self):
+        from src.api.common.utils.http_transport import reset_http_stats
+        reset_http_stats()
+        yield
+        reset_http_stats()
+
+    @staticmethod
+    def _responses_handler(responses):
+        import httpx
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return handler, requests
+
+    def test_token_bucket_allows_burst_then_waits(self):
+        """Test that the token bucket allows a burst and then spaces requests"""
+        from src.api.common.utils.http_transport import TokenBucket
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_async_transport_retries_transient_errors(self):
+        """Test that idempotent requests are retried on transient errors"""
+        import httpx
+        from src.api.common.utils.http_transport import AsyncRetryTransport, get_http_stats
+        handler, requests = self._responses_handler([
+            httpx.Response(503), httpx.ConnectError("Connection reset"), httpx.Response(200, json={"ok": True})
+        ])
+
+        with patch('src.api.common.utils.http_transport.asyncio.sleep') as mock_sleep:
+            async with httpx.AsyncClient(transport=AsyncRetryTransport(httpx.MockTransport(handler))) as client:
+                response = await client.get(f"https://{self.HOST}/v1/users/me")
+
+        assert response.json() == {"ok": True}
+        assert len(requests) == 3
+        assert mock_sleep.call_count == 2
+        stats = get_http_stats()[self.HOST]
+        assert stats["requests"] == 3
+        assert stats["retries"] == 2
+        assert stats["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_async_transport_honours_retry_after(self):
+        """Test that the Retry-After header sets the retry delay"""
+        import httpx
+        from src.api.common.utils.http_transport import AsyncRetryTransport, get_http_stats
+        handler, _ = self._responses_handler([
+            httpx.Response(429, headers={"Retry-After": "7"}), httpx.Response(200)
+        ])
+
+        with patch('src.api.common.utils.http_transport.asyncio.sleep') as mock_sleep:
+            async with httpx.AsyncClient(transport=AsyncRetryTransport(httpx.MockTransport(handler))) as client:
+                response = await client.get(f"https://{self.HOST}/v1/users/me")
+
+        assert response.status_code == 200
+        mock_sleep.assert_called_once_with(7.0)
+        assert get_http_stats()[self.HOST]["rate_limited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_async_transport_does_not_retry_post(self):
+        """Test that POST requests are only retried when marked as idempotent"""
+        import httpx
+        from src.api.common.utils.http_transport import AsyncRetryTransport, get_http_stats
+        handler, requests = self._responses_handler([
+            httpx.Response(502), httpx.Response(502), httpx.Response(200)
+        ])
+
+        with patch('src.api.common.utils.http_transport.asyncio.sleep'):
+            async with httpx.AsyncClient(transport=AsyncRetryTransport(httpx.MockTransport(handler))) as client:
+                response = await client.post(f"https://{self.HOST}/v1/pages", json={})
+                assert response.status_code == 502
+
+                response = await client.post(f"https://{self.HOST}/v1/databases/db/query", json={},
+                                             extensions={"idempotent": True})
+                assert response.status_code == 200
+
+        assert len(requests) == 3
+        assert get_http_stats()[self.HOST]["failures"] == 1
+
+    def test_sync_transport_gives_up_after_max_retries(self):
+        """Test that the last response is returned once the retries are exhausted"""
+        import httpx
+        from src.api.common.utils.http_transport import RetryTransport, get_http_stats
+        handler, requests = self._responses_handler([httpx.Response(504) for _ in range(3)])
+
+        with patch('src.api.common.utils.http_transport.time.sleep') as mock_sleep:
+            with httpx.Client(transport=RetryTransport(httpx.MockTransport(handler), max_retries=2)) as client:
+                response = client.get("https://breathecode.herokuapp.com/v1/admissions/cohort/1")
+
+        assert response.status_code == 504
+        assert len(requests) == 3
+        assert mock_sleep.call_count == 2
+        stats = get_http_stats()["breathecode.herokuapp.com"]
+        assert stats["retries"] == 2
+        assert stats["failures"] == 1
+
+    def test_retry_after_http_date(self):
+        """Test that Retry-After is also accepted as an HTTP date"""
+        import httpx
+        from email.utils import format_datetime
+        from src.api.common.utils.http_transport import _retry_after_seconds
+        retry_date = datetime.now(timezone.utc) + timedelta(seconds=30)
+        response = httpx.Response(503, headers={"Retry-After": format_datetime(retry_date, usegmt=True)})
+
+        assert 28 <= _retry_after_seconds(response) <= 30
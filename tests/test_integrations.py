@@ -1,8 +1,10 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, MagicMock, patch, AsyncMock
 import httpx
-from datetime import datetime
+from datetime import date, datetime
 from fastapi import HTTPException
+from sqlmodel import select
 
 from src.api.integrations.notion.client import NotionClient
 from src.api.integrations.holded.client import HoldedClient
@@ -155,6 +157,72 @@ class TestNotionIntegration:
             await notion_client.get_current_user()
 
 
+class TestNotionEducationalStatusSnapshot:
+    """Test the prefetched Notion educational status snapshot"""
+
+    @pytest.fixture
+    def pages(self):
+        """Notion student pages as returned by list_pages"""
+        return [
+            {
+                "id": "1a2b3c4d-0000-0000-0000-000000000001",
+                "properties": {
+                    "Email": {"email": "graduated@example.com"},
+                    "Educational Status": {"select": {"name": "Graduated"}},
+                    "Certificated At": {"date": {"start": "2024-03-15"}}
+                }
+            },
+            {
+                "id": "1a2b3c4d-0000-0000-0000-000000000002",
+                "properties": {
+                    "Email": {"email": "dropped@example.com"},
+                    "Educational Status": {"select": {"name": "Early Dropped"}},
+                    "Drop Date": {"date": {"start": "2024-02-01"}}
+                }
+            }
+        ]
+
+    def _client(self, identifier, notion_id=None):
+        client = Mock()
+        client.identifier = identifier
+        client.get_external_id.return_value = notion_id
+        return client
+
+    def test_get_by_page_id(self, pages):
+        """Test resolving a client by its Notion page ID, with or without dashes"""
+        from src.api.integrations.notion.utils import EducationalStatusSnapshot
+        snapshot = EducationalStatusSnapshot(pages)
+
+        data = snapshot.get(self._client("other@example.com", "1a2b3c4d000000000000000000000001"))
+
+        assert len(snapshot) == 2
+        assert data == {'educational_status': 'GRADUATED', 'status_change_date': date(2024, 3, 15)}
+
+    def test_get_by_email(self, pages):
+        """Test falling back to the email when the client has no Notion page ID"""
+        from src.api.integrations.notion.utils import EducationalStatusSnapshot
+        snapshot = EducationalStatusSnapshot(pages)
+
+        data = snapshot.get(self._client("dropped@example.com"))
+
+        assert data == {'educational_status': 'EARLY_DROPPED', 'status_change_date': date(2024, 2, 1)}
+        assert snapshot.get(self._client("missing@example.com")) is None
+
+    @pytest.mark.asyncio
+    async def test_load_snapshot_uses_paginated_listing(self, pages):
+        """Test that the snapshot is loaded with a single list_pages call"""
+        from src.api.integrations.notion.utils import load_educational_status_snapshot
+        with patch('src.api.integrations.notion.config.NotionConfig') as mock_config, \
+                patch('src.api.integrations.notion.client.NotionClient') as mock_client:
+            mock_config.return_value.database_id = "db-id"
+            mock_client.return_value.list_pages = AsyncMock(return_value=pages)
+            mock_client.return_value.aclose = AsyncMock()
+            snapshot = await load_educational_status_snapshot()
+
+        mock_client.return_value.list_pages.assert_awaited_once_with("db-id", date_property=None)
+        assert len(snapshot) == 2
+
+
 class TestHoldedIntegration:
     """Test Holded integration client"""
 
@@ -274,6 +342,95 @@ class TestHoldedIntegration:
         call_args = mock_get.call_args
         assert "invoice" in str(call_args)
 
+    @pytest.mark.asyncio
+    async def test_iter_documents_walks_pages(self, holded_client):
+        """Test that all pages are fetched until a partial page is received"""
+        pages = {
+            1: [{"id": "doc1"}, {"id": "doc2"}],
+            2: [{"id": "doc3"}, {"id": "doc4"}],
+            3: [{"id": "doc5"}]
+        }
+        requested_pages = []
+
+        async def list_documents(document_type, page, per_page, starttmp, endtmp):
+            requested_pages.append(page)
+            return pages.get(page, [])
+
+        with patch.object(holded_client, 'list_documents', side_effect=list_documents):
+            result = [documents async for documents in holded_client.iter_documents(per_page=2)]
+
+        assert [[d["id"] for d in documents] for documents in result] == [
+            ["doc1", "doc2"], ["doc3", "doc4"], ["doc5"]]
+        assert requested_pages == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_prefetches_next_page(self, holded_client):
+        """Test that the next page is requested before the current one is consumed"""
+        requested_pages = []
+
+        async def list_documents(document_type, page, per_page, starttmp, endtmp):
+            requested_pages.append(page)
+            return [{"id": f"doc{page}"}] if page < 3 else []
+
+        with patch.object(holded_client, 'list_documents', side_effect=list_documents):
+            documents_pages = holded_client.iter_documents(per_page=1)
+            first_page = await documents_pages.__anext__()
+            await asyncio.sleep(0)
+
+            assert first_page == [{"id": "doc1"}]
+            assert requested_pages == [1, 2]
+            await documents_pages.aclose()
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_stops_on_repeated_page(self, holded_client):
+        """Test that iteration stops if the API ignores the page parameter"""
+        async def list_documents(document_type, page, per_page, starttmp, endtmp):
+            return [{"id": "doc1"}, {"id": "doc2"}]
+
+        with patch.object(holded_client, 'list_documents', side_effect=list_documents) as mock_list:
+            result = [documents async for documents in holded_client.iter_documents(per_page=2)]
+
+        assert len(result) == 1
+        assert mock_list.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_concurrently_keeps_type_order(self, holded_client):
+        """Test that document types are fetched concurrently but yielded in order"""
+        started = []
+
+        async def list_documents(document_type, page, per_page, starttmp, endtmp):
+            started.append(document_type)
+            if document_type == "invoice":
+                # Invoices are slower than credit notes
+                await asyncio.sleep(0.01)
+            return [{"id": f"{document_type}-{page}"}] if page == 1 else []
+
+        with patch.object(holded_client, 'list_documents', side_effect=list_documents):
+            result = [
+                (document_type, documents)
+                async for document_type, documents in holded_client.iter_documents_concurrently(
+                    ["invoice", "creditnote"], starttmp=1, endtmp=2)
+            ]
+
+        assert started[:2] == ["invoice", "creditnote"]
+        assert result == [
+            ("invoice", [{"id": "invoice-1"}]),
+            ("creditnote", [{"id": "creditnote-1"}])
+        ]
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_concurrently_raises_errors(self, holded_client):
+        """Test that errors fetching a document type are raised to the consumer"""
+        async def list_documents(document_type, page, per_page, starttmp, endtmp):
+            if document_type == "creditnote":
+                raise HTTPException(status_code=500, detail="Holded error")
+            return [{"id": "invoice-1"}] if page == 1 else []
+
+        with patch.object(holded_client, 'list_documents', side_effect=list_documents):
+            with pytest.raises(HTTPException):
+                async for _ in holded_client.iter_documents_concurrently(["invoice", "creditnote"]):
+                    pass
+
     @pytest.mark.asyncio
     async def test_create_contact_not_implemented(self, holded_client):
         """Test that create_contact method doesn't exist"""
@@ -526,6 +683,89 @@ class TestFourGeeksIntegration:
             assert student_id is None
             assert error is not None
 
+    @pytest.fixture
+    def async_fourgeeks_client(self):
+        """Create an async 4Geeks client for testing"""
+        from src.api.integrations.fourgeeks.client import AsyncFourGeeksClient, FourGeeksCredentials
+        credentials = FourGeeksCredentials(username="test_user", password="test_pass")
+        return AsyncFourGeeksClient(credentials, max_concurrent_requests=2)
+
+    @pytest.mark.asyncio
+    async def test_async_client_limits_concurrent_requests(self, async_fourgeeks_client):
+        """Test that the async client keeps at most max_concurrent_requests in flight"""
+        async_fourgeeks_client._token = "mock_token"
+        in_flight = 0
+        max_in_flight = 0
+
+        async def get(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = Mock()
+            response.json.return_value = []
+            return response
+
+        with patch('httpx.AsyncClient.get', side_effect=get) as mock_get:
+            await asyncio.gather(*[
+                async_fourgeeks_client.get_user_enrollments(user_id=user_id)
+                for user_id in range(6)
+            ])
+
+        assert mock_get.call_count == 6
+        assert max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_async_client_logs_in_once(self, async_fourgeeks_client):
+        """Test that concurrent requests share a single login"""
+        login_response = Mock()
+        login_response.json.return_value = {"token": "new_token"}
+        cohort_response = Mock()
+        cohort_response.json.return_value = {"id": 1}
+
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock, return_value=login_response) as mock_post, \
+                patch('httpx.AsyncClient.get', new_callable=AsyncMock, return_value=cohort_response):
+            results = await asyncio.gather(*[
+                async_fourgeeks_client.get_cohort(cohort_id) for cohort_id in range(3)
+            ])
+
+        assert results == [{"id": 1}] * 3
+        mock_post.assert_awaited_once()
+        assert async_fourgeeks_client._token == "new_token"
+
+    @pytest.mark.asyncio
+    async def test_async_client_enrollments_in_academies(self, async_fourgeeks_client):
+        """Test that academies are queried in order until enrollments are found"""
+        enrollments_by_academy = {6: [], 7: [{"id": "enrollment"}], 8: [{"id": "other"}]}
+
+        async def get_user_enrollments(user_id, params, academy_id):
+            return enrollments_by_academy[academy_id]
+
+        with patch.object(async_fourgeeks_client, 'get_user_enrollments', side_effect=get_user_enrollments) as mock_get:
+            enrollments = await async_fourgeeks_client.get_user_enrollments_in_academies(
+                user_id=1, academy_ids=[6, 7, 8], params={"roles": "STUDENT"})
+
+        assert enrollments == [{"id": "enrollment"}]
+        assert mock_get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_student_processor_find_and_link_student_async(self, test_session, test_data_factory, async_fourgeeks_client):
+        """Test student processor find and link with the async client"""
+        from src.api.clients.services.client_service import ClientService
+        client = test_data_factory.create_client(test_session, identifier="async@example.com")
+        processor = StudentProcessor(ClientService(test_session), async_fourgeeks_client)
+
+        with patch.object(async_fourgeeks_client, 'get_member_by_email', new_callable=AsyncMock) as mock_get_member:
+            mock_get_member.return_value = {"email": "async@example.com", "user": {"id": 42}}
+
+            student_id, error = await processor.find_and_link_student_async(
+                client.id, client.identifier)
+
+        assert student_id == "42"
+        assert error is None
+        assert client.get_external_id("fourgeeks") == "42"
+
 
 class TestIntegrationEndpoints:
     """Test integration endpoints"""
@@ -701,4 +941,501 @@ class TestHoldedDuplicateInvoicePrevention:
         amount3 = 1500.02  # Larger difference
         
         # Should trigger update (outside tolerance)
-        assert abs(amount1 - amount3) > 0.01 
\ No newline at end of file
+        assert abs(amount1 - amount3) > 0.01 
+
+class TestHoldedIncrementalSync:
+    """Test suite for the incremental Holded invoices sync"""
+
+    @pytest.fixture
+    def services(self, test_session):
+        from src.api.clients.services.client_service import ClientService
+        from src.api.invoices.services.invoice_service import InvoiceService
+        from src.api.services.services.service_service import ServiceService
+        from src.api.services.services.service_contract import ServiceContractService
+        return {
+            "client_service": ClientService(test_session),
+            "invoice_service": InvoiceService(test_session),
+            "service_service": ServiceService(test_session),
+            "service_contract_service": ServiceContractService(test_session),
+            "db": test_session
+        }
+
+    @staticmethod
+    def _document(document_id, timestamp, contact="contact-1"):
+        return {
+            "id": document_id,
+            "docNumber": f"INV-{document_id}",
+            "date": timestamp,
+            "total": 100.0,
+            "currency": "EUR",
+            "status": 1,
+            "contact": contact,
+            # No local service, so the documents are skipped after creating the invoice
+            "products": [{"account": "unknown-account"}]
+        }
+
+    @staticmethod
+    def _holded_client(documents, contacts=None):
+        contacts = contacts or {"contact-1": {"id": "contact-1", "email": "client@example.com", "name": "Client"}}
+        holded_client = Mock()
+        holded_client.requested = []
+
+        async def iter_documents_concurrently(document_types, starttmp=None, endtmp=None):
+            holded_client.requested.append(starttmp)
+            yield "invoice", [document for document in documents
+                              if starttmp is None or document["date"] >= starttmp]
+
+        holded_client.iter_documents_concurrently = iter_documents_concurrently
+        holded_client.get_contact = AsyncMock(side_effect=lambda contact_id: contacts.get(contact_id))
+        return holded_client
+
+    def _sync_state(self, test_session):
+        from src.api.integrations.services.integration_sync_state_service import IntegrationSyncStateService
+        return IntegrationSyncStateService(test_session).get_state("holded", "documents")
+
+    @pytest.mark.asyncio
+    async def test_sync_records_watermark(self, services, test_session):
+        """Test that a sync records the most recent imported document"""
+        holded_client = self._holded_client([
+            self._document("doc-1", 1700000000), self._document("doc-2", 1700086400)
+        ])
+
+        result = await sync_invoices_and_clients(holded_client=holded_client, **services)
+
+        assert result["total_received"] == 2
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700086400
+        assert state.cursor == "doc-2"
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync_requests_from_watermark(self, services, test_session):
+        """Test that the incremental mode requests only documents from the watermark onwards"""
+        documents = [self._document("doc-1", 1700000000), self._document("doc-2", 1700086400)]
+        await sync_invoices_and_clients(holded_client=self._holded_client(documents), **services)
+
+        documents.append(self._document("doc-3", 1700172800))
+        holded_client = self._holded_client(documents)
+        result = await sync_invoices_and_clients(
+            holded_client=holded_client, start_timestamp=1690000000, incremental=True, **services)
+
+        assert holded_client.requested == [1700086400]
+        # doc-2 is received again but skipped as the last imported document
+        assert result["total_received"] == 2
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700172800
+        assert state.cursor == "doc-3"
+
+    @pytest.mark.asyncio
+    async def test_watermark_stops_at_failed_document(self, services, test_session):
+        """Test that the watermark does not move past a document that failed"""
+        holded_client = self._holded_client([
+            self._document("doc-1", 1700000000),
+            self._document("doc-2", 1700086400, contact="missing-contact"),
+            self._document("doc-3", 1700172800)
+        ])
+
+        result = await sync_invoices_and_clients(holded_client=holded_client, **services)
+
+        assert result["errors"] == 1
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700086400
+        assert state.cursor is None
+
+    @pytest.mark.asyncio
+    async def test_later_window_does_not_move_watermark(self, services, test_session):
+        """Test that a non-incremental run over a later window leaves the gap to the incremental sync"""
+        documents = [self._document("doc-1", 1700000000)]
+        await sync_invoices_and_clients(holded_client=self._holded_client(documents), **services)
+
+        documents.extend([self._document("doc-2", 1700086400), self._document("doc-3", 1700172800)])
+        await sync_invoices_and_clients(
+            holded_client=self._holded_client(documents), start_timestamp=1700172800, **services)
+
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700000000
+        assert state.cursor == "doc-1"
+
+        holded_client = self._holded_client(documents)
+        result = await sync_invoices_and_clients(holded_client=holded_client, incremental=True, **services)
+
+        assert holded_client.requested == [1700000000]
+        # doc-2 was never imported and is fetched again with doc-1 and doc-3
+        assert result["total_received"] == 3
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700172800
+        assert state.cursor == "doc-3"
+
+    @pytest.mark.asyncio
+    async def test_incremental_later_window_does_not_move_watermark(self, services, test_session):
+        """Test that an incremental run starting after the watermark leaves the gap to the next run"""
+        documents = [self._document("doc-1", 1700000000)]
+        await sync_invoices_and_clients(holded_client=self._holded_client(documents), **services)
+
+        documents.extend([self._document("doc-2", 1700086400), self._document("doc-3", 1700172800)])
+        holded_client = self._holded_client(documents)
+        await sync_invoices_and_clients(
+            holded_client=holded_client, start_timestamp=1700172800, incremental=True, **services)
+
+        assert holded_client.requested == [1700172800]
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700000000
+        assert state.cursor == "doc-1"
+
+        holded_client = self._holded_client(documents)
+        await sync_invoices_and_clients(holded_client=holded_client, incremental=True, **services)
+
+        assert holded_client.requested == [1700000000]
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700172800
+        assert state.cursor == "doc-3"
+
+    @pytest.mark.asyncio
+    async def test_window_from_watermark_records_it(self, services, test_session):
+        """Test that a non-incremental run starting at the watermark still records it"""
+        documents = [self._document("doc-1", 1700000000)]
+        await sync_invoices_and_clients(holded_client=self._holded_client(documents), **services)
+
+        documents.append(self._document("doc-2", 1700086400))
+        await sync_invoices_and_clients(
+            holded_client=self._holded_client(documents), start_timestamp=1700000000, **services)
+
+        state = self._sync_state(test_session)
+        assert state.last_synced_timestamp == 1700086400
+        assert state.cursor == "doc-2"
+
+    def test_watermark_never_moves_backwards(self, test_session):
+        """Test that syncing an older window keeps the newer watermark"""
+        from src.api.integrations.services.integration_sync_state_service import IntegrationSyncStateService
+        service = IntegrationSyncStateService(test_session)
+        service.update_watermark("holded", "documents", 1700086400, "doc-2")
+
+        state = service.update_watermark("holded", "documents", 1600000000, "old-doc")
+
+        assert state.last_synced_timestamp == 1700086400
+        assert state.cursor == "doc-2"
+
+
+class TestHoldedDocumentsProcessor:
+    """Test suite for the batched import of Holded documents"""
+
+    @staticmethod
+    def _document(document_id, total=100.0, doc_number=None, account="DEV-001", contact="contact-1", **kwargs):
+        document = {
+            "id": document_id,
+            "docNumber": doc_number or f"INV-{document_id}",
+            "date": 1700000000,
+            "total": total,
+            "currency": "EUR",
+            "status": 1,
+            "contact": contact,
+            "products": [{"account": account}]
+        }
+        document.update(kwargs)
+        return document
+
+    def test_process_page_creates_invoices_and_contract_in_one_commit(self, test_session, test_data_factory):
+        """Test that a page is imported in a single transaction"""
+        from src.api.integrations.holded.processor import HoldedDocumentsProcessor
+        from src.api.invoices.models.invoice import Invoice
+        from src.api.services.models.service_contract import ServiceContract
+
+        client = test_data_factory.create_client(test_session)
+        service = test_data_factory.create_service(test_session)
+        documents = [
+            self._document("doc-1", 1000.0),
+            self._document("doc-2", 500.0),
+            self._document("doc-3", 200.0, doc_number="CN-1", **{"from": {"docType": "invoice"}})
+        ]
+
+        with patch.object(test_session, "commit", wraps=test_session.commit) as commit:
+            results = HoldedDocumentsProcessor(test_session).process_page(
+                documents, {"contact-1": client})
+
+        assert commit.call_count == 1
+        assert [result.status for result in results] == ["created", "created", "created"]
+        contract = test_session.exec(select(ServiceContract)).one()
+        assert contract.client_id == client.id
+        assert contract.service_id == service.id
+        assert contract.contract_amount == 1300.0
+        invoices = test_session.exec(select(Invoice).order_by(Invoice.external_id)).all()
+        assert [invoice.total_amount for invoice in invoices] == [1000.0, 500.0, -200.0]
+        assert all(invoice.service_contract_id == contract.id for invoice in invoices)
+
+    def test_process_page_links_existing_invoices_without_adding_amounts(self, test_session, test_data_factory):
+        """Test that already imported documents are not inserted nor added to the contract again"""
+        from src.api.integrations.holded.processor import HoldedDocumentsProcessor
+        from src.api.invoices.models.invoice import Invoice
+        from src.api.services.models.service_contract import ServiceContract
+
+        client = test_data_factory.create_client(test_session)
+        test_data_factory.create_service(test_session)
+        processor = HoldedDocumentsProcessor(test_session)
+        processor.process_page([self._document("doc-1", 1000.0)], {"contact-1": client})
+
+        results = processor.process_page(
+            [self._document("doc-1", 1000.0), self._document("doc-2", 250.0)], {"contact-1": client})
+
+        assert [result.status for result in results] == ["updated", "created"]
+        assert len(test_session.exec(select(Invoice)).all()) == 2
+        contract = test_session.exec(select(ServiceContract)).one()
+        assert contract.contract_amount == 1250.0
+
+    def test_process_page_reports_documents_without_client_or_service(self, test_session, test_data_factory):
+        """Test that unknown contacts are errors and unknown services are skipped"""
+        from src.api.integrations.holded.processor import HoldedDocumentsProcessor
+        from src.api.invoices.models.invoice import Invoice
+
+        client = test_data_factory.create_client(test_session)
+        results = HoldedDocumentsProcessor(test_session).process_page([
+            self._document("doc-1", contact="missing-contact"),
+            self._document("doc-2", account="unknown-account")
+        ], {"contact-1": client})
+
+        assert [result.status for result in results] == ["error", "skipped"]
+        # The invoice of a skipped document is still imported
+        invoice = test_session.exec(select(Invoice)).one()
+        assert invoice.external_id == "doc-2"
+        assert invoice.service_contract_id is None
+
+    @pytest.mark.asyncio
+    async def test_sync_falls_back_to_document_by_document_import(self, test_session, test_data_factory):
+        """Test that a page failing in bulk is imported one document at a time"""
+        from src.api.clients.services.client_service import ClientService
+        from src.api.invoices.services.invoice_service import InvoiceService
+        from src.api.services.services.service_service import ServiceService
+        from src.api.services.services.service_contract import ServiceContractService
+        from src.api.services.models.service_contract import ServiceContract
+
+        test_data_factory.create_service(test_session)
+        holded_client = TestHoldedIncrementalSync._holded_client([
+            self._document("doc-1", 1000.0), self._document("doc-2", 500.0)
+        ])
+
+        with patch("src.api.integrations.endpoints.holded.HoldedDocumentsProcessor.process_page",
+                   side_effect=Exception("bulk insert failed")):
+            result = await sync_invoices_and_clients(
+                client_service=ClientService(test_session),
+                invoice_service=InvoiceService(test_session),
+                holded_client=holded_client,
+                service_service=ServiceService(test_session),
+                service_contract_service=ServiceContractService(test_session),
+                db=test_session
+            )
+
+        assert result["created"] == 2
+        assert result["errors"] == 0
+        contract = test_session.exec(select(ServiceContract)).one()
+        assert contract.contract_amount == 1500.0
+
+
+class TestHoldedContactCache:
+    """Test suite for the per-run cache of Holded contacts"""
+
+    @pytest.mark.asyncio
+    async def test_get_requests_each_contact_once(self):
+        """Test that repeated and concurrent lookups of a contact share one request"""
+        from src.api.integrations.holded.contacts import HoldedContactCache
+        holded_client = Mock()
+        holded_client.get_contact = AsyncMock(side_effect=lambda contact_id: {"id": contact_id})
+        cache = HoldedContactCache(holded_client)
+
+        contacts = await asyncio.gather(cache.get("contact-1"), cache.get("contact-1"))
+        await cache.get("contact-1")
+
+        assert contacts == [{"id": "contact-1"}, {"id": "contact-1"}]
+        holded_client.get_contact.assert_awaited_once_with("contact-1")
+
+    @pytest.mark.asyncio
+    async def test_prefetch_avoids_single_requests(self):
+        """Test that prefetched contacts are not requested again"""
+        from src.api.integrations.holded.contacts import HoldedContactCache
+        holded_client = Mock()
+
+        async def iter_contacts():
+            yield [{"id": "contact-1"}, {"id": "contact-2"}]
+            yield [{"id": "contact-3"}]
+
+        holded_client.iter_contacts = iter_contacts
+        holded_client.get_contact = AsyncMock(return_value=None)
+        cache = HoldedContactCache(holded_client)
+
+        assert await cache.prefetch() == 3
+        contacts = await cache.get_many(["contact-2", "contact-3", "contact-4"])
+
+        assert contacts == {"contact-2": {"id": "contact-2"}, "contact-3": {"id": "contact-3"}, "contact-4": None}
+        holded_client.get_contact.assert_awaited_once_with("contact-4")
+
+    @pytest.mark.asyncio
+    async def test_get_many_returns_failed_requests(self):
+        """Test that a failed request does not prevent getting the other contacts"""
+        from src.api.integrations.holded.contacts import HoldedContactCache
+        holded_client = Mock()
+
+        async def get_contact(contact_id):
+            if contact_id == "contact-2":
+                raise HTTPException(status_code=500, detail="Holded unavailable")
+            return {"id": contact_id}
+
+        holded_client.get_contact = get_contact
+        contacts = await HoldedContactCache(holded_client).get_many(["contact-1", "contact-2"])
+
+        assert contacts["contact-1"] == {"id": "contact-1"}
+        assert isinstance(contacts["contact-2"], HTTPException)
+
+    @pytest.mark.asyncio
+    async def test_iter_contacts_stops_on_short_page(self):
+        """Test that contacts are listed page by page until a short page"""
+        from src.api.integrations.holded.config import HoldedConfig
+        with patch('src.api.integrations.holded.config.os.getenv', return_value="test_key"):
+            holded_client = HoldedClient(HoldedConfig())
+        holded_client.list_contacts = AsyncMock(side_effect=[
+            [{"id": "contact-1"}, {"id": "contact-2"}],
+            [{"id": "contact-3"}]
+        ])
+
+        pages = [contacts async for contacts in holded_client.iter_contacts(per_page=2)]
+
+        assert pages == [[{"id": "contact-1"}, {"id": "contact-2"}], [{"id": "contact-3"}]]
+        assert holded_client.list_contacts.await_count == 2
+        await holded_client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_sync_creates_page_clients_once(self, test_session):
+        """Test that a contact with several documents is requested and created once"""
+        from src.api.clients.services.client_service import ClientService
+        from src.api.invoices.services.invoice_service import InvoiceService
+        from src.api.services.services.service_service import ServiceService
+        from src.api.services.services.service_contract import ServiceContractService
+        from src.api.clients.models.client import Client
+
+        holded_client = TestHoldedIncrementalSync._holded_client([
+            TestHoldedIncrementalSync._document("doc-1", 1700000000),
+            TestHoldedIncrementalSync._document("doc-2", 1700086400),
+            TestHoldedIncrementalSync._document("doc-3", 1700172800, contact="missing-contact")
+        ])
+
+        result = await sync_invoices_and_clients(
+            client_service=ClientService(test_session),
+            invoice_service=InvoiceService(test_session),
+            holded_client=holded_client,
+            service_service=ServiceService(test_session),
+            service_contract_service=ServiceContractService(test_session),
+            db=test_session
+        )
+
+        assert result["errors"] == 1
+        assert result["error_details"] == ["Contact id not found"]
+        assert holded_client.get_contact.await_count == 2
+        assert len(test_session.exec(select(Client)).all()) == 1
+
+
+class TestEnrollmentProcessor:
+    """Test the batched processing of 4Geeks enrollments"""
+
+    @pytest.fixture
+    def processor(self, test_session):
+        from src.api.clients.services.client_service import ClientService
+        from src.api.services.services.service_period_service import ServicePeriodService
+        from src.api.services.services.service_service import ServiceService
+        from src.api.services.services.service_contract import ServiceContractService
+        return EnrollmentProcessor(
+            ServicePeriodService(test_session),
+            ClientService(test_session),
+            ServiceService(test_session),
+            ServiceContractService(test_session)
+        )
+
+    @staticmethod
+    def _contract(session, factory):
+        from src.api.services.models.service_contract import ServiceContract
+        client = factory.create_client(session)
+        service = factory.create_service(session, name="Full-Stack Developer", external_id="FS-001")
+        contract = ServiceContract(
+            client_id=client.id,
+            service_id=service.id,
+            contract_date=date(2024, 1, 1),
+            contract_amount=5000.00
+        )
+        session.add(contract)
+        session.commit()
+        session.refresh(contract)
+        return contract
+
+    @staticmethod
+    def _enrollment(slug, status="ACTIVE"):
+        return {
+            "cohort": {"slug": slug, "kickoff_date": "2024-01-15", "ending_date": "2024-06-30"},
+            "educational_status": status,
+            "updated_at": "2024-01-15"
+        }
+
+    def test_batch_writes_periods_in_one_commit(self, processor, test_session, test_data_factory):
+        """Test that created and updated periods of a batch are committed once"""
+        from src.api.common.constants.services import ServicePeriodStatus
+        from src.api.services.models.service_period import ServicePeriod
+        contract = self._contract(test_session, test_data_factory)
+        test_session.add(ServicePeriod(
+            contract_id=contract.id,
+            name="spain-fs-pt-1",
+            external_id="spain-fs-pt-1",
+            start_date=date(2023, 1, 1),
+            end_date=date(2023, 6, 30),
+            status=ServicePeriodStatus.ACTIVE
+        ))
+        test_session.commit()
+
+        with patch.object(test_session, 'commit', wraps=test_session.commit) as commit:
+            processor.process_contracts_enrollments([(contract.id, [
+                self._enrollment("spain-fs-pt-1", "GRADUATED"),
+                self._enrollment("spain-fs-pt-2"),
+                self._enrollment("spain-ds-pt-3")
+            ])])
+
+        assert commit.call_count == 1
+        assert processor.stats["created"] == 1
+        assert processor.stats["updated"] == 1
+        assert processor.stats["compatibility_errors"] == 1
+        periods = {period.external_id: period for period in test_session.exec(select(ServicePeriod)).all()}
+        assert set(periods) == {"spain-fs-pt-1", "spain-fs-pt-2"}
+        assert periods["spain-fs-pt-1"].status == ServicePeriodStatus.ENDED
+        # Prework starts two weeks before the kickoff
+        assert periods["spain-fs-pt-2"].start_date == date(2024, 1, 1)
+
+    def test_cohort_service_type_is_cached(self, processor, test_session, test_data_factory):
+        """Test that the program type of a cohort is computed once per sync"""
+        contract = self._contract(test_session, test_data_factory)
+        other_contract = self._contract(test_session, test_data_factory)
+
+        with patch('src.api.integrations.fourgeeks.processor.get_service_type_from_service_period_name',
+                   return_value="FS") as get_service_type:
+            processor.process_contracts_enrollments([
+                (contract.id, [self._enrollment("spain-fs-pt-1")]),
+                (other_contract.id, [self._enrollment("spain-fs-pt-1")])
+            ])
+
+        assert get_service_type.call_count == 1
+        assert processor.stats["created"] == 2
+
+    def test_batch_falls_back_to_single_enrollments(self, processor, test_session, test_data_factory):
+        """Test that a batch failing to commit is processed enrollment by enrollment"""
+        from src.api.services.models.service_period import ServicePeriod
+        contract = self._contract(test_session, test_data_factory)
+        commit = test_session.commit
+        calls = []
+
+        def fail_first_commit():
+            calls.append(True)
+            if len(calls) == 1:
+                raise Exception("Database error")
+            commit()
+
+        with patch.object(test_session, 'commit', side_effect=fail_first_commit):
+            processor.process_contracts_enrollments([(contract.id, [
+                self._enrollment("spain-fs-pt-1"),
+                self._enrollment("spain-fs-pt-2")
+            ])])
+
+        assert len(calls) == 3
+        assert processor.stats["created"] == 2
+        assert processor.stats["errors"] == 0
+        assert len(test_session.exec(select(ServicePeriod)).all()) == 2
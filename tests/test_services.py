@@ -151,6 +151,47 @@ class TestServiceService:
         assert result.total_sessions == 200
 
 
+class TestServiceCatalogue:
+    """Test ServiceCatalogue class"""
+
+    def test_get_service_id(self, test_session, test_data_factory):
+        """Test resolving external IDs to service IDs"""
+        from src.api.services.services.service_catalogue import ServiceCatalogue
+        service = test_data_factory.create_service(test_session, external_id="ACC-1")
+
+        catalogue = ServiceCatalogue(test_session).load()
+
+        assert catalogue.get_service_id("ACC-1") == service.id
+        assert catalogue.get_service_id("ACC-2") is None
+        assert catalogue.get_service_id(None) is None
+
+    def test_lookups_do_not_query_until_invalidated(self, test_session, test_data_factory):
+        """Test that the catalogue is reloaded only after services change"""
+        from src.api.services.services.service_catalogue import ServiceCatalogue
+        test_data_factory.create_service(test_session, external_id="ACC-1")
+        catalogue = ServiceCatalogue(test_session).load()
+
+        with patch.object(test_session, "exec", wraps=test_session.exec) as exec_query:
+            catalogue.get_service_id("ACC-1")
+            catalogue.get_service_id("ACC-2")
+        assert exec_query.call_count == 0
+
+        created = ServiceService(test_session).create_service(
+            ServiceCreate(name="New Service", external_id="ACC-2"))
+        assert catalogue.get_service_id("ACC-2") == created.id
+
+    def test_update_invalidates_catalogue(self, test_session, test_data_factory):
+        """Test that updating a service external ID is seen by a loaded catalogue"""
+        from src.api.services.services.service_catalogue import ServiceCatalogue
+        service = test_data_factory.create_service(test_session, external_id="ACC-1")
+        catalogue = ServiceCatalogue(test_session).load()
+
+        ServiceService(test_session).update_service(service.id, {"external_id": "ACC-3"})
+
+        assert catalogue.get_service_id("ACC-1") is None
+        assert catalogue.get_service_id("ACC-3") == service.id
+
+
 class TestServicePeriodService:
     """Test ServicePeriodService class"""
 
@@ -675,4 +716,71 @@ class TestServiceContractService:
             )
             
             with pytest.raises(Exception, match="Database error"):
-                contract_svc.create_contract(contract_data) 
\ No newline at end of file
+                contract_svc.create_contract(contract_data) 
+    def _create_contract(self, session, client, service, status=ServiceContractStatus.ACTIVE):
+        contract = ServiceContract(
+            client_id=client.id,
+            service_id=service.id,
+            contract_date=date(2024, 1, 1),
+            contract_amount=1000.00,
+            status=status
+        )
+        session.add(contract)
+        session.commit()
+        session.refresh(contract)
+        return contract
+
+    def test_iter_active_contracts_filters_status_in_chunks(self, test_session, test_data_factory):
+        """Test only active contracts are streamed, across several chunks"""
+        client = test_data_factory.create_client(test_session)
+        service = test_data_factory.create_service(test_session)
+        active = [self._create_contract(test_session, client, service) for _ in range(5)]
+        self._create_contract(test_session, client, service, ServiceContractStatus.CANCELED)
+
+        contract_svc = ServiceContractService(test_session)
+        result = list(contract_svc.iter_active_contracts(chunk_size=2))
+
+        assert [contract.id for contract in result] == [contract.id for contract in active]
+        assert contract_svc.get_active_contracts() == result
+
+    def test_iter_active_contracts_on_target_date(self, test_session, test_data_factory):
+        """Test target_date keeps the contracts with a service period covering it"""
+        client = test_data_factory.create_client(test_session)
+        service = test_data_factory.create_service(test_session)
+        in_period = self._create_contract(test_session, client, service)
+        out_of_period = self._create_contract(test_session, client, service)
+        for contract, start_date, end_date in (
+            (in_period, date(2024, 1, 1), date(2024, 3, 31)),
+            (out_of_period, date(2024, 4, 1), date(2024, 6, 30)),
+        ):
+            test_session.add(ServicePeriod(
+                contract_id=contract.id,
+                start_date=start_date,
+                end_date=end_date,
+                status=ServicePeriodStatus.ACTIVE
+            ))
+        test_session.commit()
+
+        contract_svc = ServiceContractService(test_session)
+        result = list(contract_svc.iter_active_contracts(date(2024, 2, 15)))
+
+        assert [contract.id for contract in result] == [in_period.id]
+
+    def test_iter_active_contracts_loads_client_external_ids(self, test_session, test_data_factory):
+        """Test clients and their external IDs are loaded with the contracts"""
+        from src.api.clients.models.client import ClientExternalId
+
+        client = test_data_factory.create_client(test_session)
+        service = test_data_factory.create_service(test_session)
+        external_id = ClientExternalId(client_id=client.id, system="fourgeeks")
+        external_id.external_id = "user-1"
+        test_session.add(external_id)
+        self._create_contract(test_session, client, service)
+        test_session.expunge_all()
+
+        contract_svc = ServiceContractService(test_session)
+        contracts = list(contract_svc.iter_active_contracts())
+        test_session.expunge_all()
+
+        # Detached objects can only use what was eagerly loaded
+        assert contracts[0].client.get_external_id("fourgeeks") == "user-1"
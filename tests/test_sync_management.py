@@ -0,0 +1,256 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.api.sync.services.sync_management_service import SyncManagementService
+from src.api.sync.services.sync_steps import SYNC_STEPS, run_sync_step
+
+
+class TestSyncSteps:
+    """Test the in-process sync steps registry"""
+
+    def test_all_steps_are_registered(self):
+        """Test that every import and accrual step has an in-process runner"""
+        service = SyncManagementService.__new__(SyncManagementService)
+        steps = service.get_execution_order() + ["accruals"]
+
+        assert set(steps) == set(SYNC_STEPS)
+
+    @pytest.mark.asyncio
+    async def test_run_unknown_step(self, test_session):
+        """Test running a step that is not registered"""
+        with pytest.raises(ValueError):
+            await run_sync_step("unknown", test_session)
+
+    @pytest.mark.asyncio
+    async def test_run_step_shares_session(self, test_session):
+        """Test that a step runs with the given session and its result is JSON encoded"""
+        from datetime import date
+        sync_services = AsyncMock(return_value={"success": True, "created": 1, "date": date(2024, 1, 1)})
+        with patch("src.api.sync.services.sync_steps.holded.get_holded_client", return_value=AsyncMock()), \
+                patch("src.api.sync.services.sync_steps.holded.sync_services", sync_services):
+            result = await run_sync_step("services", test_session)
+
+        assert result == {"success": True, "created": 1, "date": "2024-01-01"}
+        assert sync_services.await_args.kwargs["db"] is test_session
+        assert sync_services.await_args.kwargs["service_service"].db is test_session
+
+
+class TestSyncManagementService:
+    """Test SyncManagementService step execution"""
+
+    @pytest.mark.asyncio
+    async def test_execute_single_step_in_process(self, test_session):
+        """Test that steps run in process by default, without HTTP calls"""
+        service = SyncManagementService(test_session)
+        run_step = AsyncMock(return_value={"success": True, "processed": 3, "created": 2,
+                                           "updated": 1, "skipped": 0, "errors": 0, "total_received": 3})
+
+        with patch("src.api.sync.services.sync_management_service.run_sync_step", run_step), \
+                patch.object(service, "_call_api") as call_api:
+            result = await service.execute_single_step(
+                "invoices", year=2024, month=3, start_date="2024-03-01", end_date="2024-03-31")
+
+        assert result["status"] == "completed"
+        assert result["total_stats"]["total_created"] == 2
+        run_step.assert_awaited_once()
+        assert run_step.await_args.args == ("invoices", test_session)
+        assert set(run_step.await_args.kwargs) == {"start_timestamp", "end_timestamp"}
+        call_api.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_execute_single_step_over_http(self, test_session):
+        """Test that the HTTP mode calls the step endpoint"""
+        service = SyncManagementService(test_session, steps_mode="http")
+        call_api = AsyncMock(return_value={"success": True, "created": 1})
+
+        with patch.object(service, "_call_api", call_api):
+            result = await service.execute_single_step(
+                "services", year=2024, month=3, start_date="2024-03-01", end_date="2024-03-31")
+
+        assert result["status"] == "completed"
+        call_api.assert_awaited_once()
+        assert call_api.await_args.args[1] == f"{service.base_url}/integrations/holded/sync-services"
+
+
+class TestSyncProcessJobs:
+    """Test sync processes run in the background with incremental progress"""
+
+    @staticmethod
+    def _invoices_result(*args, **kwargs):
+        return {"success": True, "processed": 1, "created": 1, "updated": 0,
+                "skipped": 0, "errors": 0, "total_received": 1}
+
+    def _create_execution(self, test_session, process_type="import", starting_point="notion-external-id"):
+        return SyncManagementService(test_session).create_process_execution(
+            process_type, starting_point, year=2024, month=None, start_date="2024-01-01", end_date="2024-12-31")
+
+    @pytest.mark.asyncio
+    async def test_run_process_saves_progress_by_step_and_month(self, test_session):
+        """Test that the progress is saved and notified after each month and step"""
+        from src.api.sync.models.sync_execution import SyncExecution
+        import json
+        execution = SyncManagementService(test_session).create_process_execution(
+            "import", "service-periods", year=2024, month=None, start_date="2024-01-01", end_date="2024-12-31")
+        events = []
+
+        with patch("src.api.sync.services.sync_management_service.run_sync_step",
+                   AsyncMock(return_value={"success": True, "linked": 1})):
+            result = await SyncManagementService(test_session).run_process(
+                execution.process_id, progress_listener=events.append)
+
+        assert result["status"] == "completed"
+        assert [event["progress"]["completed_steps"] for event in events] == [0, 1, 1, 2, 2]
+        assert events[-1]["status"] == "completed"
+        stored = test_session.query(SyncExecution).filter(
+            SyncExecution.process_id == execution.process_id).one()
+        assert json.loads(stored.progress)["completed_steps"] == 2
+        assert len(json.loads(stored.result)["step_results"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_invoices_step_reports_each_month(self, test_session):
+        """Test that the invoices step notifies the progress of each month"""
+        execution = SyncManagementService(test_session).create_process_execution(
+            "accrual", "invoices", year=2024, month=None, start_date="2024-01-01", end_date="2024-12-31")
+        events = []
+
+        with patch("src.api.sync.services.sync_management_service.run_sync_step",
+                   AsyncMock(side_effect=self._invoices_result)):
+            await SyncManagementService(test_session).run_process(
+                execution.process_id, progress_listener=events.append)
+
+        months = [event["progress"]["current_month"] for event in events
+                  if event["progress"]["current_month"]]
+        assert months[:12] == [f"2024-{month:02d}" for month in range(1, 13)]
+
+    @pytest.mark.asyncio
+    async def test_accruals_step_saves_each_month_as_it_runs(self, test_session):
+        """Test that the accruals step saves the progress of a month before processing the next one"""
+        import json
+        from datetime import date
+        from src.api.accruals.services.contract_accrual_processor import ContractAccrualProcessor
+        from src.api.sync.models.sync_execution import SyncExecution
+        execution = SyncManagementService(test_session).create_process_execution(
+            "accrual", "accruals", year=2024, month=None, start_date="2024-01-01", end_date="2024-12-31")
+        stored_months = {}
+
+        def get_contract_ids(processor, target_month):
+            progress = test_session.query(SyncExecution.progress).filter(
+                SyncExecution.process_id == execution.process_id).scalar()
+            stored_months[target_month] = json.loads(progress)["completed_months"]
+            return []
+
+        with patch.object(ContractAccrualProcessor, "_get_accruable_service_contract_ids",
+                          autospec=True, side_effect=get_contract_ids):
+            result = await SyncManagementService(test_session).run_process(execution.process_id)
+
+        assert result["status"] == "completed"
+        assert stored_months[date(2024, 1, 1)] == []
+        assert stored_months[date(2024, 12, 1)] == [f"2024-{month:02d}-01" for month in range(1, 12)]
+        assert result["step_results"][0]["result"]["months_processed"] == 12
+
+    @pytest.mark.asyncio
+    async def test_job_manager_runs_jobs_in_order(self):
+        """Test that queued jobs run one at a time, in submission order"""
+        import asyncio
+        from src.api.sync.services.sync_jobs import SyncJobManager
+        job_manager = SyncJobManager(max_concurrent_jobs=1)
+        order = []
+
+        async def job(name):
+            order.append(f"{name}-start")
+            await asyncio.sleep(0)
+            order.append(f"{name}-end")
+
+        first = job_manager.submit("first", lambda: job("first"))
+        second = job_manager.submit("second", lambda: job("second"))
+        assert job_manager.is_running("second")
+        await asyncio.gather(first, second)
+        await asyncio.sleep(0)
+
+        assert order == ["first-start", "first-end", "second-start", "second-end"]
+        assert not job_manager.is_running("first")
+
+    @pytest.mark.asyncio
+    async def test_job_has_its_own_decryption_cache(self):
+        """Test that a job does not fill the decryption cache of the request that submitted it"""
+        from src.api.common.utils import encryption
+        from src.api.sync.services.sync_jobs import SyncJobManager
+        identifier = encryption.encrypt_data("client@example.com")
+        job_caches = []
+
+        async def job():
+            job_caches.append(encryption._decryption_cache.get())
+            encryption.decrypt_data(identifier)
+
+        with encryption.decryption_cache():
+            request_cache = encryption._decryption_cache.get()
+            await SyncJobManager().submit("process", job)
+
+        assert job_caches[0] is not None
+        assert job_caches[0] is not request_cache
+        assert identifier in job_caches[0]
+        assert identifier not in request_cache
+
+    @pytest.mark.asyncio
+    async def test_process_events_streams_until_completed(self, test_session):
+        """Test that the SSE stream sends the progress events until the process finishes"""
+        import asyncio
+        import json
+        from contextlib import nullcontext
+        from src.api.sync.services.sync_jobs import SyncJobManager
+        from src.api.sync.services.sync_management_service import process_events, run_process_job
+        job_manager = SyncJobManager()
+        execution = self._create_execution(test_session)
+        session_factory = lambda: nullcontext(test_session)
+
+        stream = process_events(execution.process_id, job_manager, session_factory)
+        first = await stream.__anext__()
+        with patch("src.api.sync.services.sync_management_service.run_sync_step",
+                   AsyncMock(return_value={"success": True, "linked": 1})):
+            job_manager.submit(execution.process_id, lambda: run_process_job(
+                execution.process_id, job_manager, session_factory))
+            events = [first] + [event async for event in stream]
+
+        payloads = [json.loads(event.split("data: ", 1)[1]) for event in events]
+        assert all(event.startswith("event: progress\n") for event in events)
+        assert payloads[0]["status"] == "running"
+        assert payloads[-1]["status"] == "completed"
+        assert payloads[-1]["progress"]["completed_steps"] == 1
+
+    @pytest.mark.asyncio
+    async def test_process_events_unknown_process(self, test_session):
+        """Test streaming the events of a process that does not exist"""
+        from contextlib import nullcontext
+        from src.api.sync.services.sync_jobs import SyncJobManager
+        from src.api.sync.services.sync_management_service import process_events
+
+        events = [event async for event in process_events(
+            "unknown", SyncJobManager(), lambda: nullcontext(test_session))]
+
+        assert len(events) == 1
+        assert events[0].startswith("event: error\n")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_process_is_failed(self, test_session):
+        """Test that a process interrupted on shutdown is recorded as failed"""
+        import asyncio
+        from contextlib import nullcontext
+        from src.api.sync.models.sync_execution import SyncExecution, SyncExecutionStatus
+        from src.api.sync.services.sync_jobs import SyncJobManager
+        from src.api.sync.services.sync_management_service import run_process_job
+        job_manager = SyncJobManager()
+        execution = self._create_execution(test_session)
+
+        async def slow_step(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        with patch("src.api.sync.services.sync_management_service.run_sync_step", slow_step):
+            job_manager.submit(execution.process_id, lambda: run_process_job(
+                execution.process_id, job_manager, lambda: nullcontext(test_session)))
+            await asyncio.sleep(0.01)
+            await job_manager.shutdown()
+
+        stored = test_session.query(SyncExecution).filter(
+            SyncExecution.process_id == execution.process_id).one()
+        assert stored.status == SyncExecutionStatus.FAILED
+        assert stored.error_message == "Sync process interrupted"